@@ -0,0 +1,90 @@
+# backend/ai/cache.py
+"""On-disk cache for generated place lists.
+
+Entries are content-addressed: the file name is a hash of (category, region,
+prompt hash, model), so changing the prompt or the model never serves an old
+answer. Entries expire after ``TTL_S`` and the oldest are evicted once there
+are more than ``MAX_ENTRIES``.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+CACHE_DIR = Path(os.getenv("GENERATOR_CACHE_DIR", Path(__file__).resolve().parent.parent / "data" / "generator_cache"))
+TTL_S = float(os.getenv("GENERATOR_CACHE_TTL_S", str(7 * 24 * 3600)))
+MAX_ENTRIES = int(os.getenv("GENERATOR_CACHE_MAX_ENTRIES", "500"))
+
+
+def prompt_hash(*parts: str) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def cache_key(category: str, region: str, prompt_digest: str, model: str) -> str:
+    ident = json.dumps([category, region, prompt_digest, model], ensure_ascii=False)
+    return hashlib.sha256(ident.encode("utf-8")).hexdigest()
+
+
+def _path(key: str, cache_dir: Path) -> Path:
+    return cache_dir / f"{key}.json"
+
+
+def get(key: str, cache_dir: Optional[Path] = None, ttl_s: Optional[float] = None) -> Optional[List[Dict]]:
+    """Cached items for ``key``, or None if missing or expired (expired files are removed)."""
+    ttl_s = TTL_S if ttl_s is None else ttl_s
+    path = _path(key, cache_dir or CACHE_DIR)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if time.time() - entry.get("created", 0) > ttl_s:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        return None
+    return entry.get("items")
+
+
+def put(key: str, items: List[Dict], meta: Optional[Dict] = None, cache_dir: Optional[Path] = None,
+        max_entries: Optional[int] = None) -> None:
+    cache_dir = cache_dir or CACHE_DIR
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    entry = {"created": time.time(), **(meta or {}), "items": items}
+    fd, tmp = tempfile.mkstemp(dir=cache_dir, prefix=".tmp-", suffix=".json")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(entry, f, ensure_ascii=False)
+    os.replace(tmp, _path(key, cache_dir))
+    evict(cache_dir, max_entries)
+
+
+def evict(cache_dir: Optional[Path] = None, max_entries: Optional[int] = None) -> int:
+    """Drop the least recently written entries beyond ``max_entries``; returns how many."""
+    cache_dir = cache_dir or CACHE_DIR
+    max_entries = MAX_ENTRIES if max_entries is None else max_entries
+    entries = []
+    for de in os.scandir(cache_dir) if cache_dir.exists() else []:
+        if de.name.endswith(".json") and not de.name.startswith("."):
+            try:
+                entries.append((de.stat().st_mtime, de.path))
+            except FileNotFoundError:
+                continue
+    excess = len(entries) - max_entries
+    if excess <= 0:
+        return 0
+    entries.sort()
+    for _, path in entries[:excess]:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+    return excess
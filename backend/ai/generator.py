@@ -1,9 +1,13 @@
 # backend/ai/generator.py
 
-import os, json, re
-from typing import List, Dict
+import os
+from typing import Any, Iterator, List, Dict, Tuple
+
+from . import cache as _cache
+from .json_stream import iter_objects
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+MODEL = "gpt-5"
 
 def _fallback(category: str, region: str) -> List[Dict]:
     # deterministic stub so seeding still works without an API key
@@ -25,15 +29,7 @@ def _fallback(category: str, region: str) -> List[Dict]:
         for x in base
     ]
 
-def generate_places(category: str, city: str = "Dallas-Fort Worth, TX Metroplex") -> List[Dict]:
-    region = city or "Dallas-Fort Worth, TX Metroplex"
-
-    if not OPENAI_API_KEY:
-        return _fallback(category, region)
-
-    from openai import OpenAI
-    client = OpenAI(api_key=OPENAI_API_KEY)
-
+def _build_prompts(category: str, region: str) -> Tuple[str, str]:
     system = (
         "You are a travel data generator. Return STRICT JSON array. "
         "Each item must have keys: name, category, subcategory, description, address, lat, lon, price. "
@@ -52,34 +48,90 @@ def generate_places(category: str, city: str = "Dallas-Fort Worth, TX Metroplex"
         "Include only local spots, not corporate franchises. "
         "Return ONLY the JSON array."
     )
+    return system, user
+
+def _normalize_item(item: Dict, category: str) -> Dict:
+    # ensure keys exist; allow lat/lon to be None
+    return {
+        "name": item.get("name"),
+        "category": item.get("category") or category,
+        "subcategory": item.get("subcategory") or item.get("sub_category"),
+        "description": item.get("description") or item.get("short_description") or "",
+        "address": item.get("address"),      # required by prompt; enrichment will verify/fix if needed
+        "lat": item.get("lat"),
+        "lon": item.get("lon"),
+        "price": item.get("price"),          # optional; may be None
+    }
 
-    resp = client.chat.completions.create(
-        model="gpt-5",
+def _stream_content(client: Any, system: str, user: str) -> Iterator[str]:
+    """Text deltas of a streamed chat completion."""
+    stream = client.chat.completions.create(
+        model=MODEL,
         messages=[
             {"role": "system", "content": system},
             {"role": "user", "content": user},
         ],
-        
+        stream=True,
     )
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            yield delta
 
-    content = resp.choices[0].message.content
+def iter_places(
+    category: str,
+    city: str = "Dallas-Fort Worth, TX Metroplex",
+    use_cache: bool = True,
+    refresh: bool = False,
+    client: Any = None,
+) -> Iterator[Dict]:
+    """
+    Like generate_places, but yields each normalized place as soon as its JSON object
+    has streamed in, so callers can start inserting before the model has finished.
+    Raises ValueError on the first malformed fragment. The result is only cached once
+    the whole array has parsed.
+    """
+    region = city or "Dallas-Fort Worth, TX Metroplex"
+
+    if client is None and not OPENAI_API_KEY:
+        yield from _fallback(category, region)
+        return
+
+    system, user = _build_prompts(category, region)
+    key = _cache.cache_key(category, region, _cache.prompt_hash(system, user), MODEL)
+    if use_cache and not refresh:
+        cached = _cache.get(key)
+        if cached is not None:
+            yield from cached
+            return
 
-    # try to extract an array
-    m = re.search(r"\[\s*{.*}\s*\]", content, flags=re.S)
-    arr_text = m.group(0) if m else content
-    data = json.loads(arr_text)
+    if client is None:
+        from openai import OpenAI
+        client = OpenAI(api_key=OPENAI_API_KEY)
 
-    # normalize: ensure keys exist; allow lat/lon to be None
     normalized: List[Dict] = []
-    for item in data:
-        normalized.append({
-            "name": item.get("name"),
-            "category": item.get("category") or category,
-            "subcategory": item.get("subcategory") or item.get("sub_category"),
-            "description": item.get("description") or item.get("short_description") or "",
-            "address": item.get("address"),      # required by prompt; enrichment will verify/fix if needed
-            "lat": item.get("lat"),
-            "lon": item.get("lon"),
-            "price": item.get("price"),          # optional; may be None
-        })
-    return normalized
+    for item in iter_objects(_stream_content(client, system, user)):
+        place = _normalize_item(item, category)
+        normalized.append(place)
+        yield place
+
+    if use_cache:
+        _cache.put(key, normalized, meta={"category": category, "region": region, "model": MODEL})
+
+def generate_places(
+    category: str,
+    city: str = "Dallas-Fort Worth, TX Metroplex",
+    use_cache: bool = True,
+    refresh: bool = False,
+    client: Any = None,
+) -> List[Dict]:
+    """
+    Ask the model for places in ``category`` around ``city``.
+    - use_cache: serve/store results in the on-disk cache (see ai/cache.py)
+    - refresh: skip the cache lookup but still store the fresh answer
+    - client: anything with ``chat.completions.create`` (defaults to an OpenAI client);
+      pass a fake to run offline
+    """
+    return list(iter_places(category, city=city, use_cache=use_cache, refresh=refresh, client=client))
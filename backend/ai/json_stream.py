@@ -0,0 +1,132 @@
+# backend/ai/json_stream.py
+"""Incremental parser for a JSON array of objects arriving in chunks.
+
+Model output is usually ``[{...}, {...}]`` but may be wrapped in prose or a
+```json fence. ``ObjectArrayParser.feed`` returns each top-level object as soon
+as its closing brace arrives. Scanning is a single forward pass over each
+character (string/escape state plus brace depth), so long outputs cost linear
+time. Anything that isn't an object inside the array raises ``ValueError`` at
+that point instead of after the whole response has been read.
+"""
+
+import json
+from typing import Dict, Iterable, Iterator, List
+
+_WS = " \t\r\n"
+
+
+class ObjectArrayParser:
+    def __init__(self) -> None:
+        self._buf = ""
+        self._pos = 0          # next unread index in _buf
+        self._state = "seek"   # seek -> element -> (object) -> after -> done
+        self._depth = 0
+        self._in_str = False
+        self._escape = False
+        self._obj_start = -1
+        self.count = 0
+
+    @property
+    def done(self) -> bool:
+        return self._state == "done"
+
+    def feed(self, chunk: str) -> List[Dict]:
+        """Consume ``chunk``; return the objects it completed (possibly none)."""
+        if not chunk or self.done:
+            return []
+        self._buf += chunk
+        out: List[Dict] = []
+        buf = self._buf
+        i = self._pos
+        n = len(buf)
+
+        while i < n:
+            if self._state == "seek":
+                # first "[" whose next non-space char opens an object or closes the array
+                j = buf.find("[", i)
+                if j == -1:
+                    i = n
+                    break
+                k = j + 1
+                while k < n and buf[k] in _WS:
+                    k += 1
+                if k == n:
+                    i = j  # need more input to decide
+                    break
+                if buf[k] in "{]":
+                    self._state = "element"
+                    i = j + 1
+                else:
+                    i = j + 1
+                continue
+
+            ch = buf[i]
+            if self._state in ("element", "after"):
+                if ch in _WS:
+                    i += 1
+                elif ch == "," and self._state == "after":
+                    self._state = "element"
+                    i += 1
+                elif ch == "]":
+                    self._state = "done"
+                    i += 1
+                    break
+                elif ch == "{" and self._state == "element":
+                    self._state = "object"
+                    self._obj_start = i
+                    self._depth = 1
+                    i += 1
+                else:
+                    raise ValueError(f"unexpected {ch!r} at offset {i} in generated JSON array")
+                continue
+
+            # inside an object: track strings and depth until the matching "}"
+            if self._in_str:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_str = False
+            elif ch == '"':
+                self._in_str = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    text = buf[self._obj_start:i + 1]
+                    try:
+                        obj = json.loads(text)
+                    except ValueError as e:
+                        raise ValueError(f"malformed object #{self.count + 1} in generated JSON: {e}") from e
+                    if not isinstance(obj, dict):
+                        raise ValueError(f"array element #{self.count + 1} is not an object")
+                    out.append(obj)
+                    self.count += 1
+                    self._state = "after"
+            i += 1
+
+        # drop consumed text so the buffer only holds the current partial object
+        keep_from = self._obj_start if self._state == "object" else i
+        self._buf = buf[keep_from:]
+        if self._state == "object":
+            self._obj_start = 0
+        self._pos = i - keep_from
+        return out
+
+    def close(self) -> None:
+        """Call at end of stream; raises if the array never started or never closed."""
+        if self._state == "seek":
+            raise ValueError("no JSON array found in generated output")
+        if self._state != "done":
+            raise ValueError(f"generated JSON array was cut off after {self.count} object(s)")
+
+
+def iter_objects(chunks: Iterable[str]) -> Iterator[Dict]:
+    parser = ObjectArrayParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+        if parser.done:
+            return
+    parser.close()
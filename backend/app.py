@@ -1,39 +1,92 @@
 """FastAPI backend for serving places data and static assets."""
 
+import asyncio
+import hmac
 import json
 import os
-from collections.abc import Mapping
+import re
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Any
 from dotenv import load_dotenv
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.staticfiles import StaticFiles
 
+from . import image_variants, static_assets
+from .geo import valid_coords
+from .place_clusters import ClusterIndex
+from .place_facets import FacetIndex
+from .place_format import normalize_place
+from .place_suggest import DEFAULT_K, MAX_K, SuggestIndex
+from .schemas import TripOptimizeRequest
+from .shared_snapshot import Snapshot, SnapshotStore, encode_snapshot, join_array
+from .similar_places import DEFAULT_K as MAX_SIMILAR, get_similar_index
+from .single_flight import VersionedCache
+
 APP_DIR = Path(__file__).resolve().parent
 load_dotenv(APP_DIR.parent / '.env', override=False)
 load_dotenv(APP_DIR / '.env', override=True)
 
-# Optional: SQLAlchemy fallback if you have a DB
+# Optional: SQLAlchemy fallback if you have a DB. SQLAlchemy is only imported (and the
+# engine only created) on first use, so file mode never pays for it.
 USE_DB = os.getenv("USE_DB", "0") == "1"
-if USE_DB:
-    from sqlalchemy import create_engine, text
-    from sqlalchemy.orm import Session
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./dev.db")
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def _get_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                from sqlalchemy import create_engine
+
+                _engine = create_engine(DATABASE_URL, future=True)
+    return _engine
 
-    DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./dev.db")
-    engine = create_engine(DATABASE_URL, future=True)
 
 DATA_DIR = APP_DIR / 'data'
-DATA_DIR.mkdir(exist_ok=True)
 DATA_FILE = DATA_DIR / 'places.json'
 
 STATIC_DIR = APP_DIR / 'static'
-STATIC_DIR.mkdir(exist_ok=True)
-(STATIC_DIR / 'places').mkdir(parents=True, exist_ok=True)
+STATIC_DIR.mkdir(exist_ok=True)  # StaticFiles checks it when mounted
+
+# rebuild the places snapshot before uvicorn reports the worker ready (WARM_UP=0 to skip)
+WARM_UP = os.getenv("WARM_UP", "1") == "1"
 
-app = FastAPI(title="Places API")
+
+def warm_up() -> None:
+    """Do the work the first request would otherwise pay for."""
+    started = time.perf_counter()
+    (STATIC_DIR / 'places').mkdir(parents=True, exist_ok=True)
+    DATA_DIR.mkdir(exist_ok=True)
+    try:
+        # requests key snapshots by their base URL; $API_BASE_URL is the one clients use
+        if USE_DB:
+            _db_snapshot(SHARED_BASE_URL, WARM_UP_MAX_WAIT_S)
+        else:
+            _file_snapshot(SHARED_BASE_URL, WARM_UP_MAX_WAIT_S)
+    except Exception as exc:
+        print(f"[WARN] warm-up could not build the places snapshot: {exc}")
+    print(f"[startup] warm-up done in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+
+@asynccontextmanager
+async def _lifespan(_app: FastAPI):
+    if WARM_UP:
+        await run_in_threadpool(warm_up)
+    yield
+
+
+app = FastAPI(title="Places API", lifespan=_lifespan)
 
 # CORS: allow localhost dev ports without trailing slash issues
 app.add_middleware(
@@ -50,6 +103,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# export_to_json --shards output; mounted before /static so it gets its own cache headers
+app.mount("/static/shards", static_assets.ShardFiles(directory=str(STATIC_DIR / "shards"), check_dir=False),
+          name="shards")
 # Serve /static (images live in /static/places/)
 app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
 
@@ -61,112 +117,120 @@ def _read_places_json_bytes() -> bytes:
     return b"[]"
 
 
-def _resolve_image_url(raw: Any, base_url: str) -> str | None:
-    if not raw:
+# The normalized, encoded payload (+ id/category indexes) is a Snapshot, rebuilt once per
+# data version: concurrent requests share a single rebuild and meanwhile get the previous
+# snapshot (or wait at most SNAPSHOT_MAX_WAIT_S when there is none).
+# In places.json mode, responses for API_BASE_URL come from one mmap'd file shared by all
+# workers; other base URLs (e.g. a LAN address during dev) get a per-process snapshot.
+SHARED_SNAPSHOT = os.getenv("SHARED_SNAPSHOT", "1") == "1"
+SHARED_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000").rstrip("/")
+SNAPSHOT_DIR = DATA_DIR / "snapshots"
+SNAPSHOT_MAX_WAIT_S = float(os.getenv("SNAPSHOT_MAX_WAIT_S", "2"))
+SNAPSHOT_SERVE_STALE = os.getenv("SNAPSHOT_SERVE_STALE", "1") == "1"
+DB_SNAPSHOT_TTL_S = float(os.getenv("DB_SNAPSHOT_TTL_S", "5"))  # only for DBs without a cheap change signal
+WARM_UP_MAX_WAIT_S = 300.0
+
+_shared_store = SnapshotStore(SNAPSHOT_DIR)
+_snapshots: VersionedCache[Snapshot] = VersionedCache(SNAPSHOT_MAX_WAIT_S, SNAPSHOT_SERVE_STALE)
+_EMPTY_SNAPSHOT = Snapshot.from_bytes(encode_snapshot([]))
+
+
+def _data_file_version() -> list[int] | None:
+    try:
+        st = DATA_FILE.stat()
+    except FileNotFoundError:
         return None
-    if isinstance(raw, (list, tuple)):
-        raw = next((item for item in raw if item), None)
-        if not raw:
-            return None
-    raw = str(raw)
-    if raw.startswith(("http://", "https://")):
-        return raw
-    cleaned = raw.lstrip("/")
-    if cleaned.startswith("static/"):
-        cleaned = cleaned[len("static/"):]
-    return f"{base_url}/static/{cleaned}"
-
-
-def _pick_first(*values: Any) -> Any:
-    for value in values:
-        if value is not None and value != "":
-            return value
-    return None
-
-
-def _normalize_price_level(raw: Any) -> tuple[int | None, str | None]:
-    if raw is None:
-        return None, None
-    value = raw
-    if isinstance(value, (list, tuple)):
-        value = next((item for item in value if item), None)
-        if value is None:
-            return None, None
-    if isinstance(value, (int, float)):
-        level = int(value) if value > 0 else None
-        display = '$' * level if level else None
-        return level, display
-    text_value = str(value).strip()
-    if not text_value:
-        return None, None
-    if all(ch == '$' for ch in text_value):
-        level = len(text_value)
-        display = text_value if level else None
-        return level or None, display
+    return [st.st_mtime_ns, st.st_size, st.st_ino]
+
+
+def _db_version() -> list[Any]:
+    """Changes whenever the DB may have: SQLite file + WAL stats, else a TTL bucket."""
+    url = _get_engine().url
+    if url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:"):
+        version: list[Any] = []
+        for path in (url.database, url.database + "-wal"):
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                version += [0, 0]
+                continue
+            version += [st.st_mtime_ns, st.st_size]
+        return version
+    return ["ttl", int(time.time() // DB_SNAPSHOT_TTL_S)]
+
+
+def _load_places(base_url: str) -> list[dict[str, Any]]:
+    """places.json parsed and normalized; raises if the file can't be parsed."""
+    raw = json.loads(_read_places_json_bytes().decode("utf-8"))
+    if isinstance(raw, Mapping):
+        raw = [raw]
+    elif not isinstance(raw, list):
+        raw = []
+    return [normalize_place(item, base_url) for item in raw]
+
+
+def _db_places(base_url: str) -> list[dict[str, Any]]:
+    from sqlalchemy import text
+    from sqlalchemy.orm import Session
+
+    with Session(_get_engine()) as db:
+        rows = db.execute(
+            text(
+                """
+                SELECT *
+                FROM places
+                ORDER BY id ASC
+                """
+            )
+        ).mappings().all()
+    # rows retired by a differential refresh (refresh_places) are soft-deleted
+    return [normalize_place(dict(row), base_url) for row in rows if not row.get("deleted_at")]
+
+
+def _build_file_snapshot(base_url: str, version: list[int] | None, force: bool = False) -> Snapshot:
+    if SHARED_SNAPSHOT and base_url == SHARED_BASE_URL:
+        # the store keeps its last good generation if places.json can't be parsed
+        snap = _shared_store.get(version, lambda: _load_places(base_url), {"baseUrl": base_url}, force=force)
+        if snap is not None:
+            return snap
+    return Snapshot.from_bytes(encode_snapshot(_load_places(base_url)))
+
+
+def _file_snapshot(base_url: str, max_wait_s: float | None = None) -> Snapshot:
+    version = _data_file_version()
+    return _snapshots.get(("file", base_url), version,
+                          lambda: _build_file_snapshot(base_url, version), max_wait_s)
+
+
+def _db_snapshot(base_url: str, max_wait_s: float | None = None) -> Snapshot:
+    return _snapshots.get(("db", base_url), _db_version(),
+                          lambda: Snapshot.from_bytes(encode_snapshot(_db_places(base_url))), max_wait_s)
+
+
+def _places_snapshot(base_url: str) -> Snapshot:
+    if USE_DB:
+        try:
+            return _db_snapshot(base_url)
+        except Exception as exc:
+            # Fall through to file if DB not ready; log for visibility.
+            print(f"[WARN] DB read failed, falling back to file: {exc}")
     try:
-        numeric = float(text_value)
-        level = int(numeric) if numeric > 0 else None
-        display = '$' * level if level else None
-        return level, display
-    except ValueError:
-        pass
-    return None, text_value or None
-
-
-def _normalize_place(place: Mapping[str, Any], base_url: str) -> dict[str, Any]:
-    data = dict(place)
-    image_url = _resolve_image_url(
-        _pick_first(
-            data.get("imageUrl"),
-            data.get("image_url"),
-            data.get("photo_url"),
-            data.get("photoPath"),
-        ),
-        base_url,
-    )
-    price_level_raw = _pick_first(
-        data.get("priceDisplay"),
-        data.get("price_display"),
-        data.get("priceLevel"),
-        data.get("price_level"),
-        data.get("price"),
-    )
-    price_level, price_display = _normalize_price_level(price_level_raw)
-    maps_raw = _pick_first(
-        data.get("mapsUrl"),
-        data.get("maps_url"),
-        data.get("directionsUrl"),
-        data.get("directions_url"),
-    )
-    maps_url = None
-    if maps_raw:
-        candidate = str(maps_raw).strip()
-        maps_url = candidate or None
-    description = _pick_first(data.get("description"), data.get("short_description"))
-    city = _pick_first(data.get("city"), data.get("address"))
-
-    normalized = {
-        "id": data.get("id"),
-        "name": data.get("name"),
-        "category": data.get("category"),
-        "description": description,
-        "address": data.get("address"),
-        "city": city,
-        "lat": data.get("lat"),
-        "lon": data.get("lon"),
-        "rating": data.get("rating"),
-        "priceLevel": price_level,
-        "priceDisplay": price_display,
-        "imageUrl": image_url,
-        "mapsUrl": maps_url,
-        "directionsUrl": maps_url,
-        "directions_url": maps_url,
-    }
-    # Keep any extra fields so the frontend can opt into them without backend changes.
-    for key, value in data.items():
-        if key not in normalized:
-            normalized[key] = value
-    return normalized
+        return _file_snapshot(base_url)
+    except TimeoutError:
+        raise HTTPException(status_code=503, detail="Places are being rebuilt", headers={"Retry-After": "1"})
+    except Exception as exc:
+        print(f"[WARN] could not parse {DATA_FILE}: {exc}")
+        return _EMPTY_SNAPSHOT
+
+
+def _stream(parts: Iterable[bytes | memoryview], length: int | None = None) -> StreamingResponse:
+    """Send snapshot slices as-is (no copy into one bytes object)."""
+    async def body():
+        for part in parts:
+            yield part
+
+    headers = {"Content-Length": str(length)} if length is not None else None
+    return StreamingResponse(body(), media_type="application/json", headers=headers)
 
 
 @app.get("/api/health")
@@ -175,40 +239,316 @@ def health():
 
 
 @app.get("/api/places")
-def get_places(request: Request):
-    """Return places enriched with absolute image URLs for the frontend."""
+def get_places(
+    request: Request,
+    category: list[str] | None = Query(None),
+    price_level: list[int] | None = Query(None),
+    min_rating: float | None = Query(None, ge=0, le=5),
+    bbox: str | None = None,
+):
+    """Return places enriched with absolute image URLs for the frontend.
+
+    Repeat ``category`` / ``price_level`` to restrict the list to those values; ``min_rating``
+    and ``bbox`` (``minLat,minLon,maxLat,maxLon``) narrow it further. Filters combine with AND.
+    """
     base_url = str(request.base_url).rstrip("/")
+    if price_level or min_rating is not None or bbox:
+        box = _parse_bbox(bbox) if bbox else None
+        cols = _place_columns(base_url)
+        positions = cols.select(category, price_level, min_rating, box)
+        # positions index the snapshot the columns were built from, which may no longer be current
+        return Response(content=b"".join(join_array(cols.source.item_at(int(p)) for p in positions)),
+                        media_type="application/json")
+    snap = _places_snapshot(base_url)
+    if category:
+        # one small copy beats a send() per item
+        return Response(content=b"".join(join_array(snap.category_parts(category))), media_type="application/json")
+    return _stream(snap.chunks(), len(snap.payload))
 
-    if USE_DB:
+
+# Indexes derived from the snapshot (filter columns, map clusters, facets, typeahead) are kept
+# per base URL and rebuilt, or updated, the first time they're asked for after the snapshot changed.
+_derived: dict[tuple[str, str], Any] = {}
+_derived_lock = threading.Lock()
+
+
+def _derived_index(kind: str, base_url: str, build: Callable[[Any, Snapshot], Any]) -> Any:
+    """``build(previous_index_or_None, snapshot)`` for the current snapshot, cached until it changes."""
+    snap = _places_snapshot(base_url)
+    index = _derived.get((kind, base_url))
+    if index is not None and index.source is snap:
+        return index
+    with _derived_lock:
+        index = _derived.get((kind, base_url))
+        if index is None or index.source is not snap:
+            index = _derived[(kind, base_url)] = build(index, snap)
+    return index
+
+
+def _place_clusters(base_url: str) -> ClusterIndex:
+    return _derived_index("clusters", base_url, lambda prev, snap: (prev or ClusterIndex()).updated(snap))
+
+
+def _place_columns(base_url: str) -> Any:
+    from .place_columns import PlaceColumns  # NumPy only once a filtered list is asked for
+
+    return _derived_index("columns", base_url, lambda _prev, snap: PlaceColumns.build(snap))
+
+
+def _parse_bbox(value: str) -> tuple[float, float, float, float]:
+    try:
+        min_lat, min_lon, max_lat, max_lon = (float(v) for v in value.split(","))
+    except ValueError:
+        raise HTTPException(status_code=422, detail="bbox must be minLat,minLon,maxLat,maxLon")
+    if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lon <= 180 and -180 <= max_lon <= 180):
+        raise HTTPException(status_code=422, detail="bbox out of range")
+    return min_lat, min_lon, max_lat, max_lon
+
+
+@app.get("/api/places/clusters")
+def get_place_clusters(request: Request, bbox: str, zoom: int = Query(..., ge=0, le=30)):
+    """Clusters (centroid, count, representative ids) of the places in ``bbox`` at map ``zoom``.
+
+    ``bbox`` is ``minLat,minLon,maxLat,maxLon`` (minLon > maxLon crosses the antimeridian).
+    The answer has at most a few hundred clusters however many places are in view; when the
+    bbox is large for the zoom, coarser clusters are returned and ``zoom`` says which level.
+    """
+    box = _parse_bbox(bbox)
+    level, clusters = _place_clusters(str(request.base_url).rstrip("/")).query(box, zoom)
+    return JSONResponse({
+        "zoom": level,
+        "total": sum(c.count for c in clusters),
+        "clusters": [c.to_json() for c in clusters],
+    })
+
+
+@app.get("/api/places/facets")
+def get_place_facets(
+    request: Request,
+    category: list[str] | None = Query(None),
+    price_level: list[int] | None = Query(None),
+    min_rating: float | None = Query(None, ge=0, le=5),
+):
+    """Counts per category, price level and rating bucket, so filters render without the catalog.
+
+    ``category`` and ``price_level`` may repeat. Each facet is counted under the other
+    facets' filters; ``total`` is the number of places matching all of them.
+    """
+    index = _derived_index("facets", str(request.base_url).rstrip("/"),
+                           lambda prev, snap: (prev or FacetIndex()).updated(snap))
+    return JSONResponse(index.facets(category, price_level, min_rating))
+
+
+@app.get("/api/places/suggest")
+def suggest_places(request: Request, q: str = "", limit: int = Query(DEFAULT_K, ge=1, le=MAX_K)):
+    """Typeahead: places whose name, category or city words start with the words of ``q``."""
+    index = _derived_index("suggest", str(request.base_url).rstrip("/"),
+                           lambda _prev, snap: SuggestIndex.build(snap))
+    return JSONResponse(index.suggest(q[:100], limit))
+
+
+@app.get("/api/places/{place_id:int}")
+def get_place(place_id: int, request: Request):
+    item = _places_snapshot(str(request.base_url).rstrip("/")).item(place_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Place not found")
+    return Response(content=bytes(item), media_type="application/json")
+
+
+@app.get("/api/places/{place_id:int}/similar")
+def get_similar_places(place_id: int, request: Request, limit: int = Query(6, ge=1, le=MAX_SIMILAR)):
+    """Precomputed neighbours of a place (``python -m backend.similar_places``), best first.
+
+    Each item is the place as in ``/api/places`` with a ``similarity`` score in front.
+    Neighbours that are no longer in the catalog are skipped.
+    """
+    index = get_similar_index()
+    neighbours = index.get(place_id)
+    if index.k is not None and limit > index.k:
+        raise HTTPException(status_code=422, detail=f"limit is at most {index.k}, the neighbours stored per place")
+    snap = _places_snapshot(str(request.base_url).rstrip("/"))
+    if snap.item(place_id) is None:
+        raise HTTPException(status_code=404, detail="Place not found")
+    parts = []
+    for other, score in neighbours:
+        item = snap.item(other)
+        if item is None:
+            continue
+        parts.append(b'{"similarity":' + json.dumps(score).encode() + b"," + bytes(item[1:]))
+        if len(parts) == limit:
+            break
+    return Response(content=b"".join(join_array(iter(parts))), media_type="application/json")
+
+
+def _require_admin(request: Request) -> None:
+    """Admin endpoints need ``X-Admin-Token: $ADMIN_TOKEN``; without a configured token they're off."""
+    token = os.getenv("ADMIN_TOKEN")
+    if not token:
+        raise HTTPException(status_code=503, detail="Admin endpoints are disabled; set ADMIN_TOKEN to enable them")
+    if not hmac.compare_digest(request.headers.get("x-admin-token", "").encode(), token.encode()):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+@app.post("/api/places/reload")
+def reload_places(request: Request):
+    """Rebuild the snapshot from places.json now (export_to_json --notify).
+
+    The shared snapshot is republished, so every worker switches to it on its next request;
+    other snapshots are rebuilt on their next request while the old ones keep serving.
+    """
+    _require_admin(request)
+    _snapshots.expire()
+    if SHARED_SNAPSHOT and not USE_DB:
+        _build_file_snapshot(SHARED_BASE_URL, _data_file_version(), force=True)
+    return {"ok": True, "version": _data_file_version()}
+
+
+IMPORT_DIR = DATA_DIR / "imports"
+
+
+@app.post("/api/places/import")
+async def import_places_feed(request: Request, format: str | None = None):
+    """Bulk upsert a CSV or NDJSON feed (the request body) into the database.
+
+    The format comes from ``?format=`` or the Content-Type (text/csv, application/x-ndjson).
+    The body is parsed as it arrives and imported in batches on a worker thread, so memory
+    stays flat however large the upload is; rejected rows are written under data/imports.
+
+    Rows upsert on (name, address), so when a feed lists the same place more than once the
+    last row wins. Repeats within one batch are dropped before writing and counted in
+    ``collapsed``; later repeats simply update the row again.
+    """
+    _require_admin(request)
+    if not USE_DB:
+        raise HTTPException(status_code=409, detail="Places are served from places.json (USE_DB=0); "
+                                                    "importing would write to a database nobody reads")
+    from . import import_places  # pydantic batch validators and SQLAlchemy only when importing
+
+    fmt = format or import_places.format_for(content_type=request.headers.get("content-type"))
+    if fmt not in import_places.FORMATS:
+        raise HTTPException(status_code=415, detail="Send text/csv or application/x-ndjson, or pass ?format=")
+    rejected = IMPORT_DIR / f"rejected-{time.time_ns():x}-{os.getpid()}.ndjson"
+    loop = asyncio.get_running_loop()
+    body = request.stream().__aiter__()
+
+    async def next_chunk() -> bytes | None:
         try:
-            with Session(engine) as db:  # type: ignore[misc]
-                rows = db.execute(
-                    text(
-                        """
-                        SELECT *
-                        FROM places
-                        ORDER BY id ASC
-                        """
-                    )
-                ).mappings().all()
-                payload = [_normalize_place(dict(row), base_url) for row in rows]
-                return JSONResponse(content=payload, media_type="application/json")
-        except Exception as exc:
-            # Fall through to file if DB not ready; log for visibility.
-            print(f"[WARN] DB read failed, falling back to file: {exc}")
+            return await body.__anext__()
+        except StopAsyncIteration:
+            return None
+
+    def chunks() -> Iterator[bytes]:
+        # runs on the importer's parse thread; each chunk is awaited on the event loop
+        while (chunk := asyncio.run_coroutine_threadsafe(next_chunk(), loop).result()) is not None:
+            yield chunk
 
     try:
-        raw = json.loads(_read_places_json_bytes().decode("utf-8"))
-    except Exception:
-        raw = []
+        report = await run_in_threadpool(
+            import_places.import_stream, import_places.ChunkStream(chunks()), fmt, _get_engine(),
+            rejected_path=rejected,
+        )
+    except RuntimeError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    _snapshots.expire()
+    result = report.as_dict()
+    if report.rejected_path:
+        result["rejectedFile"] = rejected.name  # fetch it from /api/places/import/rejected/<name>
+    return result
+
+
+_REJECTED_FILE = re.compile(r"rejected-[0-9a-f]+-\d+\.ndjson")
+
+
+@app.get("/api/places/import/rejected/{name}")
+def get_import_rejects(name: str, request: Request):
+    """Rejected rows of an earlier import (its ``rejectedFile``), as NDJSON."""
+    _require_admin(request)
+    path = IMPORT_DIR / name
+    if not _REJECTED_FILE.fullmatch(name) or not path.is_file():
+        raise HTTPException(status_code=404, detail="Not found")
+    return FileResponse(path, media_type="application/x-ndjson")
+
+
+MAX_TRIP_STOPS = 500
+MAX_TRIP_BUDGET_MS = 1000.0
+
+
+@app.post("/api/trips/optimize")
+def optimize_trip(body: TripOptimizeRequest, request: Request):
+    """Visiting order for a trip's places (shortest route, respecting time windows when given).
+
+    Places that are unknown or have no coordinates come back in ``unplaced``.
+    """
+    from . import trips  # NumPy is only imported once someone plans a trip
+
+    place_ids = trips.unique_ids(body.place_ids)
+    if not place_ids:
+        raise HTTPException(status_code=422, detail="place_ids must not be empty")
+    if len(place_ids) > MAX_TRIP_STOPS:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_TRIP_STOPS} places per trip")
+
+    snap = _places_snapshot(str(request.base_url).rstrip("/"))
+    stops: dict[int, tuple[float, float]] = {}
+    unplaced: list[int] = []
+    for pid in place_ids:
+        raw = snap.item(pid)
+        place = json.loads(bytes(raw)) if raw is not None else {}
+        coords = valid_coords(place.get("lat"), place.get("lon"))
+        if coords is None:
+            unplaced.append(pid)
+        else:
+            stops[pid] = coords
+
+    windows = {
+        w.place_id: (
+            w.open if w.open is not None else float("-inf"),
+            w.close if w.close is not None else float("inf"),
+        )
+        for w in body.time_windows
+    }
+
+    plan = trips.optimize_route(
+        stops,
+        start=(body.start.lat, body.start.lon) if body.start else None,
+        return_to_start=body.return_to_start,
+        windows=windows,
+        start_minutes=body.start_time,
+        visit_minutes=body.visit_minutes,
+        speed_kmh=body.speed_kmh,
+        time_budget_ms=min(body.time_budget_ms, MAX_TRIP_BUDGET_MS),
+    )
+    return {
+        "order": plan.order,
+        "unplaced": unplaced,
+        "distanceKm": plan.distance_km,
+        "legsKm": plan.legs_km,
+        "arrivals": plan.arrivals,
+        "late": plan.late,
+        "iterations": plan.iterations,
+        "elapsedMs": plan.elapsed_ms,
+    }
+
+
+@app.get(image_variants.VARIANT_URL_PREFIX + "/{filename}")
+def place_image_variant(filename: str, v: str | None = None):
+    """Resized place image; built on first request if the batch job hasn't made it yet.
+
+    ``v`` is the source image's content hash; when it is current the response is immutable.
+    """
+    path = image_variants.ensure_variant(filename)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    headers = None
+    source = image_variants.find_source(image_variants.parse_variant_name(filename)[0])
+    if v and source is not None and v == static_assets.content_hash(source.name):
+        headers = {"Cache-Control": static_assets.IMMUTABLE_CACHE_CONTROL}
+    return FileResponse(path, headers=headers)
 
-    if isinstance(raw, Mapping):
-        raw = [raw]
-    elif not isinstance(raw, list):
-        raw = []
 
-    payload = [_normalize_place(item, base_url) for item in raw]
-    return JSONResponse(content=payload, media_type="application/json")
+@app.get(static_assets.ASSET_URL_PREFIX + "/{name}")
+def place_image_hashed(name: str, request: Request):
+    """Place image under a content-hashed name, cached by browsers for a year."""
+    return static_assets.serve_hashed(name, request)
 
 
 # Optional: expose the raw file as well for debugging
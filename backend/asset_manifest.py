@@ -0,0 +1,236 @@
+"""In-memory manifest of the images in ``static/places/``.
+
+One ``os.scandir`` pass records, for every image, its byte size, mtime, content
+hash and pixel dimensions, grouped by slug. The manifest is saved to
+``data/image_manifest.json`` so a rebuild only re-hashes files whose size or
+mtime changed, and it is re-checked (one ``stat`` of the directory and of the
+manifest file) at most every ``CHECK_INTERVAL_S`` seconds, so lookups never touch
+the disk per row or per request.
+
+    python -m backend.asset_manifest          # rebuild and print a summary
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent
+PLACES_DIR = BACKEND_DIR / "static" / "places"
+MANIFEST_FILE = BACKEND_DIR / "data" / "image_manifest.json"
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".webp")
+CHECK_INTERVAL_S = 2.0
+HASH_LEN = 12
+
+
+@dataclass
+class ImageEntry:
+    name: str
+    slug: str
+    size: int
+    mtime_ns: int
+    hash: Optional[str]
+    width: Optional[int] = None
+    height: Optional[int] = None
+    broken: bool = False
+
+
+def _hash_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()[:HASH_LEN]
+
+
+def _probe(path: Path, size: int, mtime_ns: int) -> ImageEntry:
+    """Hash the file and read its dimensions from the header (no full decode)."""
+    name = path.name
+    slug = path.stem
+    if size == 0:
+        return ImageEntry(name, slug, size, mtime_ns, None, broken=True)
+    digest = _hash_file(path)
+    width = height = None
+    broken = False
+    try:
+        from PIL import Image
+    except ImportError:
+        Image = None
+    if Image is not None:
+        try:
+            with Image.open(path) as im:
+                width, height = im.size
+        except Exception:
+            broken = True
+    return ImageEntry(name, slug, size, mtime_ns, digest, width, height, broken)
+
+
+class AssetManifest:
+    def __init__(self, places_dir: Path = PLACES_DIR, manifest_file: Path = MANIFEST_FILE):
+        self.places_dir = places_dir
+        self.manifest_file = manifest_file
+        self._lock = threading.RLock()
+        self._by_name: dict[str, ImageEntry] = {}
+        self._by_slug: dict[str, list[ImageEntry]] = {}
+        self._dir_mtime_ns: Optional[int] = None
+        self._file_mtime_ns: Optional[int] = None
+        self._checked_at = 0.0
+
+    # ----- lookups (in memory) -----
+
+    def lookup(self, name: str) -> Optional[ImageEntry]:
+        self._maybe_refresh()
+        return self._by_name.get(name)
+
+    def files_for_slug(self, slug: str, exts: Iterable[str] = IMAGE_EXTS) -> list[ImageEntry]:
+        """Usable (non-broken) images for ``slug`` in ``exts`` preference order."""
+        self._maybe_refresh()
+        entries = self._by_slug.get(slug) or []
+        order = {ext: i for i, ext in enumerate(exts)}
+        usable = [e for e in entries if not e.broken and Path(e.name).suffix.lower() in order]
+        return sorted(usable, key=lambda e: order[Path(e.name).suffix.lower()])
+
+    def entries(self) -> list[ImageEntry]:
+        self._maybe_refresh()
+        return list(self._by_name.values())
+
+    # ----- maintenance -----
+
+    def _maybe_refresh(self) -> None:
+        now = time.monotonic()
+        if self._dir_mtime_ns is not None and now - self._checked_at < CHECK_INTERVAL_S:
+            return
+        with self._lock:
+            if self._dir_mtime_ns is not None and now - self._checked_at < CHECK_INTERVAL_S:
+                return
+            self._checked_at = now
+            if not self._by_name and self._dir_mtime_ns is None:
+                self._load()
+            try:
+                dir_mtime = self.places_dir.stat().st_mtime_ns
+            except FileNotFoundError:
+                dir_mtime = -1
+            try:
+                file_mtime = self.manifest_file.stat().st_mtime_ns
+            except FileNotFoundError:
+                file_mtime = None
+            if file_mtime is not None and file_mtime != self._file_mtime_ns:
+                # another process (e.g. the enrichment job) rewrote the manifest
+                self._load()
+            if dir_mtime != self._dir_mtime_ns:
+                self.rebuild()
+
+    def _load(self) -> None:
+        try:
+            raw = json.loads(self.manifest_file.read_text(encoding="utf-8"))
+            self._file_mtime_ns = self.manifest_file.stat().st_mtime_ns
+        except (FileNotFoundError, ValueError):
+            return
+        self._set_entries(ImageEntry(**item) for item in raw.get("files", []))
+        self._dir_mtime_ns = raw.get("dir_mtime_ns")
+
+    def _set_entries(self, entries: Iterable[ImageEntry]) -> None:
+        by_name: dict[str, ImageEntry] = {}
+        by_slug: dict[str, list[ImageEntry]] = {}
+        for e in entries:
+            by_name[e.name] = e
+            by_slug.setdefault(e.slug, []).append(e)
+        self._by_name, self._by_slug = by_name, by_slug
+
+    def rebuild(self) -> tuple[int, int]:
+        """Rescan the directory in one pass; returns (files, files re-probed)."""
+        with self._lock:
+            try:
+                dir_mtime = self.places_dir.stat().st_mtime_ns
+                scan = list(os.scandir(self.places_dir))
+            except FileNotFoundError:
+                self._set_entries([])
+                self._dir_mtime_ns = -1
+                return 0, 0
+            entries: list[ImageEntry] = []
+            probed = 0
+            for de in scan:
+                if de.name.startswith(".") or not de.name.lower().endswith(IMAGE_EXTS):
+                    continue
+                if not de.is_file(follow_symlinks=False):
+                    continue
+                st = de.stat(follow_symlinks=False)
+                prev = self._by_name.get(de.name)
+                if prev and prev.size == st.st_size and prev.mtime_ns == st.st_mtime_ns:
+                    entries.append(prev)
+                    continue
+                entries.append(_probe(Path(de.path), st.st_size, st.st_mtime_ns))
+                probed += 1
+            changed = probed or len(entries) != len(self._by_name)
+            self._set_entries(entries)
+            self._dir_mtime_ns = dir_mtime
+            if changed or not self.manifest_file.exists():
+                self._save()
+            return len(entries), probed
+
+    def record(self, path: Path) -> Optional[ImageEntry]:
+        """Update one file after writing it (in-place overwrites don't change the dir mtime)."""
+        path = Path(path)
+        with self._lock:
+            self._maybe_refresh()
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                self._by_name.pop(path.name, None)
+                self._set_entries(list(self._by_name.values()))
+                self._save()
+                return None
+            entry = _probe(path, st.st_size, st.st_mtime_ns)
+            self._by_name[entry.name] = entry
+            self._set_entries(list(self._by_name.values()))
+            self._dir_mtime_ns = self.places_dir.stat().st_mtime_ns
+            self._save()
+            return entry
+
+    def _save(self) -> None:
+        self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "dir_mtime_ns": self._dir_mtime_ns,
+            "files": [asdict(e) for e in sorted(self._by_name.values(), key=lambda e: e.name)],
+        }
+        fd, tmp = tempfile.mkstemp(dir=self.manifest_file.parent, prefix=".manifest-", suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"))
+        os.replace(tmp, self.manifest_file)
+        self._file_mtime_ns = self.manifest_file.stat().st_mtime_ns
+
+
+_manifest: Optional[AssetManifest] = None
+_manifest_lock = threading.Lock()
+
+
+def get_manifest() -> AssetManifest:
+    global _manifest
+    if _manifest is None:
+        with _manifest_lock:
+            if _manifest is None:
+                _manifest = AssetManifest()
+    return _manifest
+
+
+def main(argv: Optional[Iterable[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Rebuild the static/places image manifest.")
+    parser.parse_args(argv)
+
+    manifest = get_manifest()
+    files, probed = manifest.rebuild()
+    broken = [e.name for e in manifest.entries() if e.broken]
+    print(f"[manifest] {files} image(s), {probed} re-hashed -> {manifest.manifest_file}")
+    for name in broken:
+        print(f"[manifest] broken: {name}")
+
+
+if __name__ == "__main__":
+    main()
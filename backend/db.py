@@ -5,7 +5,6 @@ from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./dev.db")
-print("Using database at:", DATABASE_URL)
 
 connect_args = {}
 if DATABASE_URL.startswith("sqlite"):
@@ -0,0 +1,197 @@
+# backend/dedupe.py
+"""In-memory near-duplicate index for place ingestion.
+
+Exact ``(name, address)`` checks miss the duplicates we actually get:
+"River Legacy Park" vs "River Legacy Parks", or the fallback generator's
+"Arlington Museum of Art (museums)" vs "... (restaurants)". The index is
+loaded once per run and keeps a normalized name/address fingerprint for every
+place, bucketed by blocking keys (postal code, geohash-5 cell, and a short name
+prefix). A candidate is only compared with the places in its own buckets, so a
+lookup stays well under a millisecond however large the table is.
+
+    python -m backend.dedupe            # list near-duplicate pairs already in dev.db
+"""
+
+import argparse
+import difflib
+import re
+import sqlite3
+import unicodedata
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .geo import geohash_encode, valid_coords
+
+NAME_THRESHOLD = 0.92        # similarity needed when only the name prefix is shared
+NEARBY_NAME_THRESHOLD = 0.85  # similarity needed inside the same postal code / geohash cell
+PREFIX_LEN = 4
+GEOHASH_PRECISION = 5
+
+_PAREN_SUFFIX = re.compile(r"\s*\([^)]*\)\s*$")
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+_POSTAL = re.compile(r"\b(\d{5})(?:-\d{4})?\b")
+_STOPWORDS = {"the", "a", "an"}
+_STREET_ABBR = {
+    "street": "st", "avenue": "ave", "boulevard": "blvd", "road": "rd", "drive": "dr",
+    "lane": "ln", "parkway": "pkwy", "highway": "hwy", "place": "pl", "court": "ct",
+    "north": "n", "south": "s", "east": "e", "west": "w",
+    "northwest": "nw", "northeast": "ne", "southwest": "sw", "southeast": "se",
+}
+
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in text if not unicodedata.combining(ch)).lower().replace("&", " and ")
+
+
+def _singular(token: str) -> str:
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """'The River Legacy Parks (parks)' -> 'river legacy park'."""
+    if not name:
+        return ""
+    text = _PAREN_SUFFIX.sub("", name)
+    tokens = [_singular(t) for t in _NON_WORD.split(_fold(text)) if t and t not in _STOPWORDS]
+    return " ".join(tokens)
+
+
+def normalize_address(address: Optional[str]) -> str:
+    """Street part of an address with common suffixes abbreviated: '701 nw green oaks blvd'."""
+    if not address:
+        return ""
+    street = _fold(address).split(",", 1)[0]
+    tokens = [_STREET_ABBR.get(t, t) for t in _NON_WORD.split(street) if t]
+    return " ".join(tokens)
+
+
+def postal_code(address: Optional[str]) -> Optional[str]:
+    if not address:
+        return None
+    found = _POSTAL.findall(address)
+    return found[-1] if found else None
+
+
+@dataclass
+class Fingerprint:
+    key: Any                 # whatever the caller uses to identify the place (row id, dict, ...)
+    name: str
+    address: str
+    postal: Optional[str]
+    geohash: Optional[str]
+
+    def blocks(self) -> List[str]:
+        out = []
+        if self.postal:
+            out.append(f"zip:{self.postal}")
+        if self.geohash:
+            out.append(f"gh:{self.geohash}")
+        if self.name:
+            out.append(f"name:{self.name[:PREFIX_LEN]}")
+        return out
+
+
+def fingerprint(place: Dict[str, Any], key: Any = None) -> Fingerprint:
+    coords = valid_coords(place.get("lat"), place.get("lon"))
+    return Fingerprint(
+        key=key,
+        name=normalize_name(place.get("name")),
+        address=normalize_address(place.get("address")),
+        postal=postal_code(place.get("address")),
+        geohash=geohash_encode(*coords, precision=GEOHASH_PRECISION) if coords else None,
+    )
+
+
+def _similar(a: str, b: str, threshold: float) -> bool:
+    if a == b:
+        return True
+    m = difflib.SequenceMatcher(None, a, b, autojunk=False)
+    # quick upper bounds first; the full ratio is only computed for plausible pairs
+    return m.real_quick_ratio() >= threshold and m.quick_ratio() >= threshold and m.ratio() >= threshold
+
+
+def is_duplicate(a: Fingerprint, b: Fingerprint) -> bool:
+    if not a.name or not b.name:
+        return False
+    # different postal codes mean different places, whatever they are called
+    if a.postal and b.postal and a.postal != b.postal:
+        return False
+    if a.address and b.address and a.address == b.address:
+        return _similar(a.name, b.name, NEARBY_NAME_THRESHOLD)
+    nearby = (a.postal and a.postal == b.postal) or (a.geohash and a.geohash == b.geohash)
+    if a.address and b.address and not nearby:
+        # two different street addresses with no shared locality: only exact names count
+        return a.name == b.name and _similar(a.address, b.address, NEARBY_NAME_THRESHOLD)
+    return _similar(a.name, b.name, NEARBY_NAME_THRESHOLD if nearby else NAME_THRESHOLD)
+
+
+class DedupeIndex:
+    def __init__(self) -> None:
+        self._blocks: Dict[str, List[Fingerprint]] = {}
+        self.size = 0
+
+    @classmethod
+    def from_places(cls, places: Iterable[Tuple[Any, Dict[str, Any]]]) -> "DedupeIndex":
+        """Build from ``(key, place_dict)`` pairs, e.g. existing rows keyed by id."""
+        index = cls()
+        for key, place in places:
+            index.add(place, key)
+        return index
+
+    def add(self, place: Dict[str, Any], key: Any = None) -> Fingerprint:
+        fp = fingerprint(place, key)
+        for block in fp.blocks():
+            self._blocks.setdefault(block, []).append(fp)
+        self.size += 1
+        return fp
+
+    def find(self, place: Dict[str, Any]) -> Optional[Fingerprint]:
+        """The indexed place ``place`` duplicates, or None."""
+        fp = fingerprint(place)
+        seen = set()
+        for block in fp.blocks():
+            for other in self._blocks.get(block, ()):
+                if id(other) in seen:
+                    continue
+                seen.add(id(other))
+                if is_duplicate(fp, other):
+                    return other
+        return None
+
+    def add_if_new(self, place: Dict[str, Any], key: Any = None) -> Optional[Fingerprint]:
+        """Index ``place`` unless it duplicates something; returns the match if it does."""
+        match = self.find(place)
+        if match is None:
+            self.add(place, key)
+        return match
+
+
+def main(argv: Optional[Iterable[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="List near-duplicate places already in the database.")
+    parser.add_argument("--db", type=Path, default=Path(__file__).resolve().parent.parent / "dev.db")
+    args = parser.parse_args(argv)
+
+    conn = sqlite3.connect(args.db)
+    conn.row_factory = sqlite3.Row
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(places)")}
+    live = "WHERE deleted_at IS NULL" if "deleted_at" in columns else ""  # retired by refresh_places
+    rows = conn.execute(f"SELECT id, name, address, lat, lon FROM places {live} ORDER BY id").fetchall()
+    conn.close()
+
+    index = DedupeIndex()
+    pairs = 0
+    for row in rows:
+        place = dict(row)
+        match = index.add_if_new(place, key=(row["id"], row["name"]))
+        if match is not None:
+            pairs += 1
+            print(f"[dedupe] id={row['id']} {row['name']!r} ~ id={match.key[0]} {match.key[1]!r}")
+    print(f"[dedupe] {pairs} near-duplicate row(s) among {len(rows)}")
+
+
+if __name__ == "__main__":
+    main()
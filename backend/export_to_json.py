@@ -1,53 +1,321 @@
 # backend/export_to_json.py
-import json
+"""Export the places table to the JSON file the API serves (backend/data/places.json).
+
+Rows are streamed from the DB (``yield_per``), normalized exactly like
+``/api/places`` does, and encoded one at a time into a temp file next to the
+target. The temp file is fsynced and renamed over the target, so readers only
+ever see the old file or the complete new one. A running API can then be told
+to swap its snapshot with ``--notify``.
+
+``--shards`` additionally writes content-hashed per-category and per-tile
+bundles plus a manifest for static hosting (see ShardBuilder).
+"""
 import argparse
-from sqlalchemy.orm import Session
-from .db import engine, Base
-from .models import Place
+import hashlib
+import json
+import mmap
 import os
+import tempfile
+import urllib.request
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from slugify import slugify
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from . import fast_json
+from .db import engine, Base, DATABASE_URL
+from .geo import geohash_bounds, geohash_encode, valid_coords
+from .place_format import normalize_place
+
+BACKEND_DIR = Path(__file__).resolve().parent
+DEFAULT_OUT = BACKEND_DIR / "data" / "places.json"
+YIELD_PER = 500
+RELOAD_PATH = "/api/places/reload"
+DEFAULT_SHARDS_DIR = BACKEND_DIR / "static" / "shards"
+TILE_PRECISION = 5  # geohash-5 tiles are ~4.9 km across
+NO_TILE = "_nogeo"  # tile key for places without coordinates
+SHARD_HASH_LEN = 12
+
+# placeholders the frontend filters expect even when the DB has nothing for them
+DEFAULT_KEYS = ("rating", "priceLevel", "imageUrl")
+
+
+def iter_places(db: Session, base_url: str = "", include_defaults: bool = True) -> Iterator[Dict[str, Any]]:
+    """Normalized places, streamed from the DB cursor in ``YIELD_PER`` batches."""
+    result = db.execute(
+        text("SELECT * FROM places ORDER BY id"),
+        execution_options={"yield_per": YIELD_PER},
+    ).mappings()
+    for row in result:
+        if row.get("deleted_at"):  # retired by a differential refresh
+            continue
+        item = normalize_place(row, base_url)
+        if not include_defaults:
+            for key in DEFAULT_KEYS:
+                if item.get(key) is None:
+                    item.pop(key, None)
+        yield item
+
+
+def write_json_array_atomic(items: Iterable[Any], out_path: Path) -> int:
+    """Write ``items`` as a compact JSON array to ``out_path`` via temp file + fsync + rename."""
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=out_path.parent, prefix=f".{out_path.name}.", suffix=".tmp")
+    count = 0
+    try:
+        with os.fdopen(fd, "wb", buffering=1 << 16) as f:
+            f.write(b"[")
+            for item in items:
+                if count:
+                    f.write(b",")
+                f.write(fast_json.dumps(item))
+                count += 1
+            f.write(b"]")
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, 0o644)  # mkstemp creates 0600; the API may run as another user
+        os.replace(tmp, out_path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+    _fsync_dir(out_path.parent)
+    return count
+
+
+def _fsync_dir(path: Path) -> None:
+    # make the rename itself durable; not supported on Windows
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def notify_api(api_base: str, timeout: float = 5.0) -> bool:
+    """Ask a running API to drop its snapshot and reload; False (with a warning) if it can't be reached."""
+    url = api_base.rstrip("/") + RELOAD_PATH
+    headers = {}
+    token = os.getenv("ADMIN_TOKEN")
+    if token:
+        headers["X-Admin-Token"] = token
+    req = urllib.request.Request(url, data=b"", method="POST", headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return 200 <= resp.status < 300
+    except Exception as e:
+        print(f"[WARN] could not notify API at {url}: {e}")
+        return False
+
 
+# --- sharded static export ---------------------------------------------------
 
+@dataclass
+class _Shard:
+    """Where one shard's items sit in the builder's spool file, plus its running bbox."""
+    spans: array = field(default_factory=lambda: array("Q"))  # offset, length, offset, length, ...
+    bbox: Optional[List[float]] = None  # [min_lat, min_lon, max_lat, max_lon]
 
-def export_json(out_path: str, include_defaults: bool = True) -> int:
-    """Dump all rows from places into a JSON array for the frontend."""
-    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    @property
+    def count(self) -> int:
+        return len(self.spans) // 2
+
+    def add(self, offset: int, length: int, coords: Optional[Tuple[float, float]]) -> None:
+        self.spans.extend((offset, length))
+        if coords is None:
+            return
+        lat, lon = coords
+        if self.bbox is None:
+            self.bbox = [lat, lon, lat, lon]
+        else:
+            b = self.bbox
+            b[0], b[1], b[2], b[3] = min(b[0], lat), min(b[1], lon), max(b[2], lat), max(b[3], lon)
+
+
+class ShardBuilder:
+    """Groups exported places into per-category and per-geohash-tile bundles.
+
+    Each bundle is written as compact JSON named ``<key>.<content hash>.json``, so an
+    unchanged shard keeps its URL (and its CDN cache) across exports. ``manifest.json``
+    lists every shard with its count and bounding box and is written last.
+
+    Items are encoded once into a temporary spool file as they stream past; a shard
+    only remembers the offsets of its items, so memory doesn't grow with the catalog.
+    """
+
+    def __init__(self, out_dir: Path, tile_precision: int = TILE_PRECISION):
+        self.out_dir = Path(out_dir)
+        self.tile_precision = tile_precision
+        self.groups: Dict[str, Dict[str, _Shard]] = {"category": {}, "tile": {}}
+        self.total = 0
+        self._spool = tempfile.TemporaryFile()
+        self._size = 0
+
+    def tap(self, items: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Pass ``items`` through unchanged while collecting them into shards."""
+        for item in items:
+            self.add(item)
+            yield item
+
+    def add(self, item: Dict[str, Any]) -> None:
+        body = fast_json.dumps(item)
+        offset = self._size
+        self._spool.write(body)
+        self._size += len(body)
+        self.total += 1
+        coords = valid_coords(item.get("lat"), item.get("lon"))
+        category = str(item.get("category") or "uncategorized")
+        tile = geohash_encode(*coords, precision=self.tile_precision) if coords else NO_TILE
+        for kind, key in (("category", category), ("tile", tile)):
+            self.groups[kind].setdefault(key, _Shard()).add(offset, len(body), coords)
+
+    def _write_shard(self, spool: Any, shard: _Shard, sub: Path, key: str) -> str:
+        """Write one shard (streamed from the spool, hashed on the way); returns its file name."""
+        digest = hashlib.sha256()
+        fd, tmp = tempfile.mkstemp(dir=sub, prefix=".shard.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                spans = shard.spans
+                for i in range(0, len(spans), 2):
+                    part = (b"[" if i == 0 else b",") + spool[spans[i]:spans[i] + spans[i + 1]]
+                    f.write(part)
+                    digest.update(part)
+                f.write(b"]")
+                digest.update(b"]")
+                f.flush()
+                os.fsync(f.fileno())
+            name = f"{slugify(key) or 'none'}.{digest.hexdigest()[:SHARD_HASH_LEN]}.json"
+            path = sub / name
+            if path.exists():  # same name means same bytes
+                os.unlink(tmp)
+            else:
+                os.chmod(tmp, 0o644)
+                os.replace(tmp, path)
+            return name
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def write(self) -> Dict[str, Any]:
+        manifest: Dict[str, Any] = {
+            "version": 1,
+            "generatedAt": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "tilePrecision": self.tile_precision,
+            "total": self.total,
+            "categories": [],
+            "tiles": [],
+        }
+        keep = set()
+        self._spool.flush()
+        spool = mmap.mmap(self._spool.fileno(), 0, access=mmap.ACCESS_READ) if self._size else b""
+        try:
+            for kind, groups in self.groups.items():
+                sub = self.out_dir / kind
+                sub.mkdir(parents=True, exist_ok=True)
+                for key in sorted(groups):
+                    shard = groups[key]
+                    name = self._write_shard(spool, shard, sub, key)
+                    keep.add(sub / name)
+                    entry = {"key": key, "file": f"{kind}/{name}", "count": shard.count, "bbox": shard.bbox}
+                    if kind == "tile" and key != NO_TILE:
+                        entry["cell"] = list(geohash_bounds(key))
+                    manifest["categories" if kind == "category" else "tiles"].append(entry)
+        finally:
+            if isinstance(spool, mmap.mmap):
+                spool.close()
+            self._spool.close()
+
+        manifest_path = self.out_dir / "manifest.json"
+        previous = _manifest_files(manifest_path)
+        body = fast_json.dumps(manifest)
+        _write_bytes_atomic(body, manifest_path)
+        # shards from the previous manifest stay one more round for clients still holding it
+        keep |= {self.out_dir / f for f in previous}
+        for sub in (self.out_dir / kind for kind in self.groups):
+            for path in sub.glob("*.json"):
+                if path not in keep:
+                    path.unlink()
+        return manifest
+
+
+def _manifest_files(path: Path) -> List[str]:
+    try:
+        old = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return []
+    return [e["file"] for k in ("categories", "tiles") for e in old.get(k, [])]
+
+
+def _write_bytes_atomic(body: bytes, path: Path) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(body)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def export_json(out_path: Path = DEFAULT_OUT, include_defaults: bool = True,
+                base_url: str = "", notify: Optional[str] = None,
+                shards_dir: Optional[Path] = None, tile_precision: int = TILE_PRECISION) -> int:
+    """Dump all live rows from places into the API's JSON file; returns the row count.
+
+    With ``shards_dir`` the same pass also writes per-category / per-tile bundles and
+    their manifest there (see ShardBuilder).
+    """
     Base.metadata.create_all(bind=engine)  # ensures table exists
 
+    shards = ShardBuilder(shards_dir, tile_precision) if shards_dir else None
     with Session(engine) as db:
-        rows = db.query(Place).order_by(Place.id).all()
-
-        data = []
-        for r in rows:
-            # Map DB → frontend fields.
-            item = {
-                "id": r.id,
-                "name": r.name,
-                "category": r.category,
-                "city": r.address,          # frontend uses "city"; DB uses "address"
-                "description": r.description,
-                "lat": r.lat,
-                "lon": r.lon,
-            }
-
-            if include_defaults:
-                # Frontend sample uses these; if your DB doesn’t have them,
-                # emit safe defaults so the UI/filters don't break.
-                item.setdefault("rating", None)
-                item.setdefault("priceLevel", None)
-                item.setdefault("imageUrl", None)
-
-            data.append(item)
-
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
-    print(f"✅ Wrote {len(data)} places to {out_path}")
-    return len(data)
+        items = iter_places(db, base_url, include_defaults)
+        if shards:
+            items = shards.tap(items)
+        count = write_json_array_atomic(items, Path(out_path))
+
+    print(f"✅ Wrote {count} places to {out_path}")
+    if shards:
+        manifest = shards.write()
+        print(f"✅ Wrote {len(manifest['categories'])} category and {len(manifest['tiles'])} tile shards "
+              f"to {shards_dir}")
+    if notify:
+        notify_api(notify)
+    return count
 
 if __name__ == "__main__":
     p = argparse.ArgumentParser()
-    p.add_argument("--out", default="../data.json", help="Path to write JSON (relative to backend/)")
+    p.add_argument("--out", type=Path, default=DEFAULT_OUT, help="Path to write JSON (default: backend/data/places.json)")
     p.add_argument("--no-defaults", action="store_true", help="Do not add rating/priceLevel/imageUrl placeholders")
+    p.add_argument("--base-url", default="", help="Prefix for image URLs (default: root-relative)")
+    p.add_argument("--shards", type=Path, nargs="?", const=DEFAULT_SHARDS_DIR, default=None,
+                   help="Also write per-category/per-tile bundles + manifest (default dir: backend/static/shards)")
+    p.add_argument("--tile-precision", type=int, default=TILE_PRECISION, help="Geohash length of tile shards")
+    p.add_argument("--notify", nargs="?", const=os.getenv("API_BASE_URL", "http://localhost:8000"), default=None,
+                   help="Tell the running API to reload its snapshot (default URL: $API_BASE_URL)")
     args = p.parse_args()
-    export_json(args.out, include_defaults=not args.no_defaults)
-#"Downloads\simpleapp\simpleapp\src\data\places.json"
\ No newline at end of file
+    print("Using database at:", DATABASE_URL)
+    export_json(args.out, include_defaults=not args.no_defaults, base_url=args.base_url, notify=args.notify,
+                shards_dir=args.shards, tile_precision=args.tile_precision)
@@ -1,6 +1,7 @@
 # backend/fetch_photos_and_links.py
 # (formerly enrich_links_to_db.py logic) — now also FILLS/UPDATES address using Google Maps (Places + Reverse Geocoding)
 # MODIFIED: to accept a --name argument for targeted searches.
+# Run from the repo root as a module: python -m backend.fetch_photos_and_links [--name "..."]
 
 import argparse # Added for command-line arguments
 import math
@@ -15,6 +16,9 @@ import sqlite3
 from dotenv import load_dotenv
 from slugify import slugify
 
+from .asset_manifest import get_manifest
+from .image_variants import build_all as build_image_variants
+
 # --- Configuration (No changes here) ---
 BACKEND_DIR = pathlib.Path(__file__).resolve().parent
 load_dotenv(BACKEND_DIR.parent / ".env")
@@ -172,10 +176,15 @@ def main():
 
     # Build query based on arguments
     sql = "SELECT id, name, address, city, state, lat, lon, photo_url, directions_url FROM places"
+    where = []
     params = []
+    if any(col[1] == "deleted_at" for col in conn.execute("PRAGMA table_info(places)")):
+        where.append("deleted_at IS NULL")  # skip places retired by refresh_places
     if args.name:
-        sql += " WHERE name LIKE ?"
+        where.append("name LIKE ?")
         params.append(f"%{args.name}%") # Use LIKE for flexible matching
+    if where:
+        sql += " WHERE " + " AND ".join(where)
     sql += " ORDER BY id ASC"
 
     rows = conn.execute(sql, params).fetchall()
@@ -189,6 +198,7 @@ def main():
 
     print(f"Found {len(rows)} place(s) to process...")
     updated = 0
+    downloaded: List[pathlib.Path] = []
     for row in rows:
         place = dict(row)
         
@@ -260,15 +270,26 @@ def main():
         new_dir = google_directions_url(place, place_id)
         photo_url = place.get("photo_url")
         if not photo_url and candidate:
-            photo_ref = choose_best_photo(candidate.get("photos") or [])
-            if photo_ref:
-                out = IMAGES_DIR / safe_filename(place["name"], place["id"])
-                try:
-                    if download_place_photo(photo_ref, out):
-                        photo_url = f"{PUBLIC_BASE}/{out.name}"
-                        print(" -> Downloaded new photo.")
-                except Exception as e:
-                    print(f"[WARN] photo download failed for {place['name']}: {e}")
+            out = IMAGES_DIR / safe_filename(place["name"], place["id"])
+            existing = get_manifest().lookup(out.name)
+            if existing and not existing.broken:
+                # already downloaded on an earlier run; just link it
+                photo_url = f"{PUBLIC_BASE}/{out.name}"
+                print(" -> Reusing existing photo.")
+            else:
+                photo_ref = choose_best_photo(candidate.get("photos") or [])
+                if photo_ref:
+                    try:
+                        if download_place_photo(photo_ref, out):
+                            entry = get_manifest().record(out)
+                            if entry and not entry.broken:
+                                photo_url = f"{PUBLIC_BASE}/{out.name}"
+                                downloaded.append(out)
+                                print(" -> Downloaded new photo.")
+                            else:
+                                print(" -> Downloaded photo is not a readable image; skipping.")
+                    except Exception as e:
+                        print(f"[WARN] photo download failed for {place['name']}: {e}")
         
         if (photo_url and photo_url != place.get("photo_url")) or (new_dir != place.get("directions_url")):
             conn.execute("""
@@ -283,6 +304,11 @@ def main():
 
     conn.commit()
     conn.close()
+
+    # resized thumbnails/WebP for the new photos (anything missing is also built lazily by the API)
+    if downloaded:
+        build_image_variants(downloaded)
+
     print(f"\nDone. Updated {updated} of {len(rows)} processed place(s).")
 
 if __name__ == "__main__":
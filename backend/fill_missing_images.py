@@ -1,4 +1,7 @@
-"""Populate missing place images by matching static files."""
+"""Populate missing place images by matching static files.
+
+Run from the repo root: python -m backend.fill_missing_images [--dry-run]
+"""
 
 import argparse
 import sqlite3
@@ -7,6 +10,9 @@ from typing import Iterable, Optional
 
 from slugify import slugify
 
+from .asset_manifest import get_manifest
+from .image_variants import build_all as build_image_variants
+
 BACKEND_DIR = Path(__file__).resolve().parent
 DEFAULT_DB = BACKEND_DIR.parent / "dev.db"
 STATIC_DIR = BACKEND_DIR / "static" / "places"
@@ -15,14 +21,12 @@ SUPPORTED_EXTS = [".jpg", ".jpeg", ".png", ".webp"]
 
 
 def find_candidate_files(name: str) -> Iterable[Path]:
-    """Yield static image files whose slug matches the place name."""
+    """Yield static image files whose slug matches the place name (from the image manifest)."""
     if not name:
         return []
     slug = slugify(name)
-    for ext in SUPPORTED_EXTS:
-        candidate = STATIC_DIR / f"{slug}{ext}"
-        if candidate.exists():
-            yield candidate
+    for entry in get_manifest().files_for_slug(slug, SUPPORTED_EXTS):
+        yield STATIC_DIR / entry.name
 
 
 def fill_missing_images(db_path: Path, dry_run: bool = False) -> int:
@@ -30,17 +34,21 @@ def fill_missing_images(db_path: Path, dry_run: bool = False) -> int:
     conn = sqlite3.connect(db_path)
     conn.row_factory = sqlite3.Row
 
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(places)")}
+    live = "AND deleted_at IS NULL" if "deleted_at" in columns else ""  # skip places retired by refresh_places
     rows = conn.execute(
-        """
+        f"""
         SELECT id, name, image_url, photo_url
         FROM places
         WHERE (image_url IS NULL OR image_url = '')
           AND (photo_url IS NULL OR photo_url = '')
+          {live}
         ORDER BY id
         """
     ).fetchall()
 
     updated = 0
+    matched: list[Path] = []
     for row in rows:
         name = row["name"] or ""
         matches = list(find_candidate_files(name))
@@ -52,6 +60,7 @@ def fill_missing_images(db_path: Path, dry_run: bool = False) -> int:
 
         if dry_run:
             continue
+        matched.append(matches[0])
 
         conn.execute(
             """
@@ -66,6 +75,9 @@ def fill_missing_images(db_path: Path, dry_run: bool = False) -> int:
     if not dry_run and updated:
         conn.commit()
     conn.close()
+
+    if matched:
+        build_image_variants(matched)
     return updated
 
 
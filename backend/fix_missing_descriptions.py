@@ -1,8 +1,9 @@
 # backend/fix_missing_descriptions.py
+# python -m backend.fix_missing_descriptions
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, func
-from db import engine, Base
-from models import Place
+from .db import engine, Base, DATABASE_URL
+from .models import Place
 
 def synthesize_description(p: Place) -> str:
     # Simple, safe default you can customize
@@ -35,4 +36,5 @@ def run():
         print(f"✅ Backfilled {updated} descriptions")
 
 if __name__ == "__main__":
+    print("Using database at:", DATABASE_URL)
     run()
@@ -0,0 +1,224 @@
+# backend/geo_audit.py
+"""Whole-catalog geo data-quality audit.
+
+Enrichment (fetch_photos_and_links) checks coordinates one row at a time, and
+only for the rows it re-enriches. This audit loads the id, lat, lon, address
+and geo_flags columns of every place into NumPy arrays. It flags the
+whole table in one vectorized pass:
+
+    missing_coords    lat or lon is NULL, not a number, or out of range
+    zero_coords       lat or lon is exactly 0 (a placeholder, not a location)
+    swapped_coords    (lon, lat) would be valid/inside the region and (lat, lon) isn't
+    outside_region    valid coordinates outside the region bbox
+    duplicate_coords  another place has exactly the same coordinates
+    near_duplicate    another place is in the same or a neighbouring grid cell of
+                      ``NEAR_DUPLICATE_M`` metres, i.e. within ~2-3 cells
+    missing_address   no address to geocode or show
+
+Soft-deleted rows (``deleted_at``) are skipped. Flagged rows get
+``geo_flags = '<reason>,<reason>'``; rows that pass get NULL.
+The flags have their own column so the audit never touches ``geo_confidence``,
+which enrichment owns (``verified`` / ``original_or_unverified``, and
+refresh_places protects verified locations). Only rows whose flags change are
+written, in one transaction.
+
+    python -m backend.geo_audit                         # audit dev.db and write the flags
+    python -m backend.geo_audit --dry-run               # report only
+    python -m backend.geo_audit --region 32.5,-97.5,33,-96.5
+
+The region is ``--region``, else ``GEO_REGION_BBOX``, else ``DEFAULT_REGION``,
+as minLat,minLon,maxLat,maxLon.
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_REGION = (32.3, -97.8, 33.3, -96.3)  # Arlington, TX (refresh_places' default city) and DFW
+NEAR_DUPLICATE_M = 25.0
+
+# bit -> reason, in the order they're listed in geo_flags
+REASONS = (
+    "missing_coords",
+    "zero_coords",
+    "swapped_coords",
+    "outside_region",
+    "duplicate_coords",
+    "near_duplicate",
+    "missing_address",
+)
+MISSING, ZERO, SWAPPED, OUTSIDE, DUPLICATE, NEAR, NO_ADDRESS = (1 << i for i in range(len(REASONS)))
+
+_M_PER_DEG_LAT = 111_320.0
+
+Region = Tuple[float, float, float, float]
+
+
+def parse_region(value: str) -> Region:
+    try:
+        min_lat, min_lon, max_lat, max_lon = (float(v) for v in value.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError("region must be minLat,minLon,maxLat,maxLon")
+    if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lon <= max_lon <= 180):
+        raise argparse.ArgumentTypeError("region out of range")
+    return min_lat, min_lon, max_lat, max_lon
+
+
+def _floats(values: Sequence[Any]) -> np.ndarray:
+    """Column as float64 with NaN for NULL (and for stray text in a REAL column)."""
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        def to_float(v: Any) -> float:
+            try:
+                return float(v)
+            except (TypeError, ValueError):
+                return np.nan
+        return np.fromiter((to_float(v) for v in values), dtype=np.float64, count=len(values))
+
+
+def _inside(lat: np.ndarray, lon: np.ndarray, region: Region) -> np.ndarray:
+    min_lat, min_lon, max_lat, max_lon = region
+    return (lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)
+
+
+def _pairs(lat: np.ndarray, lon: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Distinct (lat, lon) pairs: (row -> pair, rows per pair, one row of each pair)."""
+    order = np.lexsort((lon, lat))
+    lat_s, lon_s = lat[order], lon[order]
+    starts = np.ones(order.size, dtype=bool)
+    starts[1:] = (lat_s[1:] != lat_s[:-1]) | (lon_s[1:] != lon_s[:-1])
+    pair = np.empty(order.size, dtype=np.int64)
+    pair[order] = np.cumsum(starts) - 1
+    return pair, np.bincount(pair), order[starts]
+
+
+def _near_duplicates(lat: np.ndarray, lon: np.ndarray, pair: np.ndarray, first: np.ndarray,
+                     near_m: float) -> np.ndarray:
+    """Rows with a different coordinate pair in their own or an adjacent grid cell."""
+    lat, lon = lat[first], lon[first]  # one point per distinct pair
+    # equal-area enough at city scale: one longitude scale for the whole catalog
+    cell_lat = near_m / _M_PER_DEG_LAT
+    cell_lon = cell_lat / max(np.cos(np.radians(np.median(lat))), 0.01)
+    cy = np.floor(lat / cell_lat).astype(np.int64)
+    cx = np.floor(lon / cell_lon).astype(np.int64)
+    cells, per_cell = np.unique((cy << 32) + cx, return_counts=True)  # sorted
+    near = per_cell[np.searchsorted(cells, (cy << 32) + cx)] > 1  # another pair in the same cell
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            if dy or dx:
+                probe = ((cy + dy) << 32) + (cx + dx)
+                at = np.minimum(np.searchsorted(cells, probe), cells.size - 1)
+                near |= cells[at] == probe
+    return near[pair]
+
+
+def audit(lat: np.ndarray, lon: np.ndarray, has_address: np.ndarray, region: Region,
+          near_m: float = NEAR_DUPLICATE_M) -> np.ndarray:
+    """Flag bits per row (0 = passes)."""
+    flags = np.zeros(lat.shape, dtype=np.uint8)
+    finite = np.isfinite(lat) & np.isfinite(lon)
+    in_range = finite & (np.abs(lat) <= 90) & (np.abs(lon) <= 180)
+    zero = finite & ((lat == 0) | (lon == 0))
+    inside = _inside(lat, lon, region)
+    swapped = finite & ~zero & ~inside & (
+        _inside(lon, lat, region) | ((np.abs(lat) > 90) & (np.abs(lon) <= 90))
+    )
+    flags[~in_range & ~swapped] |= MISSING
+    flags[zero] |= ZERO
+    flags[swapped] |= SWAPPED
+    flags[in_range & ~zero & ~swapped & ~inside] |= OUTSIDE
+
+    usable = np.flatnonzero(in_range & ~zero & ~swapped)
+    if usable.size:
+        ulat, ulon = lat[usable], lon[usable]
+        pair, per_pair, first = _pairs(ulat, ulon)
+        flags[usable[per_pair[pair] > 1]] |= DUPLICATE
+        flags[usable[_near_duplicates(ulat, ulon, pair, first, near_m)]] |= NEAR
+    flags[~has_address] |= NO_ADDRESS
+    return flags
+
+
+def labels(flags: np.ndarray) -> np.ndarray:
+    """geo_flags text per row (object array; None where the row passes)."""
+    table = np.empty(1 << len(REASONS), dtype=object)
+    for bits in range(1, table.size):
+        table[bits] = ",".join(r for i, r in enumerate(REASONS) if bits >> i & 1)
+    return table[flags]
+
+
+def _ensure_column(conn: sqlite3.Connection) -> None:
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(places)")}
+    if "geo_flags" not in columns:
+        conn.execute("ALTER TABLE places ADD COLUMN geo_flags TEXT")
+
+
+def run(db: Path, region: Region, near_m: float = NEAR_DUPLICATE_M, dry_run: bool = False) -> Dict[str, int]:
+    started = time.perf_counter()
+    conn = sqlite3.connect(db)
+    try:
+        if not dry_run:
+            _ensure_column(conn)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(places)")}
+        flags_col = "geo_flags" if "geo_flags" in columns else "NULL"
+        # places retired by a differential refresh (refresh_places) are neither audited nor compared against
+        live = "WHERE deleted_at IS NULL" if "deleted_at" in columns else ""
+        rows = conn.execute(f"SELECT id, lat, lon, address, {flags_col} FROM places {live} ORDER BY id").fetchall()
+        if not rows:
+            print("[geo-audit] no rows in places")
+            return {}
+        ids, lats, lons, addresses, previous = zip(*rows)
+        lat, lon = _floats(lats), _floats(lons)
+        has_address = np.fromiter((bool(a and str(a).strip()) for a in addresses), dtype=bool, count=len(rows))
+        current = np.array(previous, dtype=object)
+        loaded = time.perf_counter()
+
+        flags = audit(lat, lon, has_address, region, near_m)
+        updated = labels(flags)
+        changed = np.flatnonzero(updated != current)
+        audited = time.perf_counter()
+
+        if not dry_run and changed.size:
+            id_col = np.array(ids, dtype=object)
+            with conn:
+                conn.executemany("UPDATE places SET geo_flags = ? WHERE id = ?",
+                                 zip(updated[changed].tolist(), id_col[changed].tolist()))
+        written = time.perf_counter()
+    finally:
+        conn.close()
+
+    summary = {reason: int(np.count_nonzero(flags & (1 << i))) for i, reason in enumerate(REASONS)}
+    summary["flagged"] = int(np.count_nonzero(flags))
+    summary["changed"] = int(changed.size)
+    for reason in REASONS:
+        print(f"[geo-audit] {reason:<17} {summary[reason]}")
+    verb = "would change" if dry_run else "changed"
+    print(f"[geo-audit] {summary['flagged']} of {len(rows)} row(s) flagged; geo_flags {verb} on {changed.size}")
+    print(f"[geo-audit] load {loaded - started:.2f}s, audit {audited - loaded:.2f}s, write {written - audited:.2f}s")
+    return summary
+
+
+def main(argv: Optional[Iterable[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Flag bad or suspicious coordinates across the whole places table.")
+    parser.add_argument("--db", type=Path, default=Path(__file__).resolve().parent.parent / "dev.db")
+    parser.add_argument("--region", type=parse_region, default=None,
+                        help="minLat,minLon,maxLat,maxLon (default: $GEO_REGION_BBOX or the DFW area)")
+    parser.add_argument("--near-m", type=float, default=NEAR_DUPLICATE_M,
+                        help="grid cell size in metres for near-duplicate coordinates")
+    parser.add_argument("--dry-run", action="store_true", help="report without writing geo_flags")
+    args = parser.parse_args(argv)
+
+    region = args.region
+    if region is None:
+        env = os.getenv("GEO_REGION_BBOX")
+        region = parse_region(env) if env else DEFAULT_REGION
+    run(args.db, region, args.near_m, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""Generate resized WebP/JPEG derivatives of place images.
+
+Originals live in ``static/places/`` (downloaded at ``maxwidth=1600``); the
+derivatives are written next to them in ``static/places/_variants/`` as
+``<slug>-<width>w.<ext>`` and served through ``/images/places/<file>`` by the API,
+which builds any missing derivative on first request.
+
+    python -m backend.image_variants            # build whatever is missing or stale
+    python -m backend.image_variants --force    # rebuild everything
+"""
+
+import argparse
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .asset_manifest import PLACES_DIR, get_manifest
+
+VARIANTS_DIR = PLACES_DIR / "_variants"
+
+SOURCE_EXTS = [".jpg", ".jpeg", ".png", ".webp"]
+VARIANT_WIDTHS = (320, 640, 1024)
+VARIANT_FORMATS = {"webp": "WEBP", "jpg": "JPEG"}
+QUALITY = {"webp": 78, "jpg": 82}
+
+# URL prefix the API serves derivatives under (see app.place_image_variant)
+VARIANT_URL_PREFIX = "/images/places"
+
+_STEM = r"[a-z0-9][a-z0-9-]*"
+_SLUG_STEM = re.compile(rf"^{_STEM}$")
+_VARIANT_NAME = re.compile(rf"^(?P<stem>{_STEM})-(?P<width>\d+)w\.(?P<ext>webp|jpg)$")
+
+
+def variant_name(stem: str, width: int, ext: str) -> str:
+    return f"{stem}-{width}w.{ext}"
+
+
+def variant_path(stem: str, width: int, ext: str) -> Path:
+    return VARIANTS_DIR / variant_name(stem, width, ext)
+
+
+def parse_variant_name(filename: str) -> Optional[tuple[str, int, str]]:
+    """Split ``<stem>-<width>w.<ext>`` into its parts; None for anything we don't produce."""
+    m = _VARIANT_NAME.match(filename)
+    if not m:
+        return None
+    width = int(m.group("width"))
+    if width not in VARIANT_WIDTHS:
+        return None
+    return m.group("stem"), width, m.group("ext")
+
+
+def find_source(stem: str) -> Optional[Path]:
+    matches = get_manifest().files_for_slug(stem, SOURCE_EXTS)
+    return PLACES_DIR / matches[0].name if matches else None
+
+
+def _is_fresh(target: Path, source_mtime: float) -> bool:
+    try:
+        return target.stat().st_mtime >= source_mtime
+    except FileNotFoundError:
+        return False
+
+
+def _save_atomic(img, target: Path, ext: str) -> None:
+    # write next to the target and rename so a concurrent reader never sees half a file
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=".tmp-", suffix=f".{ext}")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            img.save(f, VARIANT_FORMATS[ext], quality=QUALITY[ext], optimize=True)
+        os.replace(tmp, target)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def build_variants(
+    source: Path,
+    widths: Iterable[int] = VARIANT_WIDTHS,
+    exts: Iterable[str] = VARIANT_FORMATS,
+    force: bool = False,
+) -> list[Path]:
+    """Write the requested derivatives of one source image; returns the files (re)written.
+
+    Derivatives newer than their source are left alone unless ``force`` is set.
+    Widths above the source width are clamped so we never upscale.
+    """
+    from PIL import Image, ImageOps
+
+    source = Path(source)
+    src_mtime = source.stat().st_mtime
+    todo = [
+        (w, ext)
+        for w in widths
+        for ext in exts
+        if force or not _is_fresh(variant_path(source.stem, w, ext), src_mtime)
+    ]
+    if not todo:
+        return []
+
+    written: list[Path] = []
+    with Image.open(source) as im:
+        im = ImageOps.exif_transpose(im)
+        if im.mode not in ("RGB", "L"):
+            im = im.convert("RGB")
+        resized = {}
+        for w, ext in todo:
+            if w not in resized:
+                target_w = min(w, im.width)
+                target_h = max(1, round(im.height * target_w / im.width))
+                resized[w] = im if target_w == im.width else im.resize((target_w, target_h), Image.LANCZOS)
+            out = variant_path(source.stem, w, ext)
+            _save_atomic(resized[w], out, ext)
+            written.append(out)
+    return written
+
+
+def _build_one(args: tuple[str, bool]) -> tuple[str, int, Optional[str]]:
+    path, force = args
+    try:
+        return path, len(build_variants(Path(path), force=force)), None
+    except Exception as e:  # keep going; one bad download shouldn't stop the batch
+        return path, 0, str(e)
+
+
+def iter_sources() -> Iterable[Path]:
+    return sorted(PLACES_DIR / e.name for e in get_manifest().entries() if not e.broken)
+
+
+def build_all(
+    sources: Optional[Iterable[Path]] = None,
+    force: bool = False,
+    workers: Optional[int] = None,
+) -> int:
+    """Build derivatives for ``sources`` (default: every image in static/places) in a process pool.
+
+    Returns the number of files written. Sources that are already up to date cost a stat each.
+    """
+    paths = [str(p) for p in (iter_sources() if sources is None else sources)]
+    if not paths:
+        return 0
+
+    jobs = [(p, force) for p in paths]
+    if len(jobs) == 1 or workers == 1:
+        return sum(_report(*_build_one(job)) for job in jobs)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return sum(_report(*res) for res in pool.map(_build_one, jobs, chunksize=4))
+
+
+def _report(path: str, n: int, err: Optional[str]) -> int:
+    if err:
+        print(f"[variants] WARN {Path(path).name}: {err}")
+    elif n:
+        print(f"[variants] {Path(path).name}: wrote {n}")
+    return n
+
+
+def ensure_variant(filename: str) -> Optional[Path]:
+    """Return the derivative for ``filename``, building it if it is missing or stale.
+
+    Falls back to the original image when Pillow isn't installed, and returns None
+    when the name isn't a known derivative or the source image doesn't exist.
+    """
+    parsed = parse_variant_name(filename)
+    if not parsed:
+        return None
+    stem, width, ext = parsed
+    source = find_source(stem)
+    if source is None:
+        return None
+    target = variant_path(stem, width, ext)
+    if _is_fresh(target, source.stat().st_mtime):
+        return target
+    try:
+        build_variants(source, widths=(width,), exts=(ext,))
+    except ImportError:
+        return source
+    return target
+
+
+def variant_urls(filename: str, base_url: str, version: Optional[str] = None) -> Optional[dict]:
+    """srcset strings and a width -> URL thumbnail map for a file in static/places.
+
+    Nothing is checked on disk here, missing derivatives are built lazily when the
+    browser asks for them. ``version`` (the source's content hash) is appended as
+    ``?v=`` so the URLs change whenever the original does.
+    """
+    stem, dot, ext = filename.rpartition(".")
+    if not dot or f".{ext.lower()}" not in SOURCE_EXTS or not _SLUG_STEM.match(stem):
+        return None
+    prefix = f"{base_url}{VARIANT_URL_PREFIX}"
+    query = f"?v={version}" if version else ""
+
+    def url(w: int, fmt: str) -> str:
+        return f"{prefix}/{variant_name(stem, w, fmt)}{query}"
+
+    return {
+        "srcset": {
+            "webp": ", ".join(f"{url(w, 'webp')} {w}w" for w in VARIANT_WIDTHS),
+            "jpeg": ", ".join(f"{url(w, 'jpg')} {w}w" for w in VARIANT_WIDTHS),
+        },
+        "thumbnails": {str(w): url(w, "jpg") for w in VARIANT_WIDTHS},
+    }
+
+
+def main(argv: Optional[Iterable[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build resized WebP/JPEG derivatives of place images.")
+    parser.add_argument("--force", action="store_true", help="Rebuild derivatives even if they are up to date")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    written = build_all(force=args.force, workers=args.workers)
+    print(f"[variants] wrote {written} derivative file(s) to {VARIANTS_DIR}")
+
+
+if __name__ == "__main__":
+    main()
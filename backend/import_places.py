@@ -0,0 +1,448 @@
+# backend/import_places.py
+"""Bulk import of partner place feeds (CSV or NDJSON) into the places table.
+
+    python -m backend.import_places feed.csv
+    python -m backend.import_places feed.ndjson --batch-size 10000 --rejected bad.ndjson
+    gunzip -c feed.csv.gz | python -m backend.import_places - --format csv
+    curl -X POST -H 'Content-Type: text/csv' --data-binary @feed.csv localhost:8000/api/places/import
+
+The feed is read as a stream and handled ``BATCH_SIZE`` rows at a time, so
+memory stays flat however large it is. Each batch is validated against
+``schemas.PlaceCreate`` in one call, collapsed on (name, address) and upserted
+on that key:
+
+- SQLite: ``executemany`` of ``INSERT ... ON CONFLICT DO UPDATE``, one commit per batch
+- Postgres: ``COPY`` into a temporary table, then one ``INSERT ... SELECT ... ON
+  CONFLICT`` (needs the ``uniq_place`` constraint from schema.sql)
+
+Values a feed leaves empty never overwrite what the row already has. Rejected
+rows (including lines that aren't valid UTF-8 or CSV) are written to an NDJSON
+file with their line number and errors; the rest of the feed is still imported.
+"""
+
+import argparse
+import csv
+import io
+import json
+import queue
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from itertools import chain
+from operator import attrgetter
+from pathlib import Path
+from typing import IO, Annotated, Any, Dict, Iterator, List, Optional, NamedTuple, Sequence, Tuple, TypeVar, Union
+
+from pydantic import Field, TypeAdapter, ValidationError
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+
+from .schemas import PlaceCreate
+
+BATCH_SIZE = 5000
+PREFETCH_BATCHES = 2  # parsed batches waiting for the writer; bounds memory
+MAX_SAMPLE_ERRORS = 5
+FIELDS = tuple(PlaceCreate.model_fields)
+KEY = ("name", "address")
+FORMATS = ("csv", "ndjson")
+CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/x-jsonlines": "ndjson",
+}
+
+_batch_adapter = TypeAdapter(List[Annotated[Union[PlaceCreate, Any], Field(union_mode="left_to_right")]])
+
+Row = Tuple[int, Any, Optional[str]]  # (line number, parsed row, parse error)
+T = TypeVar("T")
+
+# The feed is decoded with surrogateescape, so bytes that aren't UTF-8 survive as lone
+# surrogates and only the rows containing them are rejected (as are \ud800-style JSON
+# escapes, which no database column can store either).
+_UNDECODABLE = re.compile("[\ud800-\udfff]")
+INVALID_UTF8 = "invalid UTF-8"
+
+
+def _printable(text: str) -> str:
+    """``text`` with undecodable bytes shown as U+FFFD, safe to write to the rejected file."""
+    return _UNDECODABLE.sub("\ufffd", text)
+
+
+def format_for(name: Optional[str] = None, content_type: Optional[str] = None) -> Optional[str]:
+    """'csv' / 'ndjson' from a file name or a Content-Type header, or None."""
+    if content_type:
+        fmt = CONTENT_TYPES.get(content_type.split(";", 1)[0].strip().lower())
+        if fmt:
+            return fmt
+    if name:
+        suffix = Path(name).suffix.lower()
+        if suffix == ".csv":
+            return "csv"
+        if suffix in (".ndjson", ".jsonl"):
+            return "ndjson"
+    return None
+
+
+def _clean(value: Any) -> Any:
+    if isinstance(value, str):
+        return value.strip() or None
+    return value
+
+
+def iter_csv(text: IO[str]) -> Iterator[Row]:
+    """Rows as dicts of the PlaceCreate fields (other columns are ignored)."""
+    reader = csv.reader(text)
+    try:
+        header = next(reader, None) or []
+    except csv.Error:
+        header = []
+    names = [h.strip().lower() for h in header]
+    positions = [(f, names.index(f)) for f in FIELDS if f in names]
+    while True:
+        try:
+            values = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as exc:  # the reader carries on with the next line
+            yield reader.line_num, None, f"invalid CSV: {exc}"
+            continue
+        if not values:
+            continue
+        n = len(values)
+        row = {f: (values[i].strip() or None) if i < n else None for f, i in positions}
+        if any(v is not None and _UNDECODABLE.search(v) for v in row.values()):
+            yield reader.line_num, {f: v and _printable(v) for f, v in row.items()}, INVALID_UTF8
+            continue
+        yield reader.line_num, row, None
+
+
+def iter_ndjson(text: IO[str]) -> Iterator[Row]:
+    for line_no, line in enumerate(text, 1):
+        if not line.strip():
+            continue
+        if _UNDECODABLE.search(line):
+            yield line_no, _printable(line.rstrip("\n")), INVALID_UTF8
+            continue
+        try:
+            obj = json.loads(line)
+        except ValueError as exc:
+            yield line_no, line.rstrip("\n"), f"invalid JSON: {exc}"
+            continue
+        if isinstance(obj, dict):
+            row = {f: _clean(obj.get(f)) for f in FIELDS}
+            if any(isinstance(v, str) and _UNDECODABLE.search(v) for v in row.values()):
+                yield line_no, _printable(line.rstrip("\n")), INVALID_UTF8
+                continue
+            yield line_no, row, None
+        else:
+            yield line_no, obj, "expected an object"
+
+
+def validate_batch(rows: Sequence[Row]) -> Tuple[List[PlaceCreate], List[Dict[str, Any]]]:
+    """(valid places, rejects) for one batch.
+
+    The batch is validated in one call; rows that don't validate come back unchanged
+    (``Union[PlaceCreate, Any]``, tried left to right) and only those are validated
+    again one by one for their error messages.
+    """
+    rejects = [{"line": line_no, "errors": [error], "row": row} for line_no, row, error in rows if error]
+    pending = [(line_no, row) for line_no, row, error in rows if not error]
+    places: List[PlaceCreate] = []
+    for (line_no, row), result in zip(pending, _batch_adapter.validate_python([row for _, row in pending])):
+        if isinstance(result, PlaceCreate):
+            places.append(result)
+            continue
+        try:
+            places.append(PlaceCreate.model_validate(row))
+        except ValidationError as exc:
+            errors = [f"{'.'.join(map(str, e['loc'])) or 'row'}: {e['msg']}" for e in exc.errors()]
+            rejects.append({"line": line_no, "errors": errors, "row": row})
+    return places, rejects
+
+
+def _collapse(places: List[PlaceCreate]) -> List[PlaceCreate]:
+    """Last place per (name, address); places without an address never conflict."""
+    keyed: Dict[Any, PlaceCreate] = {}
+    for n, place in enumerate(places):
+        keyed[(place.name, place.address) if place.address is not None else n] = place
+    return list(keyed.values())
+
+
+def _updates(columns: Sequence[str], table_columns: set, excluded: str) -> str:
+    sets = [f"{c} = COALESCE({excluded}.{c}, places.{c})" for c in columns if c not in KEY]
+    if "deleted_at" in table_columns:
+        sets.append("deleted_at = NULL")  # a feed listing a retired place brings it back
+    return ", ".join(sets)
+
+
+class _SqliteWriter:
+    def __init__(self, engine: Engine, columns: Sequence[str], table_columns: set):
+        self.conn = engine.raw_connection()
+        self.columns = list(columns)
+        cur = self.conn.cursor()
+        try:
+            cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS uniq_place ON places (name, address)")
+        except Exception as exc:
+            raise RuntimeError(
+                "places has duplicate (name, address) rows, so imports can't upsert on them; "
+                "list them with `python -m backend.dedupe`"
+            ) from exc
+        self.conn.commit()
+        self.values = attrgetter(*self.columns)
+        cols = ", ".join(self.columns)
+        marks = ", ".join("?" for _ in self.columns)
+        self.sql = (f"INSERT INTO places ({cols}) VALUES ({marks}) "
+                    f"ON CONFLICT (name, address) DO UPDATE SET {_updates(self.columns, table_columns, 'excluded')}")
+
+    def write(self, places: List[PlaceCreate]) -> None:
+        cur = self.conn.cursor()
+        cur.executemany(self.sql, map(self.values, places))
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class _PostgresWriter:
+    def __init__(self, engine: Engine, columns: Sequence[str], table_columns: set):
+        self.conn = engine.raw_connection()
+        self.columns = list(columns)
+        self.values = attrgetter(*self.columns)
+        cols = ", ".join(self.columns)
+        cur = self.conn.cursor()
+        cur.execute(f"CREATE TEMP TABLE IF NOT EXISTS places_import AS SELECT {cols} FROM places WITH NO DATA")
+        self.conn.commit()
+        self.copy_sql = f"COPY places_import ({cols}) FROM STDIN WITH (FORMAT csv)"
+        self.merge_sql = (f"INSERT INTO places ({cols}) SELECT {cols} FROM places_import "
+                          f"ON CONFLICT (name, address) DO UPDATE SET "
+                          f"{_updates(self.columns, table_columns, 'EXCLUDED')}")
+
+    def write(self, places: List[PlaceCreate]) -> None:
+        buf = io.StringIO()
+        # None -> empty unquoted field, which COPY reads as NULL (values are never "")
+        csv.writer(buf).writerows(map(self.values, places))
+        buf.seek(0)
+        cur = self.conn.cursor()
+        cur.execute("TRUNCATE places_import")
+        if hasattr(cur, "copy_expert"):  # psycopg2
+            cur.copy_expert(self.copy_sql, buf)
+        else:  # psycopg 3
+            with cur.copy(self.copy_sql) as copy:
+                copy.write(buf.getvalue())
+        cur.execute(self.merge_sql)
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def _writer(engine: Engine):
+    table_columns = {c["name"] for c in inspect(engine).get_columns("places")}
+    if not table_columns:
+        raise RuntimeError("places table not found; create it first (seed_places or schema.sql)")
+    missing = [c for c in FIELDS if c not in table_columns]
+    if missing:
+        print(f"[import] places has no column(s) {', '.join(missing)}; those values are skipped")
+    columns = [c for c in FIELDS if c in table_columns]
+    backend = engine.url.get_backend_name()
+    if backend == "sqlite":
+        return _SqliteWriter(engine, columns, table_columns)
+    if backend == "postgresql":
+        return _PostgresWriter(engine, columns, table_columns)
+    raise RuntimeError(f"bulk import supports SQLite and Postgres, not {backend}")
+
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    imported: int = 0
+    collapsed: int = 0  # repeats of a (name, address) within a batch; the last one wins
+    rejected: int = 0
+    seconds: float = 0.0
+    rejected_path: Optional[str] = None
+    sample_errors: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "imported": self.imported,
+            "collapsed": self.collapsed,
+            "rejected": self.rejected,
+            "seconds": round(self.seconds, 3),
+            "rowsPerSecond": round(self.rows_per_s),
+            "rejectedFile": self.rejected_path,
+            "sampleErrors": self.sample_errors,
+        }
+
+
+class _Batch(NamedTuple):
+    rows: int
+    places: List[PlaceCreate]  # collapsed on (name, address)
+    collapsed: int
+    rejects: List[Dict[str, Any]]
+
+
+def _batches(rows: Iterator[Row], batch_size: int) -> Iterator[_Batch]:
+    batch: List[Row] = []
+    for row in chain(rows, [None]):
+        if row is not None:
+            batch.append(row)
+            if len(batch) < batch_size:
+                continue
+        if not batch:
+            break
+        places, rejects = validate_batch(batch)
+        unique = _collapse(places)
+        yield _Batch(len(batch), unique, len(places) - len(unique), rejects)
+        batch = []
+
+
+def _prefetch(items: Iterator[T], depth: int) -> Iterator[T]:
+    """Run ``items`` on a background thread, at most ``depth`` ahead of the consumer.
+
+    Parsing and validating the next batches overlaps with writing the current one
+    (sqlite3 and psycopg release the GIL while the database works).
+    """
+    q: "queue.Queue[Tuple[Any, Optional[BaseException]]]" = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    end = object()
+
+    def put(entry: Tuple[Any, Optional[BaseException]]) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run() -> None:
+        try:
+            for item in items:
+                if not put((item, None)):
+                    return
+            put((end, None))
+        except BaseException as exc:
+            put((end, exc))
+
+    threading.Thread(target=run, name="import-parse", daemon=True).start()
+    try:
+        while True:
+            item, error = q.get()
+            if item is end:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+class ChunkStream(io.RawIOBase):
+    """Readable byte stream over an iterator of chunks, such as an HTTP request body."""
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self._pending = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buf: Any) -> int:
+        while not self._pending:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._pending = memoryview(chunk)
+        n = min(len(buf), len(self._pending))
+        buf[:n] = self._pending[:n]
+        self._pending = self._pending[n:]
+        return n
+
+
+def import_stream(stream: IO[bytes], fmt: str, engine: Engine, batch_size: int = BATCH_SIZE,
+                  rejected_path: Optional[Path] = None) -> ImportReport:
+    """Import a CSV / NDJSON byte stream; rejects go to ``rejected_path`` (created only if needed)."""
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    if isinstance(stream, io.RawIOBase):
+        stream = io.BufferedReader(stream)
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="surrogateescape",
+                            newline="" if fmt == "csv" else None)
+    rows = iter_csv(text) if fmt == "csv" else iter_ndjson(text)
+    report = ImportReport()
+    started = time.perf_counter()
+    writer = _writer(engine)
+    rejected_file: Optional[IO[str]] = None
+    try:
+        for batch in _prefetch(_batches(rows, batch_size), PREFETCH_BATCHES):
+            if batch.places:
+                writer.write(batch.places)
+            report.rows += batch.rows
+            report.imported += len(batch.places)
+            report.collapsed += batch.collapsed
+            report.rejected += len(batch.rejects)
+            if not batch.rejects:
+                continue
+            room = MAX_SAMPLE_ERRORS - len(report.sample_errors)
+            report.sample_errors += [{"line": r["line"], "errors": r["errors"]} for r in batch.rejects[:room]]
+            if rejected_path is None:
+                continue
+            if rejected_file is None:
+                rejected_path.parent.mkdir(parents=True, exist_ok=True)
+                rejected_file = open(rejected_path, "w", encoding="utf-8")
+                report.rejected_path = str(rejected_path)
+            for r in batch.rejects:
+                rejected_file.write(json.dumps(r, ensure_ascii=False, default=str) + "\n")
+    finally:
+        writer.close()
+        if rejected_file is not None:
+            rejected_file.close()
+        text.detach()
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk import places from a CSV or NDJSON feed.")
+    parser.add_argument("path", help="Feed file, or - for stdin")
+    parser.add_argument("--format", choices=FORMATS, help="Default: from the file extension")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--rejected", type=Path,
+                        help="Where to write rejected rows (default: <feed>.rejected.ndjson)")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or format_for(args.path)
+    if fmt is None:
+        parser.error("can't tell the format from the file name; pass --format")
+    rejected = args.rejected
+    if rejected is None:
+        rejected = Path("import.rejected.ndjson" if args.path == "-" else f"{args.path}.rejected.ndjson")
+
+    from .db import DATABASE_URL, engine
+    print(f"Using database at: {DATABASE_URL}")
+    stream = sys.stdin.buffer if args.path == "-" else open(args.path, "rb")
+    try:
+        report = import_stream(stream, fmt, engine, max(1, args.batch_size), rejected)
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+    print(f"[import] {report.rows} rows in {report.seconds:.2f}s ({report.rows_per_s:,.0f} rows/s): "
+          f"{report.imported} upserted, {report.collapsed} repeated in a batch, {report.rejected} rejected")
+    if report.rejected_path:
+        print(f"[import] rejected rows: {report.rejected_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -28,7 +28,9 @@ engine = create_engine(DATABASE_URL, future=True)
 async def debug_headers(request: Request, call_next):
     resp = await call_next(request)
     resp.headers["X-Use-DB"] = "1" if USE_DB else "0"
-    resp.headers["Cache-Control"] = "no-store"
+    # only the API is uncacheable; static files and hashed assets set their own caching
+    if request.url.path.startswith("/api/") and "cache-control" not in resp.headers:
+        resp.headers["Cache-Control"] = "no-store"
     return resp
 
 @app.get("/api/places")
@@ -0,0 +1,213 @@
+# backend/place_clusters.py
+"""Map clusters of the catalog for every zoom level.
+
+Places are bucketed into a Web Mercator grid whose cells are ``CELL_PX`` screen
+pixels at each zoom (4x4 cells per 256 px tile). Levels nest: a cell at zoom z
+is the union of four cells at z+1. So the finest level is built from the places
+and every coarser level from the one below it. A cluster is a cell's count,
+centroid and best-rated places (its representatives).
+
+When the snapshot changes, only items whose encoded bytes changed are parsed
+again, and only their cells and the cells above them are recomputed. A query
+walks the grid cells under the bbox and coarsens the zoom until there are at
+most ``MAX_QUERY_CELLS`` of them, so its cost doesn't grow with the number of
+places in view.
+"""
+
+import heapq
+import json
+import math
+import zlib
+from dataclasses import dataclass
+from itertools import chain
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from .geo import valid_coords
+
+MAX_ZOOM = 16           # cells are ~150 m at the equator; deeper zooms reuse this level
+CELL_SHIFT = 2          # 2**CELL_SHIFT cells per tile edge, i.e. 64 px cells on 256 px tiles
+REPRESENTATIVES = 3     # ids returned per cluster
+MAX_QUERY_CELLS = 1024  # a 1920x1080 viewport covers ~500 cells at its own zoom
+MAX_LAT = 85.05112878   # Web Mercator limit
+
+Cell = Tuple[int, int]
+Rep = Tuple[float, int]  # (-rating, id): best first, ties by id
+
+
+@dataclass(frozen=True, slots=True)
+class Point:
+    crc: int
+    cell: Optional[Cell]  # finest-level cell; None without usable coordinates
+    lat: float = 0.0
+    lon: float = 0.0
+    rank: float = 0.0
+
+
+@dataclass(frozen=True, slots=True)
+class Cluster:
+    count: int
+    lat_sum: float
+    lon_sum: float
+    reps: Tuple[Rep, ...]
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "lat": round(self.lat_sum / self.count, 6),
+            "lon": round(self.lon_sum / self.count, 6),
+            "count": self.count,
+            "ids": [pid for _, pid in self.reps],
+        }
+
+
+def _cells_per_axis(zoom: int) -> int:
+    return 1 << (zoom + CELL_SHIFT)
+
+
+def _x(lon: float, n: int) -> int:
+    return min(n - 1, max(0, int((lon + 180.0) / 360.0 * n)))
+
+
+def _y(lat: float, n: int) -> int:
+    lat = min(MAX_LAT, max(-MAX_LAT, lat))
+    s = math.sin(math.radians(lat))
+    return min(n - 1, max(0, int((0.5 - math.log((1 + s) / (1 - s)) / (4 * math.pi)) * n)))
+
+
+def _point(crc: int, raw: bytes) -> Point:
+    try:
+        item = json.loads(raw)
+    except ValueError:
+        return Point(crc, None)
+    coords = valid_coords(item.get("lat"), item.get("lon"))
+    if coords is None:
+        return Point(crc, None)
+    lat, lon = coords
+    n = _cells_per_axis(MAX_ZOOM)
+    rating = item.get("rating")
+    rank = -float(rating) if isinstance(rating, (int, float)) and not isinstance(rating, bool) else 0.0
+    return Point(crc, (_x(lon, n), _y(lat, n)), lat, lon, rank)
+
+
+def _leaf(members: Iterable[int], points: Dict[int, Point]) -> Cluster:
+    count, lat_sum, lon_sum, reps = 0, 0.0, 0.0, []
+    for pid in members:
+        p = points[pid]
+        count += 1
+        lat_sum += p.lat
+        lon_sum += p.lon
+        reps.append((p.rank, pid))
+    return Cluster(count, lat_sum, lon_sum, tuple(heapq.nsmallest(REPRESENTATIVES, reps)))
+
+
+def _merge(children: Sequence[Cluster]) -> Cluster:
+    if len(children) == 1:
+        return children[0]
+    return Cluster(
+        sum(c.count for c in children),
+        sum(c.lat_sum for c in children),
+        sum(c.lon_sum for c in children),
+        tuple(heapq.nsmallest(REPRESENTATIVES, chain.from_iterable(c.reps for c in children))),
+    )
+
+
+class ClusterIndex:
+    """Clusters per zoom level for one snapshot. Immutable; ``updated`` returns a new index."""
+
+    def __init__(self) -> None:
+        self.source: Any = None  # the snapshot this index was built from
+        self.points: Dict[int, Point] = {}
+        self.members: Dict[Cell, Tuple[int, ...]] = {}  # place ids per finest-level cell
+        self.levels: List[Dict[Cell, Cluster]] = [{} for _ in range(MAX_ZOOM + 1)]
+
+    def updated(self, snapshot: Any) -> "ClusterIndex":
+        """Index for ``snapshot``, recomputing only the cells whose places changed."""
+        old = self.points
+        points: Dict[int, Point] = {}
+        moved: Set[int] = set()
+        for pid, raw in snapshot.items():
+            crc = zlib.crc32(raw)
+            prev = old.get(pid)
+            if prev is not None and prev.crc == crc:
+                points[pid] = prev
+            else:
+                points[pid] = _point(crc, bytes(raw))
+                moved.add(pid)
+        removed = old.keys() - points.keys()
+
+        dirty: Set[Cell] = set()
+        leaving: Dict[Cell, Set[int]] = {}
+        arriving: Dict[Cell, List[int]] = {}
+        for pid in chain(moved, removed):
+            prev = old.get(pid)
+            if prev is not None and prev.cell is not None:
+                leaving.setdefault(prev.cell, set()).add(pid)
+                dirty.add(prev.cell)
+        for pid in moved:
+            cell = points[pid].cell
+            if cell is not None:
+                arriving.setdefault(cell, []).append(pid)
+                dirty.add(cell)
+
+        index = ClusterIndex()
+        index.source = snapshot
+        index.points = points
+        index.members = dict(self.members)
+        index.levels = [dict(level) for level in self.levels]
+
+        finest = index.levels[MAX_ZOOM]
+        for cell in dirty:
+            gone = leaving.get(cell, ())
+            members = tuple(pid for pid in self.members.get(cell, ()) if pid not in gone)
+            members += tuple(arriving.get(cell, ()))
+            if members:
+                index.members[cell] = members
+                finest[cell] = _leaf(members, points)
+            else:
+                index.members.pop(cell, None)
+                finest.pop(cell, None)
+
+        for zoom in range(MAX_ZOOM - 1, -1, -1):
+            below, level = index.levels[zoom + 1], index.levels[zoom]
+            dirty = {(x >> 1, y >> 1) for x, y in dirty}
+            for x, y in dirty:
+                children = [c for c in (below.get((2 * x + dx, 2 * y + dy)) for dx in (0, 1) for dy in (0, 1)) if c]
+                if children:
+                    level[(x, y)] = _merge(children)
+                else:
+                    level.pop((x, y), None)
+        return index
+
+    def query(self, bbox: Sequence[float], zoom: int) -> Tuple[int, List[Cluster]]:
+        """(effective zoom, clusters) for ``bbox`` = [minLat, minLon, maxLat, maxLon]."""
+        zoom = min(max(zoom, 0), MAX_ZOOM)
+        while True:
+            ranges = _ranges(bbox, _cells_per_axis(zoom))
+            size = sum((x1 - x0 + 1) * (y1 - y0 + 1) for (x0, x1), (y0, y1) in ranges)
+            if size <= MAX_QUERY_CELLS or zoom == 0:
+                break
+            zoom -= 1
+        return zoom, list(_visit(self.levels[zoom], ranges, size))
+
+
+def _ranges(bbox: Sequence[float], n: int) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    min_lat, min_lon, max_lat, max_lon = bbox
+    ys = (_y(max_lat, n), _y(min_lat, n))  # y grows southwards
+    if min_lon <= max_lon:
+        return [((_x(min_lon, n), _x(max_lon, n)), ys)]
+    # crosses the antimeridian
+    return [((_x(min_lon, n), n - 1), ys), ((0, _x(max_lon, n)), ys)]
+
+
+def _visit(level: Dict[Cell, Cluster], ranges, size: int) -> Iterator[Cluster]:
+    if size > len(level):
+        # fewer clusters than cells in view: filter the clusters instead
+        for (x, y), cluster in level.items():
+            if any(x0 <= x <= x1 and y0 <= y <= y1 for (x0, x1), (y0, y1) in ranges):
+                yield cluster
+        return
+    for (x0, x1), (y0, y1) in ranges:
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                cluster = level.get((x, y))
+                if cluster is not None:
+                    yield cluster
@@ -0,0 +1,125 @@
+# backend/place_columns.py
+"""Column store over the places snapshot, for filtered ``/api/places`` queries.
+
+The snapshot already holds every place encoded once. This module keeps only
+what filters need, one compact column per field, indexed by snapshot position:
+lat / lon / rating as ``array('d')`` (NaN when missing), priceLevel as
+``array('b')`` (0 when missing), and the category as an ``array('H')`` code
+into a list of interned names. That's 27 bytes a place instead of a ~15-key dict.
+
+Category and price level have sorted position lists, so those filters start
+from the matching places only. Rating and bbox are then evaluated as NumPy masks
+over zero-copy views of the columns, restricted to those candidates. The answer
+is a list of positions, and the response is spliced together from the encoded
+items at those positions, so no dicts are built at all.
+
+NumPy is only imported when a filtered list is first asked for.
+"""
+
+import json
+import sys
+from array import array
+from typing import Any, Collection, Dict, List, Optional, Sequence
+
+import numpy as np
+
+NO_CATEGORY = 0xFFFF
+
+
+def _number(value: Any) -> float:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return float("nan")
+
+
+class PlaceColumns:
+    """Filter columns for one snapshot (``source``). Immutable; rebuilt when the snapshot changes."""
+
+    def __init__(self) -> None:
+        self.source: Any = None
+        self.names: List[str] = []  # category code -> interned name
+        self.lat = array("d")
+        self.lon = array("d")
+        self.rating = array("d")
+        self.price = array("b")
+        self.category = array("H")
+        self.by_category: Dict[str, np.ndarray] = {}  # name -> sorted positions
+        self.by_price: Dict[int, np.ndarray] = {}
+
+    @classmethod
+    def build(cls, snapshot: Any) -> "PlaceColumns":
+        cols = cls()
+        cols.source = snapshot
+        codes: Dict[str, int] = {}
+        for pos in range(snapshot.count):
+            try:
+                item = json.loads(bytes(snapshot.item_at(pos)))
+            except ValueError:
+                item = {}
+            cols.lat.append(_number(item.get("lat")))
+            cols.lon.append(_number(item.get("lon")))
+            cols.rating.append(_number(item.get("rating")))
+            price = item.get("priceLevel")
+            cols.price.append(price if isinstance(price, int) and not isinstance(price, bool) and 0 < price < 128 else 0)
+            name = item.get("category")
+            if isinstance(name, str) and name:
+                code = codes.get(name)
+                if code is None and len(cols.names) < NO_CATEGORY:
+                    code = codes[name] = len(cols.names)
+                    cols.names.append(sys.intern(name))
+                cols.category.append(NO_CATEGORY if code is None else code)
+            else:
+                cols.category.append(NO_CATEGORY)
+
+        category = cols._view(cols.category, np.uint16)
+        order = np.argsort(category, kind="stable")
+        bounds = np.searchsorted(category[order], np.arange(len(cols.names) + 1))
+        cols.by_category = {name: order[bounds[c]:bounds[c + 1]] for c, name in enumerate(cols.names)}
+        price = cols._view(cols.price, np.int8)
+        cols.by_price = {int(level): np.flatnonzero(price == level) for level in np.unique(price) if level}
+        return cols
+
+    @staticmethod
+    def _view(column: array, dtype: Any) -> np.ndarray:
+        return np.frombuffer(column, dtype=dtype) if len(column) else np.zeros(0, dtype=dtype)
+
+    def select(
+        self,
+        categories: Optional[Collection[str]] = None,
+        price_levels: Optional[Collection[int]] = None,
+        min_rating: Optional[float] = None,
+        bbox: Optional[Sequence[float]] = None,
+    ) -> np.ndarray:
+        """Snapshot positions (ascending) of the places matching every given filter."""
+        candidates: Optional[np.ndarray] = None
+        if categories:
+            candidates = _union([self.by_category.get(name) for name in set(categories)])
+        if price_levels:
+            matching = _union([self.by_price.get(level) for level in set(price_levels)])
+            candidates = matching if candidates is None else np.intersect1d(candidates, matching, assume_unique=True)
+        if min_rating is None and bbox is None:
+            return candidates if candidates is not None else np.arange(len(self.lat))
+
+        def column(values: array) -> np.ndarray:
+            view = self._view(values, np.float64)
+            return view if candidates is None else view[candidates]
+
+        mask = np.ones(len(self.lat) if candidates is None else candidates.size, dtype=bool)
+        if min_rating is not None:
+            mask &= column(self.rating) >= min_rating  # NaN (unrated) compares False
+        if bbox is not None:
+            min_lat, min_lon, max_lat, max_lon = bbox
+            lat, lon = column(self.lat), column(self.lon)
+            mask &= (lat >= min_lat) & (lat <= max_lat)
+            if min_lon <= max_lon:
+                mask &= (lon >= min_lon) & (lon <= max_lon)
+            else:  # crosses the antimeridian
+                mask &= (lon >= min_lon) | (lon <= max_lon)
+        return np.flatnonzero(mask) if candidates is None else candidates[mask]
+
+
+def _union(parts: List[Optional[np.ndarray]]) -> np.ndarray:
+    found = [p for p in parts if p is not None]
+    if not found:
+        return np.zeros(0, dtype=np.intp)
+    return found[0] if len(found) == 1 else np.sort(np.concatenate(found))
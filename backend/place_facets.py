@@ -0,0 +1,113 @@
+# backend/place_facets.py
+"""Facet counts (category, price level, rating) for the places snapshot.
+
+Each place is reduced to a key ``(category, priceLevel, rating)``, and the
+index keeps one count per distinct key. Ratings carry one decimal, so there are
+at most a few thousand keys (categories x 5 price levels x ~50 ratings) however
+large the catalog is. Counting under any combination of filters is a pass over
+those keys, never over the places.
+
+When the snapshot changes, only items whose encoded bytes changed are parsed
+again, and their old keys are subtracted before the new ones are added.
+
+Counts are disjunctive, as filter UIs expect: the category counts apply every
+filter except the category one, and so on. So picking a category still shows
+how many places the other categories have. ``total`` applies all filters.
+"""
+
+import json
+import zlib
+from collections import Counter
+from typing import Any, Collection, Dict, List, Optional, Tuple
+
+RATING_THRESHOLDS = (4.5, 4.0, 3.5, 3.0)  # the "4.5+" style buckets of the filter UI
+
+Key = Tuple[Optional[str], Optional[int], Optional[float]]  # (category, priceLevel, rating)
+
+
+def _key(raw: bytes) -> Optional[Key]:
+    try:
+        item = json.loads(raw)
+    except ValueError:
+        return None
+    category = item.get("category")
+    price = item.get("priceLevel")
+    rating = item.get("rating")
+    return (
+        category if isinstance(category, str) and category else None,
+        price if isinstance(price, int) and not isinstance(price, bool) else None,
+        float(rating) if isinstance(rating, (int, float)) and not isinstance(rating, bool) else None,
+    )
+
+
+class FacetIndex:
+    """Counts per facet key for one snapshot. Immutable; ``updated`` returns a new index."""
+
+    def __init__(self) -> None:
+        self.source: Any = None  # the snapshot this index was built from
+        self.keys: Dict[int, Tuple[int, Optional[Key]]] = {}  # place id -> (crc of its bytes, key)
+        self.counts: Counter = Counter()
+
+    def updated(self, snapshot: Any) -> "FacetIndex":
+        """Index for ``snapshot``, re-reading only the places whose bytes changed."""
+        old = self.keys
+        keys: Dict[int, Tuple[int, Optional[Key]]] = {}
+        counts = Counter(self.counts)
+        for pid, raw in snapshot.items():
+            crc = zlib.crc32(raw)
+            prev = old.get(pid)
+            if prev is not None and prev[0] == crc:
+                keys[pid] = prev
+                continue
+            if prev is not None and prev[1] is not None:
+                counts[prev[1]] -= 1
+            key = _key(bytes(raw))
+            if key is not None:
+                counts[key] += 1
+            keys[pid] = (crc, key)
+        for pid in old.keys() - keys.keys():
+            key = old[pid][1]
+            if key is not None:
+                counts[key] -= 1
+
+        index = FacetIndex()
+        index.source = snapshot
+        index.keys = keys
+        index.counts = +counts  # drop keys that reached zero
+        return index
+
+    def facets(
+        self,
+        categories: Optional[Collection[str]] = None,
+        price_levels: Optional[Collection[int]] = None,
+        min_rating: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Disjunctive counts under the given filters (None or empty = no filter)."""
+        by_category: Counter = Counter()
+        by_price: Counter = Counter()
+        by_rating: Counter = Counter()
+        total = 0
+        for (category, price, rating), n in self.counts.items():
+            in_category = not categories or category in categories
+            in_price = not price_levels or price in price_levels
+            in_rating = min_rating is None or (rating is not None and rating >= min_rating)
+            if in_price and in_rating and category is not None:
+                by_category[category] += n
+            if in_category and in_rating and price is not None:
+                by_price[price] += n
+            if in_category and in_price and rating is not None:
+                for t in RATING_THRESHOLDS:
+                    if rating >= t:
+                        by_rating[t] += n
+            if in_category and in_price and in_rating:
+                total += n
+        return {
+            "total": total,
+            "category": _values(sorted(by_category.items(), key=lambda kv: (-kv[1], kv[0]))),
+            "priceLevel": _values(sorted(by_price.items())),
+            "rating": [{"min": t, "count": by_rating[t]} for t in RATING_THRESHOLDS],
+        }
+
+
+def _values(pairs: List[Tuple[Any, int]]) -> List[Dict[str, Any]]:
+    return [{"value": value, "count": n} for value, n in pairs]
@@ -0,0 +1,197 @@
+"""Normalize place rows (DB rows or places.json items) into the shape the frontend reads.
+
+Shared by the API and export_to_json so both emit exactly the same fields.
+
+Rows of one source share their keys (every DB row, nearly every places.json
+item), so which alias column feeds each output field, and which keys are
+extras to carry through, is worked out once per key set (``_plan_for``) and
+not per row.
+"""
+
+from collections.abc import Mapping
+from typing import Any
+from urllib.parse import urlsplit
+
+from . import image_variants, static_assets
+
+
+def _resolve_image_url(raw: Any, base_url: str, local: str | None) -> str | None:
+    """Absolute URL for ``raw``; ``local`` is ``_local_place_image(raw)``."""
+    if not raw:
+        return None
+    if isinstance(raw, (list, tuple)):
+        raw = next((item for item in raw if item), None)
+        if not raw:
+            return None
+    # our own images get a content-hashed URL so browsers can cache them forever;
+    # ones the manifest says are missing or broken are dropped so the UI shows its placeholder
+    if local:
+        return static_assets.hashed_url(local, base_url)
+    raw = str(raw)
+    if raw.startswith(("http://", "https://")):
+        return raw
+    cleaned = raw.lstrip("/")
+    if cleaned.startswith("static/"):
+        cleaned = cleaned[len("static/"):]
+    return f"{base_url}/static/{cleaned}"
+
+
+# refresh bookkeeping columns (refresh_places) that are never sent to clients
+INTERNAL_FIELDS = frozenset({"content_hash", "source_key", "deleted_at"})
+
+# URL path prefixes that point at files in static/places/ (plain, content-hashed, bare relative)
+_LOCAL_PREFIXES = ("static/places/", "assets/places/", "places/")
+
+
+def _local_place_image(raw: Any) -> str | None:
+    """File name under static/places/ that ``raw`` points at, or None for remote/other images."""
+    if not raw:
+        return None
+    if isinstance(raw, (list, tuple)):
+        raw = next((item for item in raw if item), None)
+        if not raw:
+            return None
+    raw = str(raw).split("?", 1)[0].split("#", 1)[0]
+    if raw.startswith(("http://", "https://")):
+        # enrichment stores absolute URLs to our own /static/places/, exports to /assets/places/
+        path = urlsplit(raw).path
+        for prefix in _LOCAL_PREFIXES[:2]:
+            idx = path.find("/" + prefix)
+            if idx != -1:
+                path = path[idx + 1:]
+                break
+        else:
+            return None
+    else:
+        path = raw.lstrip("/")
+    for prefix in _LOCAL_PREFIXES:
+        if path.startswith(prefix):
+            tail = path[len(prefix):]
+            break
+    else:
+        return None
+    if not tail or "/" in tail:
+        return None
+    if prefix == "assets/places/":
+        return static_assets.unhashed_name(tail)
+    return tail
+
+
+def _first(data: Mapping[str, Any], keys: tuple[str, ...]) -> Any:
+    """First non-empty value among ``keys`` (all present in ``data``)."""
+    for key in keys:
+        value = data[key]
+        if value is not None and value != "":
+            return value
+    return None
+
+
+def _normalize_price_level(raw: Any) -> tuple[int | None, str | None]:
+    if raw is None:
+        return None, None
+    value = raw
+    if isinstance(value, (list, tuple)):
+        value = next((item for item in value if item), None)
+        if value is None:
+            return None, None
+    if isinstance(value, (int, float)):
+        level = int(value) if value > 0 else None
+        display = '$' * level if level else None
+        return level, display
+    text_value = str(value).strip()
+    if not text_value:
+        return None, None
+    if all(ch == '$' for ch in text_value):
+        level = len(text_value)
+        display = text_value if level else None
+        return level or None, display
+    try:
+        numeric = float(text_value)
+        level = int(numeric) if numeric > 0 else None
+        display = '$' * level if level else None
+        return level, display
+    except ValueError:
+        pass
+    return None, text_value or None
+
+
+# alias keys feeding each derived field, in priority order
+_IMAGE_KEYS = ("imageUrl", "image_url", "photo_url", "photoPath")
+_PRICE_KEYS = ("priceDisplay", "price_display", "priceLevel", "price_level", "price")
+_MAPS_KEYS = ("mapsUrl", "maps_url", "directionsUrl", "directions_url")
+_DESCRIPTION_KEYS = ("description", "short_description")
+_CITY_KEYS = ("city", "address")
+OUTPUT_FIELDS = frozenset({
+    "id", "name", "category", "description", "address", "city", "lat", "lon", "rating",
+    "priceLevel", "priceDisplay", "imageUrl", "srcset", "thumbnails",
+    "mapsUrl", "directionsUrl", "directions_url",
+})
+
+
+class _Plan:
+    """Which keys of a row feed which output field, for one set of row keys."""
+
+    __slots__ = ("image", "price", "maps", "description", "city", "extras")
+
+    def __init__(self, keys: tuple[str, ...]):
+        present = set(keys)
+        self.image = tuple(k for k in _IMAGE_KEYS if k in present)
+        self.price = tuple(k for k in _PRICE_KEYS if k in present)
+        self.maps = tuple(k for k in _MAPS_KEYS if k in present)
+        self.description = tuple(k for k in _DESCRIPTION_KEYS if k in present)
+        self.city = tuple(k for k in _CITY_KEYS if k in present)
+        # extra fields are kept so the frontend can opt into them without backend changes
+        self.extras = tuple(k for k in keys if k not in OUTPUT_FIELDS and k not in INTERNAL_FIELDS)
+
+
+_plans: dict[tuple[str, ...], _Plan] = {}
+MAX_PLANS = 256  # distinct key sets remembered; places.json items may vary a little
+
+
+def _plan_for(keys: tuple[str, ...]) -> _Plan:
+    plan = _plans.get(keys)
+    if plan is None:
+        if len(_plans) >= MAX_PLANS:
+            _plans.clear()
+        plan = _plans[keys] = _Plan(keys)
+    return plan
+
+
+def normalize_place(place: Mapping[str, Any], base_url: str) -> dict[str, Any]:
+    plan = _plan_for(tuple(place))
+    image_raw = _first(place, plan.image)
+    image_file = _local_place_image(image_raw)
+    image_url = _resolve_image_url(image_raw, base_url, image_file)
+    variants = None
+    if image_file and image_url:
+        version = static_assets.content_hash(image_file)
+        variants = image_variants.variant_urls(image_file, base_url, version=version)
+    price_level, price_display = _normalize_price_level(_first(place, plan.price))
+    maps_raw = _first(place, plan.maps)
+    maps_url = None
+    if maps_raw:
+        maps_url = str(maps_raw).strip() or None
+
+    get = place.get
+    normalized = {
+        "id": get("id"),
+        "name": get("name"),
+        "category": get("category"),
+        "description": _first(place, plan.description),
+        "address": get("address"),
+        "city": _first(place, plan.city),
+        "lat": get("lat"),
+        "lon": get("lon"),
+        "rating": get("rating"),
+        "priceLevel": price_level,
+        "priceDisplay": price_display,
+        "imageUrl": image_url,
+        "srcset": variants["srcset"] if variants else None,
+        "thumbnails": variants["thumbnails"] if variants else None,
+        "mapsUrl": maps_url,
+        "directionsUrl": maps_url,
+        "directions_url": maps_url,
+    }
+    for key in plan.extras:
+        normalized[key] = place[key]
+    return normalized
@@ -0,0 +1,152 @@
+# backend/place_suggest.py
+"""Typeahead over the places snapshot.
+
+Every place contributes the folded tokens of its name, category/subcategory
+and city. The index is a sorted array of distinct tokens; each token has a
+posting list of places sorted by score (rating, weighted by which field the
+token came from, so a name match outranks a city match). A prefix selects a
+contiguous token range with two bisects, and the best places are a lazy merge
+of those posting lists, stopped after k distinct places. Prefixes that cover
+many tokens ("a", "st") have their top results computed up front, so no query
+merges more than a few dozen lists.
+
+Earlier words of a multi-word query must prefix-match some token of the place
+("river le" -> "River Legacy Park"). The index is immutable and rebuilt when
+the snapshot changes.
+"""
+
+import heapq
+import json
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Set, Tuple
+
+DEFAULT_K = 8
+MAX_K = 20
+MAX_MERGE_TERMS = 32  # prefixes covering more tokens than this get their top results precomputed
+MAX_SCAN = 2000  # postings looked at for a multi-word query before giving up on more matches
+TOP_CANDIDATES = 100  # precomputed per wide prefix; multi-word queries filter these
+FIELD_WEIGHTS = (("name", 1.0), ("category", 0.6), ("subcategory", 0.6), ("city", 0.4))
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+Posting = Tuple[float, int]  # (-score, place position)
+
+
+def fold(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in text if not unicodedata.combining(ch)).lower().replace("&", " and ")
+
+
+def tokens(text: Any) -> List[str]:
+    if not isinstance(text, str) or not text:
+        return []
+    return [t for t in _NON_WORD.split(fold(text)) if t]
+
+
+def _rating(value: Any) -> float:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return max(0.0, min(float(value), 5.0))
+    return 0.0
+
+
+class SuggestIndex:
+    """Prefix index for one snapshot (``source``)."""
+
+    def __init__(self) -> None:
+        self.source: Any = None
+        self.places: List[Dict[str, Any]] = []    # what a suggestion returns
+        self.place_tokens: List[Set[str]] = []    # for matching the other words of a query
+        self.terms: List[str] = []
+        self.postings: List[Tuple[Posting, ...]] = []
+        self.top: Dict[str, Tuple[int, ...]] = {}
+
+    @classmethod
+    def build(cls, snapshot: Any) -> "SuggestIndex":
+        index = cls()
+        index.source = snapshot
+        scores: Dict[str, Dict[int, float]] = {}
+        for _, raw in snapshot.items():
+            try:
+                item = json.loads(bytes(raw))
+            except ValueError:
+                continue
+            pos = len(index.places)
+            rating = _rating(item.get("rating"))
+            seen: Set[str] = set()
+            for field, weight in FIELD_WEIGHTS:
+                for tok in tokens(item.get(field)):
+                    if field == "city" and tok.isdigit():
+                        continue  # city falls back to the full address
+                    seen.add(tok)
+                    best = scores.setdefault(tok, {})
+                    best[pos] = max(best.get(pos, 0.0), weight * (1.0 + rating))
+            if not seen:
+                continue
+            index.places.append({
+                "id": item.get("id"),
+                "name": item.get("name"),
+                "category": item.get("category"),
+                "city": item.get("city"),
+                "rating": item.get("rating"),
+            })
+            index.place_tokens.append(seen)
+
+        index.terms = sorted(scores)
+        index.postings = [tuple(sorted((-s, pos) for pos, s in scores[t].items())) for t in index.terms]
+        widths = Counter(t[:n] for t in index.terms for n in range(1, len(t)))
+        index.top = {p: tuple(index._ranked(p, TOP_CANDIDATES)) for p, width in widths.items() if width > MAX_MERGE_TERMS}
+        return index
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        lo = bisect_left(self.terms, prefix)
+        hi = bisect_left(self.terms, prefix + "\uffff", lo)
+        return lo, hi
+
+    def _width(self, prefix: str) -> int:
+        lo, hi = self._range(prefix)
+        return hi - lo
+
+    def _merged(self, prefix: str) -> Iterator[int]:
+        """Place positions matching ``prefix``, best first, each once."""
+        lo, hi = self._range(prefix)
+        seen: Set[int] = set()
+        for _, pos in heapq.merge(*self.postings[lo:hi]):
+            if pos not in seen:
+                seen.add(pos)
+                yield pos
+
+    def _ranked(self, prefix: str, k: int) -> Iterator[int]:
+        cached = self.top.get(prefix)
+        if cached is not None and k <= TOP_CANDIDATES:
+            yield from cached[:k]
+            return
+        for n, pos in enumerate(self._merged(prefix)):
+            if n == k:
+                return
+            yield pos
+
+    def suggest(self, query: str, k: int = DEFAULT_K) -> List[Dict[str, Any]]:
+        words = tokens(query)
+        if not words:
+            return []
+        k = min(max(k, 1), MAX_K)
+        # drive with the word that covers the fewest tokens, check the others per candidate
+        driver = min(words, key=self._width)
+        others = list(words)
+        others.remove(driver)
+        if not others:
+            return [self.places[pos] for pos in self._ranked(driver, k)]
+        out: List[Dict[str, Any]] = []
+        # with only wide words ("s s") the driver's precomputed candidates are all that's checked
+        candidates = self.top.get(driver) or self._merged(driver)
+        for n, pos in enumerate(candidates):
+            if n == MAX_SCAN or len(out) == k:
+                break
+            toks = self.place_tokens[pos]
+            if all(any(t.startswith(w) for t in toks) for w in others):
+                out.append(self.places[pos])
+        return out
+
@@ -1,11 +1,16 @@
-# backend/seed_places.py
-from typing import List
+# backend/refresh_places.py
+from typing import Dict, List, Optional, Tuple
+import argparse
+import hashlib
+import json
 import time
+from datetime import datetime, timezone
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import OperationalError
-from sqlalchemy import text
-from .db import engine, Base
+from sqlalchemy import inspect, text
+from .db import engine, Base, DATABASE_URL
 from .models import Place
+from .dedupe import DedupeIndex
 from .ai.generator import generate_places  # your existing generator
 
 MAX_RETRIES = 6  # ~1+2+4+8+16+32s backoff worst case
@@ -26,18 +31,25 @@ def _retry_commit(db: Session):
             raise  # other OperationalError -> bubble up
     raise RuntimeError("Giving up after repeated database lock errors during commit")
 
-def seed_places(categories: List[str], city: str = "Arlington, TX") -> int:
+def seed_places(categories: List[str], city: str = "Arlington, TX",
+                use_cache: bool = True, refresh_cache: bool = False) -> int:
     """
     Generates places per category and inserts into SQLite.
-    De-dupes on (name, address). Commits per-category with retries.
+    Skips near-duplicates of existing rows (dedupe.DedupeIndex). Commits per-category with retries.
+    use_cache / refresh_cache control the generator cache (--no-cache / --refresh).
     """
     Base.metadata.create_all(bind=engine)
     inserted_total = 0
 
     with Session(engine) as db:
+        index = DedupeIndex.from_places(
+            (pid, {"name": name, "address": address, "lat": lat, "lon": lon})
+            for pid, name, address, lat, lon in db.query(Place.id, Place.name, Place.address, Place.lat, Place.lon)
+        )
+        db.commit()
         for cat in categories:
             print(f"[seed] generating: {cat} in {city}")
-            items = generate_places(cat, city=city)
+            items = generate_places(cat, city=city, use_cache=use_cache, refresh=refresh_cache)
 
             # start a write txn early; fail fast if another writer is holding a lock
             db.execute(text("BEGIN IMMEDIATE"))
@@ -49,8 +61,8 @@ def seed_places(categories: List[str], city: str = "Arlington, TX") -> int:
                     if not name or not address:
                         continue
 
-                    exists = db.query(Place).filter_by(name=name, address=address).first()
-                    if exists:
+                    if index.add_if_new({"name": name, "address": address,
+                                         "lat": p.get("lat"), "lon": p.get("lon")}) is not None:
                         continue
 
                     db.add(Place(
@@ -73,5 +85,192 @@ def seed_places(categories: List[str], city: str = "Arlington, TX") -> int:
     print(f"[seed] inserted {inserted_total} new rows total")
     return inserted_total
 
+# --- differential refresh ---------------------------------------------------
+
+# fields a generation run owns; everything else (photos, directions, geo_*) belongs to enrichment
+DIFF_FIELDS = ("name", "category", "description", "address", "lat", "lon", "price_level")
+# enrichment-verified location data is never overwritten by a new generation
+PROTECTED_WHEN_VERIFIED = ("address", "lat", "lon")
+DIFF_COLUMNS = {"content_hash": "TEXT", "source_key": "TEXT", "deleted_at": "TEXT"}
+
+
+def _ensure_diff_columns(db: Session) -> set:
+    """Add the refresh bookkeeping columns if missing; returns the table's column names."""
+    have = {c["name"] for c in inspect(db.get_bind()).get_columns("places")}
+    for col, typ in DIFF_COLUMNS.items():
+        if col not in have:
+            db.execute(text(f"ALTER TABLE places ADD COLUMN {col} {typ}"))
+            have.add(col)
+    db.commit()
+    return have
+
+
+def _fields_for(p: dict, cat: str) -> Optional[dict]:
+    name = (p.get("name") or "").strip()
+    if not name:
+        return None
+    return {
+        "name": name,
+        "category": p.get("category") or cat,
+        "description": p.get("description") or p.get("short_description") or None,
+        "address": (p.get("address") or "").strip() or None,
+        "lat": p.get("lat"),
+        "lon": p.get("lon"),
+        "price_level": p.get("price"),
+    }
+
+
+def content_hash(fields: dict) -> str:
+    """Stable hash of the generated fields; equal hashes mean nothing to update."""
+    canon = json.dumps([fields.get(k) for k in DIFF_FIELDS], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canon.encode("utf-8")).hexdigest()[:16]
+
+
+def refresh_places(categories: List[str], city: str = "Arlington, TX",
+                   use_cache: bool = True, refresh_cache: bool = True,
+                   dry_run: bool = False) -> Dict[str, int]:
+    """
+    Differential refresh: regenerate ``categories`` for ``city`` and reconcile with the table.
+    - generated places are matched to current rows with the dedupe index (one in-memory pass)
+    - rows whose generated content hash changed get only their changed fields updated
+    - rows a previous refresh of the same (category, city) produced but that no longer
+      appear are soft-deleted (deleted_at); they are restored if they come back
+    - new places are inserted
+    Returns the change summary. With dry_run nothing is written.
+    By default the generator runs fresh (refresh_cache) and only stores its output in the
+    cache; diffing against cached generations would report no changes for up to a week.
+    """
+    Base.metadata.create_all(bind=engine)
+    summary = {"generated": 0, "inserted": 0, "updated": 0, "unchanged": 0,
+               "retired": 0, "restored": 0, "duplicates": 0}
+    field_changes: Dict[str, int] = {}
+
+    with Session(engine) as db:
+        columns = _ensure_diff_columns(db)
+        # geo_confidence is added by fetch_photos_and_links; absent until enrichment has run once
+        geo_col = "geo_confidence" if "geo_confidence" in columns else "NULL AS geo_confidence"
+        rows = db.execute(text(
+            "SELECT id, name, category, description, address, lat, lon, price_level, "
+            f"content_hash, source_key, deleted_at, {geo_col} FROM places"
+        )).mappings().all()
+        db.commit()
+        current = {r["id"]: dict(r) for r in rows}
+        index = DedupeIndex.from_places((r["id"], r) for r in current.values())
+
+        scopes = {f"{cat}|{city}" for cat in categories}
+        seen_ids = set()
+        inserts: List[dict] = []
+        updates: List[Tuple[int, dict]] = []
+        pending_index = DedupeIndex()  # new places from this run, so they don't duplicate each other
+
+        for cat in categories:
+            print(f"[refresh] generating: {cat} in {city}")
+            scope = f"{cat}|{city}"
+            for p in generate_places(cat, city=city, use_cache=use_cache, refresh=refresh_cache):
+                fields = _fields_for(p, cat)
+                if fields is None:
+                    continue
+                summary["generated"] += 1
+                new_hash = content_hash(fields)
+                match = index.find(fields)
+                if match is None:
+                    if pending_index.add_if_new(fields) is not None:
+                        summary["duplicates"] += 1
+                        continue
+                    inserts.append({**fields, "content_hash": new_hash, "source_key": scope})
+                    continue
+
+                row = current[match.key]
+                if row["id"] in seen_ids:
+                    summary["duplicates"] += 1
+                    continue
+                seen_ids.add(row["id"])
+
+                changes = {}
+                if row["deleted_at"] is not None:
+                    changes["deleted_at"] = None
+                    summary["restored"] += 1
+                if row["content_hash"] != new_hash:
+                    verified = (row.get("geo_confidence") or "") == "verified"
+                    for k in DIFF_FIELDS:
+                        v = fields[k]
+                        if v is None or v == row[k]:
+                            continue
+                        if verified and k in PROTECTED_WHEN_VERIFIED:
+                            continue
+                        changes[k] = v
+                        field_changes[k] = field_changes.get(k, 0) + 1
+                    changes["content_hash"] = new_hash
+                if row["source_key"] != scope and (row["source_key"] in scopes or row["source_key"] is None):
+                    changes["source_key"] = scope
+                if changes.keys() - {"content_hash", "source_key", "deleted_at"}:
+                    summary["updated"] += 1
+                else:
+                    summary["unchanged"] += 1
+                if changes:
+                    updates.append((row["id"], changes))
+
+        now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        retire_ids = [
+            r["id"] for r in current.values()
+            if r["source_key"] in scopes and r["deleted_at"] is None and r["id"] not in seen_ids
+        ]
+        summary["retired"] = len(retire_ids)
+        summary["inserted"] = len(inserts)
+
+        if not dry_run and (inserts or updates or retire_ids):
+            db.execute(text("BEGIN IMMEDIATE"))
+            try:
+                if inserts:
+                    db.execute(text(
+                        "INSERT INTO places (name, category, description, address, lat, lon, price_level, "
+                        "content_hash, source_key) VALUES (:name, :category, :description, :address, :lat, "
+                        ":lon, :price_level, :content_hash, :source_key)"
+                    ), inserts)
+                # one executemany per distinct set of changed columns
+                by_cols: Dict[Tuple[str, ...], List[dict]] = {}
+                for pid, changes in updates:
+                    cols = tuple(sorted(changes))
+                    by_cols.setdefault(cols, []).append({**changes, "_id": pid})
+                for cols, params in by_cols.items():
+                    assignments = ", ".join(f"{c} = :{c}" for c in cols)
+                    db.execute(text(f"UPDATE places SET {assignments} WHERE id = :_id"), params)
+                if retire_ids:
+                    db.execute(text("UPDATE places SET deleted_at = :now WHERE id = :_id"),
+                               [{"now": now, "_id": pid} for pid in retire_ids])
+                _retry_commit(db)
+            except Exception:
+                db.rollback()
+                raise
+
+    fields_note = ", ".join(f"{k}={n}" for k, n in sorted(field_changes.items())) or "none"
+    print(
+        f"[refresh] {'(dry run) ' if dry_run else ''}{summary['generated']} generated: "
+        f"{summary['inserted']} inserted, {summary['updated']} updated (fields: {fields_note}), "
+        f"{summary['unchanged']} unchanged, {summary['retired']} retired, "
+        f"{summary['restored']} restored, {summary['duplicates']} duplicate(s) skipped"
+    )
+    return summary
+
 if __name__ == "__main__":
-    seed_places(["restaurants", "parks", "museums"])
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--categories", nargs="+", default=["restaurants", "parks", "museums"])
+    parser.add_argument("--city", default="Arlington, TX")
+    parser.add_argument("--no-cache", action="store_true", help="Neither read nor write the generator cache")
+    parser.add_argument("--reuse-cache", action="store_true",
+                        help="Diff against cached generations (up to 7 days old) instead of regenerating")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Ignore cached generations but store the fresh ones (the default unless --reuse-cache)")
+    parser.add_argument("--insert-only", action="store_true",
+                        help="Old behaviour: only insert new places, never update or retire")
+    parser.add_argument("--dry-run", action="store_true", help="Print the change summary without writing")
+    args = parser.parse_args()
+    print("Using database at:", DATABASE_URL)
+
+    if args.insert_only:
+        seed_places(args.categories, city=args.city,
+                    use_cache=not args.no_cache, refresh_cache=args.refresh)
+    else:
+        refresh_places(args.categories, city=args.city,
+                       use_cache=not args.no_cache, refresh_cache=args.refresh or not args.reuse_cache,
+                       dry_run=args.dry_run)
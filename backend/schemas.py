@@ -1,6 +1,11 @@
 # schemas.py
-from pydantic import BaseModel, Field
-from typing import Optional
+import math
+import re
+from pydantic import BaseModel, BeforeValidator, Field
+from typing import Annotated, List, Optional
+
+MINUTES_PER_DAY = 24 * 60
+_HH_MM = re.compile(r"(\d{1,2}):(\d{2})")
 
 class PlaceBase(BaseModel):
     name: str = Field(..., min_length=1)
@@ -35,4 +40,43 @@ class PlaceRead(PlaceBase):
     class Config:
         from_attributes = True
         orm_mode = True
-        allow_population_by_field_name = True
\ No newline at end of file
+        allow_population_by_field_name = True
+
+def parse_minutes(value: object) -> float:
+    """Minutes after midnight from 540, 540.0 or "09:00"; 0..1440, else ValueError."""
+    if isinstance(value, bool):
+        raise ValueError('must be minutes after midnight or "HH:MM"')
+    if isinstance(value, (int, float)):
+        minutes = float(value)
+    else:
+        match = _HH_MM.fullmatch(str(value).strip())
+        if match is None or int(match.group(2)) >= 60:
+            raise ValueError('must be minutes after midnight or "HH:MM"')
+        minutes = int(match.group(1)) * 60 + int(match.group(2))
+    if not (math.isfinite(minutes) and 0 <= minutes <= MINUTES_PER_DAY):
+        raise ValueError(f"must be between 00:00 and 24:00 ({MINUTES_PER_DAY} minutes)")
+    return minutes
+
+
+# minutes after midnight, given as a number or "HH:MM"; validated into a float
+Minutes = Annotated[float, BeforeValidator(parse_minutes)]
+
+class TripStart(BaseModel):
+    lat: float = Field(..., ge=-90, le=90)
+    lon: float = Field(..., ge=-180, le=180)
+
+class TripTimeWindow(BaseModel):
+    place_id: int
+    # either end may be left open
+    open: Optional[Minutes] = None
+    close: Optional[Minutes] = None
+
+class TripOptimizeRequest(BaseModel):
+    place_ids: List[int]
+    start: Optional[TripStart] = None
+    return_to_start: bool = False
+    time_windows: List[TripTimeWindow] = []
+    start_time: Minutes = 9 * 60  # 09:00
+    visit_minutes: float = Field(45, gt=0, le=MINUTES_PER_DAY)
+    speed_kmh: float = Field(30, gt=0)
+    time_budget_ms: float = Field(50, gt=0)  # the endpoint caps it
@@ -1,17 +1,23 @@
 # backend/seed_places.py
 
-from typing import List
+from typing import List, Optional
 import time
 import argparse
+import queue
+from concurrent.futures import ThreadPoolExecutor
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import OperationalError
-from sqlalchemy import text
+from sqlalchemy import insert, text
 
-from db import engine, Base
-from models import Place
-from ai.generator import generate_places  # your AI-based generator
+from .db import engine, Base, DATABASE_URL
+from .models import Place
+from .dedupe import DedupeIndex
+from .ai.generator import iter_places  # your AI-based generator (streams places as they parse)
 
 MAX_RETRIES = 6  # retry commits up to ~1+2+4+8+16+32s
+DEFAULT_WORKERS = 8  # concurrent generation calls (LLM requests are network-bound)
+BATCH_SIZE = 200  # rows per insert transaction
+FLUSH_INTERVAL_S = 0.25  # max time a streamed row waits before it is written
 
 def _retry_commit(db: Session):
     """Commit with exponential backoff if the database is locked."""
@@ -30,18 +36,79 @@ def _retry_commit(db: Session):
             raise
     raise RuntimeError("Giving up after repeated database lock errors during commit")
 
-def seed_places(categories: List[str], city: str = "Arlington, TX", replace: bool = False) -> int:
+def _generate_job(cat: str, city: str, out: "queue.Queue", gen_kwargs: dict) -> None:
+    """Worker: stream one (category, city) generation to the writer, place by place."""
+    started = time.perf_counter()
+    count = 0
+    try:
+        for place in iter_places(cat, city=city, **gen_kwargs):
+            out.put(("item", cat, city, place))
+            count += 1
+        out.put(("done", cat, city, count, None, time.perf_counter() - started))
+    except Exception as e:
+        # places already streamed stay queued; the rest of this job is abandoned
+        out.put(("done", cat, city, count, e, time.perf_counter() - started))
+
+
+def _row_for(p: dict, cat: str) -> Optional[dict]:
+    name = (p.get("name") or "").strip()
+    if not name:
+        return None
+    return {
+        "name": name,
+        "category": p.get("category") or cat,
+        "description": p.get("description") or p.get("short_description") or "",
+        "address": (p.get("address") or "").strip() or None,  # may be None; enrichment fills later
+        "lat": p.get("lat"),
+        "lon": p.get("lon"),
+        "price_level": p.get("price"),  # may be None
+    }
+
+
+def _flush(db: Session, rows: List[dict]) -> int:
+    """Insert one batch in a single write transaction."""
+    if not rows:
+        return 0
+    db.execute(text("BEGIN IMMEDIATE"))  # start txn early to detect locks
+    try:
+        db.execute(insert(Place), rows)
+        _retry_commit(db)
+    except Exception:
+        db.rollback()
+        raise
+    return len(rows)
+
+
+def seed_places(
+    categories: List[str],
+    city: str = "Arlington, TX",
+    replace: bool = False,
+    cities: Optional[List[str]] = None,
+    workers: int = DEFAULT_WORKERS,
+    batch_size: int = BATCH_SIZE,
+    use_cache: bool = True,
+    refresh_cache: bool = False,
+) -> int:
     """
     Generate and insert places into SQLite.
     - categories: list of category names to generate
-    - city: default city context
+    - city / cities: city context; every category is generated for every city
     - replace: if True, wipe all existing rows first
+    - workers: how many generation calls run at once
+    - use_cache / refresh_cache: generator cache behaviour (--no-cache / --refresh)
+
+    Generation runs in a thread pool (it is network-bound); each place streams through a
+    queue to this thread as soon as it parses, and this thread, the only DB writer, inserts
+    in batches, so rows land while the model is still generating.
 
     CHANGE: address is OPTIONAL at seed time; enrichment will fetch correct addresses
     via Google Maps APIs later.
     """
     Base.metadata.create_all(bind=engine)
+    jobs = [(cat, c) for c in (cities or [city]) for cat in categories]
+    gen_kwargs = {"use_cache": use_cache, "refresh": refresh_cache}
     inserted_total = 0
+    failed = 0
 
     with Session(engine) as db:
         if replace:
@@ -49,55 +116,74 @@ def seed_places(categories: List[str], city: str = "Arlington, TX", replace: boo
             db.query(Place).delete(synchronize_session=False)
             db.commit()
 
-        for cat in categories:
-            print(f"[seed] generating: {cat} in {city}")
-            items = generate_places(cat, city=city)
-
-            db.execute(text("BEGIN IMMEDIATE"))  # start txn early to detect locks
-            inserted_cat = 0
-
-            try:
-                for p in items:
-                    name = (p.get("name") or "").strip()
-                    if not name:
-                        continue
-
-                    address = (p.get("address") or "").strip() or None
-
-                    # skip if exists:
-                    #   if we have an address → dedupe by (name,address)
-                    #   else (no address yet) → dedupe by (name, category, city) heuristics
-                    if address:
-                        exists = db.query(Place).filter_by(name=name, address=address).first()
+        # skip near-duplicates of existing rows and of each other (see dedupe.py);
+        # the index is built once and every candidate is checked in memory
+        index = DedupeIndex.from_places(
+            (pid, {"name": name, "address": address, "lat": lat, "lon": lon})
+            for pid, name, address, lat, lon in db.query(Place.id, Place.name, Place.address, Place.lat, Place.lon)
+        )
+        skipped = 0
+        db.commit()  # release the read txn so BEGIN IMMEDIATE can start cleanly
+
+        results: "queue.Queue" = queue.Queue()
+        started = time.perf_counter()
+        print(f"[seed] {len(jobs)} generation job(s) with {min(workers, len(jobs)) or 1} worker(s)")
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for cat, c in jobs:
+                pool.submit(_generate_job, cat, c, results, gen_kwargs)
+
+            pending: List[dict] = []
+            kept = {}
+            done = 0
+            last_flush = float("-inf")  # the first streamed row is written right away
+            first_insert = None
+            while done < len(jobs):
+                try:
+                    msg = results.get(timeout=FLUSH_INTERVAL_S)
+                except queue.Empty:
+                    msg = None
+
+                if msg is not None and msg[0] == "item":
+                    _, cat, c, p = msg
+                    row = _row_for(p, cat)
+                    if row is not None:
+                        if index.add_if_new(row) is None:
+                            pending.append(row)
+                            kept[(cat, c)] = kept.get((cat, c), 0) + 1
+                        else:
+                            skipped += 1
+                elif msg is not None:
+                    _, cat, c, count, err, took = msg
+                    done += 1
+                    if err is not None:
+                        failed += 1
+                        print(f"[seed] WARN {cat} in {c} failed after {took:.1f}s ({count} streamed): {err}")
                     else:
-                        exists = (db.query(Place)
-                                  .filter(Place.name == name)
-                                  .filter(Place.category == (p.get("category") or cat))
-                                  .first())
-                    if exists:
-                        continue
-
-                    description = p.get("description") or p.get("short_description") or ""
-
-                    db.add(Place(
-                        name=name,
-                        category=p.get("category") or cat,
-                        description=description,
-                        address=address,  # may be None; enrichment fills later
-                        lat=p.get("lat"),
-                        lon=p.get("lon"),
-                        price_level=p.get("price"),  # may be None
-                    ))
-                    inserted_cat += 1
-
-                _retry_commit(db)
-                inserted_total += inserted_cat
-                print(f"[seed] {cat}: inserted {inserted_cat}")
-            except Exception:
-                db.rollback()
-                raise
-
-    print(f"[seed] inserted {inserted_total} new rows total")
+                        print(f"[seed] {cat} in {c}: {count} generated, {kept.get((cat, c), 0)} new ({took:.1f}s)")
+
+                # write when the batch is full, every FLUSH_INTERVAL_S while items trickle in,
+                # and once everything has finished
+                now = time.perf_counter()
+                if pending and (len(pending) >= batch_size or now - last_flush >= FLUSH_INTERVAL_S
+                                or done == len(jobs)):
+                    inserted_total += _flush(db, pending)
+                    pending = []
+                    last_flush = now
+                    if first_insert is None:
+                        first_insert = now - started
+                        print(f"[seed] first insert after {first_insert:.2f}s")
+
+                if msg is not None and msg[0] == "done":
+                    elapsed = time.perf_counter() - started
+                    print(
+                        f"[seed] progress {done}/{len(jobs)} jobs, {inserted_total} inserted, "
+                        f"{done / elapsed:.2f} jobs/s, {inserted_total / elapsed:.1f} rows/s"
+                    )
+
+    elapsed = time.perf_counter() - started if jobs else 0.0
+    print(f"[seed] inserted {inserted_total} new rows total in {elapsed:.1f}s "
+          f"({skipped} duplicate(s) skipped, {failed} job(s) failed)")
     return inserted_total
 
 if __name__ == "__main__":
@@ -105,7 +191,17 @@ if __name__ == "__main__":
     parser.add_argument("--categories", nargs="+", default=["restaurants", "parks", "museums"],
                         help="List of categories to seed")
     parser.add_argument("--city", default="Arlington, TX", help="City to generate places in")
+    parser.add_argument("--cities", nargs="+", default=None,
+                        help="Several cities; every category is generated for each (overrides --city)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Concurrent generation calls")
     parser.add_argument("--replace", action="store_true", help="Wipe all rows before seeding")
+    parser.add_argument("--no-cache", action="store_true", help="Neither read nor write the generator cache")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Ignore cached generations but store the fresh ones")
     args = parser.parse_args()
+    print("Using database at:", DATABASE_URL)
 
-    seed_places(args.categories, city=args.city, replace=args.replace)
+    seed_places(args.categories, city=args.city, replace=args.replace,
+                cities=args.cities, workers=args.workers,
+                use_cache=not args.no_cache, refresh_cache=args.refresh)
@@ -0,0 +1,162 @@
+# backend/serialize_bench.py
+"""Per-row micro-benchmark of place normalization and JSON encoding.
+
+    python -m backend.serialize_bench
+    python -m backend.serialize_bench --places /tmp/places.json --rows 50000
+    python -m backend.serialize_bench --db backend/dev.db
+
+Times the compiled ``place_format.normalize_place`` against the previous
+per-row implementation (kept below as the baseline), and ``fast_json.dumps``
+against the stdlib encoder. It also checks that both paths produce the same
+output. Rows are the input cycled up to ``--rows``.
+
+Run from the repo root.
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from itertools import cycle, islice
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional
+
+from . import fast_json, image_variants, static_assets
+from .place_format import (
+    INTERNAL_FIELDS,
+    _local_place_image,
+    _normalize_price_level,
+    _resolve_image_url,
+    normalize_place,
+)
+
+BACKEND_DIR = Path(__file__).resolve().parent
+DEFAULT_PLACES = BACKEND_DIR / "data" / "places.json"
+BASE_URL = "http://localhost:8000"
+REPEATS = 3  # best of
+
+
+def _pick_first(*values: Any) -> Any:
+    for value in values:
+        if value is not None and value != "":
+            return value
+    return None
+
+
+def reference_normalize(place: Mapping[str, Any], base_url: str) -> Dict[str, Any]:
+    """normalize_place before the per-schema plan: aliases and extras resolved on every row."""
+    data = dict(place)
+    image_raw = _pick_first(data.get("imageUrl"), data.get("image_url"), data.get("photo_url"), data.get("photoPath"))
+    image_url = _resolve_image_url(image_raw, base_url, _local_place_image(image_raw))
+    image_file = _local_place_image(image_raw)
+    variants = None
+    if image_file and image_url:
+        version = static_assets.content_hash(image_file)
+        variants = image_variants.variant_urls(image_file, base_url, version=version)
+    price_level, price_display = _normalize_price_level(_pick_first(
+        data.get("priceDisplay"), data.get("price_display"), data.get("priceLevel"),
+        data.get("price_level"), data.get("price"),
+    ))
+    maps_raw = _pick_first(data.get("mapsUrl"), data.get("maps_url"), data.get("directionsUrl"),
+                           data.get("directions_url"))
+    maps_url = None
+    if maps_raw:
+        maps_url = str(maps_raw).strip() or None
+    normalized = {
+        "id": data.get("id"),
+        "name": data.get("name"),
+        "category": data.get("category"),
+        "description": _pick_first(data.get("description"), data.get("short_description")),
+        "address": data.get("address"),
+        "city": _pick_first(data.get("city"), data.get("address")),
+        "lat": data.get("lat"),
+        "lon": data.get("lon"),
+        "rating": data.get("rating"),
+        "priceLevel": price_level,
+        "priceDisplay": price_display,
+        "imageUrl": image_url,
+        "srcset": variants["srcset"] if variants else None,
+        "thumbnails": variants["thumbnails"] if variants else None,
+        "mapsUrl": maps_url,
+        "directionsUrl": maps_url,
+        "directions_url": maps_url,
+    }
+    for key, value in data.items():
+        if key not in normalized and key not in INTERNAL_FIELDS:
+            normalized[key] = value
+    return normalized
+
+
+def stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def load_rows(places: Optional[Path], db: Optional[Path]) -> List[Dict[str, Any]]:
+    if db is not None:
+        conn = sqlite3.connect(f"file:{db}?mode=ro", uri=True)
+        conn.row_factory = sqlite3.Row
+        try:
+            return [dict(row) for row in conn.execute("SELECT * FROM places ORDER BY id")]
+        finally:
+            conn.close()
+    with open(places or DEFAULT_PLACES, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data if isinstance(data, list) else [data]
+
+
+def _best_us_per_row(fn: Callable[[], Any], n: int) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best / n * 1e6
+
+
+def _line(label: str, before: float, after: float) -> str:
+    return f"  {label:<22} {before:8.2f} us/row -> {after:8.2f} us/row   x{before / after:5.1f}"
+
+
+def run(rows: List[Dict[str, Any]], count: int) -> int:
+    rows = [dict(r, id=i) for i, r in enumerate(islice(cycle(rows), count), 1)]
+    n = len(rows)
+
+    old_items = [reference_normalize(r, BASE_URL) for r in rows]
+    new_items = [normalize_place(r, BASE_URL) for r in rows]
+    mismatched = sum(a != b or list(a) != list(b) for a, b in zip(old_items, new_items))
+    differing_bytes = sum(stdlib_dumps(x) != fast_json.dumps(x) for x in new_items)
+
+    normalize_old = _best_us_per_row(lambda: [reference_normalize(r, BASE_URL) for r in rows], n)
+    normalize_new = _best_us_per_row(lambda: [normalize_place(r, BASE_URL) for r in rows], n)
+    encode_old = _best_us_per_row(lambda: [stdlib_dumps(x) for x in new_items], n)
+    encode_new = _best_us_per_row(lambda: [fast_json.dumps(x) for x in new_items], n)
+
+    encoder = "orjson" if fast_json.orjson is not None else "stdlib json (pip install orjson)"
+    print(f"[serialize] {n} rows, encoder: {encoder}")
+    print(_line("normalize", normalize_old, normalize_new))
+    print(_line("encode", encode_old, encode_new))
+    print(_line("normalize + encode", normalize_old + encode_old, normalize_new + encode_new))
+    if differing_bytes:
+        print(f"[serialize] note: {differing_bytes} row(s) encode to different (equivalent) bytes")
+    if mismatched:
+        print(f"[serialize] FAIL: {mismatched} row(s) normalize differently from the reference")
+        return 1
+    return 0
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark place normalization + JSON encoding per row.")
+    parser.add_argument("--places", type=Path, help=f"places.json to read (default {DEFAULT_PLACES})")
+    parser.add_argument("--db", type=Path, help="Read raw rows from this SQLite file instead")
+    parser.add_argument("--rows", type=int, default=20000, help="Rows to time (the input is cycled)")
+    args = parser.parse_args(argv)
+    rows = load_rows(args.places, args.db)
+    if not rows:
+        print("[serialize] no rows to benchmark")
+        return 1
+    return run(rows, max(1, args.rows))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+# backend/shared_snapshot.py
+"""Pre-encoded places snapshot that uvicorn workers share through ``mmap``.
+
+A snapshot is one file: a small JSON header, the encoded ``/api/places`` array,
+and binary indexes over it (sorted ids -> item, category -> items). Every worker
+maps the same file read-only, so the catalog lives once in the page cache
+however many workers run, and responses are sliced out of it as ``memoryview``s
+without copying.
+
+Files are immutable generations (``places.<generation>.snap``). Publishing a new
+one writes it next to the others and then atomically replaces the ``CURRENT``
+pointer file; each worker notices the pointer change on its next request and
+maps the new generation. Builds are serialized across processes with a lock
+file, so when the data changes only one worker does the work.
+
+The same encoding is used in-process (``Snapshot.from_bytes``) for base URLs
+the shared file wasn't built for.
+"""
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from . import fast_json
+
+try:
+    import fcntl
+except ImportError:  # Windows: builds aren't coordinated across processes, the pointer swap still is
+    fcntl = None  # type: ignore[assignment]
+
+MAGIC = b"PLSNAP1\n"
+_PREFIX = struct.Struct("<8sI")  # magic, header length
+POINTER_NAME = "CURRENT"
+LOCK_NAME = ".lock"
+KEEP_GENERATIONS = 2  # the current file and the one before it (in-flight responses may still read it)
+CHUNK_SIZE = 1 << 20
+
+
+_encode = fast_json.dumps
+
+
+def _pad8(buf: bytearray) -> None:
+    buf.extend(b"\0" * (-len(buf) % 8))
+
+
+def encode_snapshot(items: Sequence[Dict[str, Any]], meta: Optional[Dict[str, Any]] = None) -> bytes:
+    """Serialize normalized places (and their indexes) into the snapshot layout."""
+    body = bytearray(b"[")
+    offsets = array("I")
+    lengths = array("I")
+    by_id: List[tuple] = []
+    by_category: Dict[str, List[int]] = {}
+    for pos, item in enumerate(items):
+        if pos:
+            body += b","
+        encoded = _encode(item)
+        offsets.append(len(body))
+        lengths.append(len(encoded))
+        body += encoded
+        pid = item.get("id")
+        if isinstance(pid, int) and not isinstance(pid, bool):
+            by_id.append((pid, pos))
+        category = item.get("category")
+        if category is not None:
+            by_category.setdefault(str(category), []).append(pos)
+    body += b"]"
+    by_id.sort()
+
+    ids = array("q", (pid for pid, _ in by_id))
+    id_pos = array("I", (pos for _, pos in by_id))
+    cat_pos = array("I")
+    categories = {}
+    for name, positions in by_category.items():
+        categories[name] = [len(cat_pos), len(positions)]
+        cat_pos.extend(positions)
+
+    # sections follow the header, each 8-byte aligned; the header records [offset, byte length]
+    sections = [("payload", bytes(body)), ("offsets", offsets.tobytes()), ("lengths", lengths.tobytes()),
+                ("ids", ids.tobytes()), ("idPos", id_pos.tobytes()), ("catPos", cat_pos.tobytes())]
+    header = {**(meta or {}), "count": len(items), "categories": categories, "sections": {}}
+    # the header size depends on the section offsets, so lay out against a generous estimate
+    reserve = len(_encode(header)) + 64 * len(sections) + 64
+    start = _PREFIX.size + reserve
+    start += -start % 8
+    out = bytearray()
+    for name, data in sections:
+        header["sections"][name] = [start + len(out), len(data)]
+        out += data
+        _pad8(out)
+    head = _encode(header)
+    if len(head) > reserve:
+        raise ValueError("snapshot header larger than reserved space")
+    head = head.ljust(start - _PREFIX.size, b" ")
+    return _PREFIX.pack(MAGIC, len(head)) + head + bytes(out)
+
+
+class Snapshot:
+    """Read-only view over an encoded snapshot (an mmap or plain bytes)."""
+
+    def __init__(self, buf: Any, path: Optional[Path] = None):
+        self._buf = buf  # keeps the mmap alive while views into it exist
+        self.path = path
+        view = memoryview(buf)
+        magic, head_len = _PREFIX.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise ValueError(f"not a places snapshot: {path or '<bytes>'}")
+        self.header = json.loads(bytes(view[_PREFIX.size:_PREFIX.size + head_len]))
+        self.view = view
+        sec = self.header["sections"]
+
+        def section(name: str, fmt: Optional[str] = None) -> memoryview:
+            start, length = sec[name]
+            part = view[start:start + length]
+            return part.cast(fmt) if fmt else part
+
+        self.payload = section("payload")
+        self._offsets = section("offsets", "I")
+        self._lengths = section("lengths", "I")
+        self._ids = section("ids", "q")
+        self._id_pos = section("idPos", "I")
+        self._cat_pos = section("catPos", "I")
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Snapshot":
+        return cls(data)
+
+    @classmethod
+    def open(cls, path: Path) -> "Snapshot":
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mm, path)
+
+    @property
+    def version(self) -> Any:
+        return self.header.get("version")
+
+    @property
+    def count(self) -> int:
+        return self.header["count"]
+
+    def item_at(self, pos: int) -> memoryview:
+        """Encoded JSON object at ``pos`` in snapshot order (0 <= pos < count)."""
+        start = self._offsets[pos]
+        return self.payload[start:start + self._lengths[pos]]
+
+    def item(self, place_id: int) -> Optional[memoryview]:
+        """Encoded JSON object of one place, or None."""
+        i = bisect_left(self._ids, place_id)
+        if i < len(self._ids) and self._ids[i] == place_id:
+            return self.item_at(self._id_pos[i])
+        return None
+
+    def items(self) -> Iterator[Tuple[int, memoryview]]:
+        """(id, encoded item) for every place with an id, in id order."""
+        for pid, pos in zip(self._ids, self._id_pos):
+            yield pid, self.item_at(pos)
+
+    def categories(self) -> List[str]:
+        return list(self.header["categories"])
+
+    def category_parts(self, categories: Sequence[str]) -> Iterator[memoryview]:
+        """Encoded items of the given categories, in snapshot order, as separate views."""
+        positions: List[int] = []
+        for name in categories:
+            span = self.header["categories"].get(name)
+            if span:
+                positions.extend(self._cat_pos[span[0]:span[0] + span[1]])
+        for pos in sorted(positions):
+            yield self.item_at(pos)
+
+    def chunks(self, size: int = CHUNK_SIZE) -> Iterator[memoryview]:
+        """The full encoded array in ``size`` pieces."""
+        for start in range(0, len(self.payload), size):
+            yield self.payload[start:start + size]
+
+
+def join_array(parts: Iterator[memoryview]) -> Iterator[bytes | memoryview]:
+    """Frame encoded items as a JSON array without concatenating them."""
+    yield b"["
+    first = True
+    for part in parts:
+        if not first:
+            yield b","
+        first = False
+        yield part
+    yield b"]"
+
+
+class SnapshotStore:
+    """Generations of one snapshot in ``directory``, published through the ``CURRENT`` pointer."""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.pointer = self.directory / POINTER_NAME
+        self._lock = threading.Lock()
+        self._snap: Optional[Snapshot] = None
+        self._pointer_stat: Optional[tuple] = None
+        self._failed_version: Any = None  # don't retry a broken source on every request
+
+    def _stat_pointer(self) -> Optional[tuple]:
+        try:
+            st = self.pointer.stat()
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_ino, st.st_size
+
+    def current(self) -> Optional[Snapshot]:
+        """The published generation; re-mapped only when the pointer changed (one stat per call)."""
+        pstat = self._stat_pointer()
+        if pstat == self._pointer_stat:
+            return self._snap
+        if pstat is None:
+            self._snap, self._pointer_stat = None, None
+            return None
+        try:
+            name = self.pointer.read_text(encoding="utf-8").strip()
+            snap = Snapshot.open(self.directory / name)
+        except (OSError, ValueError) as exc:
+            print(f"[WARN] could not map snapshot from {self.pointer}: {exc}")
+            return self._snap
+        self._snap, self._pointer_stat = snap, pstat
+        return snap
+
+    def get(self, version: Any, build: Callable[[], Sequence[Dict[str, Any]]],
+            meta: Optional[Dict[str, Any]] = None, force: bool = False) -> Optional[Snapshot]:
+        """Snapshot for ``version``, building and publishing it if no worker has yet.
+
+        ``build`` returns the normalized items; if it raises, the current generation (if any)
+        keeps being served.
+        """
+        snap = self.current()
+        if not force and snap is not None and version in (snap.version, self._failed_version):
+            return snap
+        with self._lock, self._file_lock():
+            snap = self.current()
+            if not force and snap is not None and snap.version == version:
+                return snap  # another worker published it while we waited
+            try:
+                items = build()
+            except Exception as exc:
+                print(f"[WARN] snapshot build failed, serving previous generation: {exc}")
+                self._failed_version = version
+                return snap
+            self.publish(encode_snapshot(items, {**(meta or {}), "version": version}))
+            return self.current()
+
+    def publish(self, data: bytes) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        generation = f"{time.time_ns():x}-{os.getpid()}"
+        path = self.directory / f"places.{generation}.snap"
+        _write_atomic(path, data)
+        _write_atomic(self.pointer, path.name.encode("utf-8"))
+        self._prune()
+        return path
+
+    def _prune(self) -> None:
+        gens = sorted(self.directory.glob("places.*.snap"), key=lambda p: p.stat().st_mtime_ns)
+        for path in gens[:-KEEP_GENERATIONS]:
+            try:
+                path.unlink()  # workers that still map it keep their pages until they move on
+            except OSError:
+                pass
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / LOCK_NAME, "a+b") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
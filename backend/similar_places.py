@@ -0,0 +1,327 @@
+# backend/similar_places.py
+"""Offline "similar places" index for PlaceDetails.
+
+Each place becomes a hashed TF-IDF vector over its description, category and
+subcategory tokens (feature hashing, so there is no vocabulary to store).
+Similarity is the cosine of those vectors blended with geographic proximity.
+Candidates come from an inverted index over the selective hashed features
+plus a ~5 km grid, so a place is only scored against a bounded set of places
+that share a term or are nearby.
+
+The batch job stores the top-k neighbours per place in
+``data/similar_index.json`` together with a fingerprint of every place's
+inputs. A re-run only recomputes the places whose inputs changed, plus those
+whose stored neighbours changed or disappeared. Unchanged lists are merged
+with the scores against the changed places. The API answers with a dict lookup.
+
+    python -m backend.similar_places              # from data/places.json (incremental)
+    python -m backend.similar_places --db --full  # from the database, recomputing everything
+"""
+
+import argparse
+import hashlib
+import heapq
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+import zlib
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .geo import haversine_km, valid_coords
+
+BACKEND_DIR = Path(__file__).resolve().parent
+PLACES_FILE = BACKEND_DIR / "data" / "places.json"
+INDEX_FILE = BACKEND_DIR / "data" / "similar_index.json"
+
+DEFAULT_K = 20  # also the most /api/places/{id}/similar hands out
+HASH_BITS = 18
+TEXT_WEIGHT = 0.75      # the rest is geographic proximity
+GEO_SCALE_KM = 5.0      # proximity score halves roughly every 3.5 km
+GRID_DEG = 0.05         # geo candidate cells (~5.5 km)
+CATEGORY_BOOST = 2      # category/subcategory tokens count as this many description words
+MAX_POSTINGS = 200      # terms shared by more places than this don't nominate candidates
+MAX_CANDIDATES = 200    # fully scored per place
+FULL_REBUILD_RATIO = 0.25  # past this share of changed places an incremental run isn't worth it
+CHECK_INTERVAL_S = 2.0
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "the a an and or of in on at to for with from by is are was be this that it its as our your "
+    "you we their has have more than into over all any can will".split()
+)
+
+Neighbours = List[Tuple[int, float]]
+
+
+def tokens(place: Dict[str, Any]) -> List[str]:
+    words = [w for w in _WORD.findall(str(place.get("description") or "").lower())
+             if len(w) > 2 and w not in _STOPWORDS]
+    for key in ("category", "subcategory"):
+        value = str(place.get(key) or "").strip().lower()
+        if value:
+            words += [f"{key}:{value}"] * CATEGORY_BOOST
+    return words
+
+
+def _feature(token: str) -> int:
+    # crc32 rather than hash(): stable across processes and runs
+    return zlib.crc32(token.encode("utf-8")) & ((1 << HASH_BITS) - 1)
+
+
+def fingerprint(place: Dict[str, Any]) -> str:
+    coords = valid_coords(place.get("lat"), place.get("lon"))
+    ident = [place.get("description"), place.get("category"), place.get("subcategory"),
+             [round(c, 5) for c in coords] if coords else None]
+    return hashlib.sha1(json.dumps(ident, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+class SimilarityModel:
+    """TF-IDF vectors + inverted index + geo grid over one set of places."""
+
+    def __init__(self, places: Dict[int, Dict[str, Any]]):
+        counts = {pid: Counter(_feature(t) for t in tokens(p)) for pid, p in places.items()}
+        df: Counter = Counter()
+        for c in counts.values():
+            df.update(c.keys())
+        n = len(places)
+        self.vectors: Dict[int, Dict[int, float]] = {}
+        self.postings: Dict[int, List[Tuple[int, float]]] = defaultdict(list)
+        for pid, c in counts.items():
+            vec = {f: (1 + math.log(tf)) * (math.log((1 + n) / (1 + df[f])) + 1) for f, tf in c.items()}
+            norm = math.sqrt(sum(w * w for w in vec.values())) or 1.0
+            vec = {f: w / norm for f, w in vec.items()}
+            self.vectors[pid] = vec
+            for f, w in vec.items():
+                self.postings[f].append((pid, w))
+
+        self.coords: Dict[int, Tuple[float, float]] = {}
+        self.grid: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        for pid, p in places.items():
+            coords = valid_coords(p.get("lat"), p.get("lon"))
+            if coords:
+                self.coords[pid] = coords
+                self.grid[self._cell(coords)].append(pid)
+
+    @staticmethod
+    def _cell(coords: Tuple[float, float]) -> Tuple[int, int]:
+        return int(math.floor(coords[0] / GRID_DEG)), int(math.floor(coords[1] / GRID_DEG))
+
+    def _geo(self, a: int, b: int) -> float:
+        ca, cb = self.coords.get(a), self.coords.get(b)
+        if ca is None or cb is None:
+            return 0.0
+        return math.exp(-haversine_km(ca[0], ca[1], cb[0], cb[1]) / GEO_SCALE_KM)
+
+    def score(self, a: int, b: int) -> float:
+        va, vb = self.vectors.get(a, {}), self.vectors.get(b, {})
+        if len(vb) < len(va):
+            va, vb = vb, va
+        text = sum(w * vb.get(f, 0.0) for f, w in va.items())
+        return TEXT_WEIGHT * text + (1 - TEXT_WEIGHT) * self._geo(a, b)
+
+    def neighbours(self, pid: int, k: int) -> Neighbours:
+        # candidates: places sharing a selective term, plus everything in the 3x3 grid around it.
+        # Terms in more than MAX_POSTINGS places (category tokens, filler words) still count
+        # in the score, they just don't nominate candidates.
+        partial: Dict[int, float] = defaultdict(float)
+        common = []
+        for f, w in self.vectors.get(pid, {}).items():
+            post = self.postings[f]
+            if len(post) > MAX_POSTINGS:
+                common.append(f)
+                continue
+            for other, w2 in post:
+                partial[other] += w * w2
+        coords = self.coords.get(pid)
+        if coords:
+            ci, cj = self._cell(coords)
+            for di in (-1, 0, 1):
+                for dj in (-1, 0, 1):
+                    for other in self.grid.get((ci + di, cj + dj), ()):
+                        partial.setdefault(other, 0.0)
+        if len(partial) < k and common:
+            for f in common:
+                for other, _ in self.postings[f][:MAX_POSTINGS]:
+                    partial.setdefault(other, 0.0)
+        partial.pop(pid, None)
+        pre = [(other, TEXT_WEIGHT * t + (1 - TEXT_WEIGHT) * self._geo(pid, other)) for other, t in partial.items()]
+        if len(pre) > MAX_CANDIDATES:
+            pre = heapq.nlargest(MAX_CANDIDATES, pre, key=lambda x: x[1])
+        scored = ((other, self.score(pid, other)) for other, _ in pre)
+        return [(other, round(s, 4)) for other, s in heapq.nlargest(k, scored, key=lambda x: (x[1], -x[0]))
+                if s > 0]
+
+
+def _params(k: int) -> Dict[str, Any]:
+    return {"k": k, "hashBits": HASH_BITS, "textWeight": TEXT_WEIGHT, "geoScaleKm": GEO_SCALE_KM,
+            "categoryBoost": CATEGORY_BOOST}
+
+
+def build_index(places: Iterable[Dict[str, Any]], previous: Optional[Dict[str, Any]] = None,
+                k: int = DEFAULT_K, full: bool = False) -> Tuple[Dict[str, Any], Dict[str, int]]:
+    """New index (and counts of what was recomputed) for ``places``, reusing ``previous`` where valid."""
+    by_id = {int(p["id"]): p for p in places if isinstance(p.get("id"), int)}
+    fps = {pid: fingerprint(p) for pid, p in by_id.items()}
+    model = SimilarityModel(by_id)
+
+    old_fps = {int(k_): v for k_, v in (previous or {}).get("fingerprints", {}).items()}
+    old_nbrs = {int(k_): [tuple(n) for n in v] for k_, v in (previous or {}).get("neighbours", {}).items()}
+    changed = {pid for pid, fp in fps.items() if old_fps.get(pid) != fp}
+    removed = set(old_fps) - set(fps)
+    incremental = (
+        not full and previous is not None and previous.get("params") == _params(k)
+        and len(changed) <= FULL_REBUILD_RATIO * max(len(fps), 1)
+    )
+
+    neighbours: Dict[int, Neighbours] = {}
+    recomputed = merged = 0
+    if incremental:
+        stale = changed | removed
+        for pid in fps:
+            if pid in changed:
+                continue
+            current = old_nbrs.get(pid, [])
+            if any(other in stale for other, _ in current):
+                # a neighbour moved or left; what replaces it can be anyone
+                neighbours[pid] = model.neighbours(pid, k)
+                recomputed += 1
+                continue
+            # only the changed places can enter an otherwise unchanged list
+            extra = [(other, round(model.score(pid, other), 4)) for other in changed]
+            neighbours[pid] = heapq.nlargest(k, current + [e for e in extra if e[1] > 0],
+                                             key=lambda x: (x[1], -x[0]))
+            merged += bool(changed)
+        for pid in changed:
+            neighbours[pid] = model.neighbours(pid, k)
+            recomputed += 1
+    else:
+        for pid in fps:
+            neighbours[pid] = model.neighbours(pid, k)
+        recomputed = len(fps)
+
+    index = {
+        "version": 1,
+        "params": _params(k),
+        "builtAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "fingerprints": {str(pid): fp for pid, fp in fps.items()},
+        "neighbours": {str(pid): [[other, s] for other, s in nbrs] for pid, nbrs in neighbours.items()},
+    }
+    stats = {"places": len(fps), "changed": len(changed), "removed": len(removed),
+             "recomputed": recomputed, "merged": merged, "incremental": int(incremental)}
+    return index, stats
+
+
+def load_index_file(path: Path = INDEX_FILE) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def save_index_file(index: Dict[str, Any], path: Path = INDEX_FILE) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+class SimilarIndex:
+    """The stored neighbour lists, reloaded when the index file changes (checked every few seconds)."""
+
+    def __init__(self, path: Path = INDEX_FILE):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._stat: Optional[Tuple[int, int]] = None
+        self._checked = 0.0
+        self._neighbours: Dict[int, Tuple[Tuple[int, float], ...]] = {}
+        self.k: Optional[int] = None  # neighbours stored per place, None until an index is loaded
+
+    def get(self, place_id: int) -> Tuple[Tuple[int, float], ...]:
+        self._maybe_reload()
+        return self._neighbours.get(place_id, ())
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if now - self._checked < CHECK_INTERVAL_S:
+            return
+        with self._lock:
+            self._checked = now
+            try:
+                st = self.path.stat()
+                stat = (st.st_mtime_ns, st.st_size)
+            except FileNotFoundError:
+                stat = None
+            if stat == self._stat:
+                return
+            index = load_index_file(self.path) if stat else None
+            self._neighbours = {
+                int(pid): tuple((int(o), float(s)) for o, s in nbrs)
+                for pid, nbrs in (index or {}).get("neighbours", {}).items()
+            }
+            self.k = (index or {}).get("params", {}).get("k")
+            self._stat = stat
+
+
+_index: Optional[SimilarIndex] = None
+
+
+def get_similar_index() -> SimilarIndex:
+    global _index
+    if _index is None:
+        _index = SimilarIndex()
+    return _index
+
+
+def _places_from_json(path: Path) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data if isinstance(data, list) else [data]
+
+
+def _places_from_db() -> List[Dict[str, Any]]:
+    from sqlalchemy import text
+
+    from .db import engine
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT * FROM places ORDER BY id")).mappings().all()
+    return [dict(r) for r in rows if not r.get("deleted_at")]
+
+
+def main(argv: Optional[Iterable[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build or update the similar-places index.")
+    parser.add_argument("--places", type=Path, default=PLACES_FILE, help="places.json to read")
+    parser.add_argument("--db", action="store_true", help="Read places from the database instead")
+    parser.add_argument("--out", type=Path, default=INDEX_FILE)
+    parser.add_argument("-k", type=int, default=DEFAULT_K, help="Neighbours stored per place")
+    parser.add_argument("--full", action="store_true", help="Recompute every place")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    places = _places_from_db() if args.db else _places_from_json(args.places)
+    index, stats = build_index(places, load_index_file(args.out), k=args.k, full=args.full)
+    save_index_file(index, args.out)
+    mode = "incremental" if stats["incremental"] else "full"
+    print(f"[similar] {mode}: {stats['places']} places, {stats['changed']} changed, "
+          f"{stats['removed']} removed, {stats['recomputed']} recomputed, {stats['merged']} merged "
+          f"in {time.perf_counter() - started:.2f}s -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# backend/single_flight.py
+"""Coalesce concurrent rebuilds of the same thing into one.
+
+``SingleFlight`` runs at most one call per key at a time; everyone else asking
+for that key while it runs waits for the same result. ``VersionedCache`` builds
+on it: it keeps the last value per key together with the data version it was
+built from, rebuilds exactly once when the version changes, and meanwhile
+serves the previous value (stale-while-revalidate) or waits a bounded time.
+
+Versions are opaque (file stats, a TTL bucket), so they are ordered by when
+their build started: a slow build that finishes after a newer one has been
+stored is handed to its own callers but never replaces the newer entry.
+"""
+
+import itertools
+import threading
+import time
+from typing import Any, Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+FAILED_RETRY_S = 5.0  # don't retry a failed build of the same version more often than this
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        return self.done.wait(timeout)
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def start(self, key: Hashable, fn: Callable[[], Any]) -> _Call:
+        """The in-flight call for ``key``, starting ``fn`` in a background thread if there is none.
+
+        The build runs off the request thread so it finishes (and is cached) even when the
+        request that triggered it gives up waiting.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                return call
+            call = self._calls[key] = _Call()
+
+        def run() -> None:
+            try:
+                call.result = fn()
+            except BaseException as exc:
+                call.error = exc
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                call.done.set()
+
+        threading.Thread(target=run, name=f"single-flight {key!r}", daemon=True).start()
+        return call
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+def _freeze(version: Any) -> Hashable:
+    return tuple(version) if isinstance(version, list) else version
+
+
+class VersionedCache(Generic[T]):
+    """Latest value per key, rebuilt once per data version."""
+
+    def __init__(self, max_wait_s: float = 2.0, serve_stale: bool = True) -> None:
+        self.max_wait_s = max_wait_s
+        self.serve_stale = serve_stale
+        self._entries: Dict[Hashable, Tuple[Any, T, int]] = {}  # key -> (version, value, build number)
+        self._failed: Dict[Hashable, Tuple[Any, float, BaseException]] = {}
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._builds = itertools.count(1)
+
+    def get(self, key: Hashable, version: Any, build: Callable[[], T], max_wait_s: Optional[float] = None) -> T:
+        """Value for ``version``.
+
+        If it isn't built yet, one rebuild starts (or the running one is joined). With a
+        previous value and ``serve_stale`` that value is returned right away; otherwise the
+        caller waits up to ``max_wait_s`` (default: the cache's) and then gets the previous
+        value. Raises the build error, or ``TimeoutError``, only when there is nothing to
+        fall back to.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        failed = self._failed.get(key)
+        if failed is not None and failed[0] == version and time.monotonic() - failed[1] < FAILED_RETRY_S:
+            if entry is not None:
+                return entry[1]
+            raise failed[2]
+
+        number = next(self._builds)
+        call = self._flight.start((key, _freeze(version)), lambda: self._build(key, version, build, number))
+        if entry is not None and self.serve_stale:
+            return entry[1]
+        wait = self.max_wait_s if max_wait_s is None else max_wait_s
+        if call.wait(wait):
+            if call.error is None:
+                return call.result
+            if entry is not None:
+                return entry[1]
+            raise call.error
+        if entry is not None:
+            return entry[1]
+        raise TimeoutError(f"rebuild of {key!r} still running after {wait:.1f}s")
+
+    def _build(self, key: Hashable, version: Any, build: Callable[[], T], number: int) -> T:
+        try:
+            value = build()
+        except Exception as exc:
+            print(f"[WARN] rebuild of {key!r} failed: {exc}")
+            self._failed[key] = (version, time.monotonic(), exc)
+            raise
+        with self._lock:
+            self._failed.pop(key, None)
+            current = self._entries.get(key)
+            if current is None or current[2] < number:
+                self._entries[key] = (version, value, number)
+        return value
+
+    def expire(self) -> None:
+        """Make every entry stale; the next request rebuilds while the old values keep serving."""
+        with self._lock:
+            for key, (_, value, number) in list(self._entries.items()):
+                self._entries[key] = (object(), value, number)
+            self._failed.clear()
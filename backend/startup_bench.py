@@ -0,0 +1,123 @@
+# backend/startup_bench.py
+"""Startup benchmark for the API, with budgets so it can gate a deploy.
+
+    python -m backend.startup_bench
+    python -m backend.startup_bench --import-budget-ms 600 --ready-budget-ms 800 --top 15
+
+1. Imports ``backend.app`` in a fresh interpreter under ``-X importtime``, prints
+   the slowest modules and fails if the import exceeds its budget or pulls in a
+   module that should stay lazy (SQLAlchemy, Pillow, the OpenAI client).
+2. Spawns ``uvicorn backend.app:app`` on a free port and times how long until
+   ``/api/health`` answers. uvicorn only accepts connections after the lifespan
+   warm-up (snapshot build) has finished, so this is spawn-to-ready.
+
+Run from the repo root.
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+IMPORT_BUDGET_MS = 750.0  # FastAPI + pydantic alone are ~400 ms of it
+READY_BUDGET_MS = 1000.0
+# heavy modules that must not be imported just to serve places.json
+FORBIDDEN = ("sqlalchemy", "PIL", "openai", "numpy")
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """(module, self_us, cumulative_us) for every ``import time:`` line."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((name.strip(), int(self_us), int(cum_us)))
+    return rows
+
+
+def measure_import(env: dict) -> List[Tuple[str, int, int]]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import backend.app"],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"importing backend.app failed:\n{proc.stderr[-2000:]}")
+    return parse_importtime(proc.stderr)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_ready(env: dict, timeout_s: float = 30.0) -> float:
+    """Seconds from spawning uvicorn until /api/health returns 200."""
+    port = _free_port()
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.app:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}/api/health"
+    try:
+        while time.perf_counter() - started < timeout_s:
+            if proc.poll() is not None:
+                raise SystemExit(f"uvicorn exited with code {proc.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=0.5) as resp:
+                    if resp.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise SystemExit(f"API not ready after {timeout_s:.0f}s")
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure API import time and spawn-to-ready time.")
+    parser.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--ready-budget-ms", type=float, default=READY_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=10, help="How many of the slowest modules to list")
+    parser.add_argument("--no-ready", action="store_true", help="Only profile the import")
+    args = parser.parse_args(argv)
+
+    env = {**os.environ, "PYTHONPATH": str(REPO_ROOT)}
+    failures = []
+
+    rows = measure_import(env)
+    total = next((cum for name, _, cum in rows if name == "backend.app"), 0) / 1000
+    print(f"[startup] import backend.app: {total:.0f} ms (budget {args.import_budget_ms:.0f} ms)")
+    for name, self_us, cum_us in sorted(rows, key=lambda r: r[1], reverse=True)[:args.top]:
+        print(f"    {self_us / 1000:7.1f} ms self  {cum_us / 1000:7.1f} ms cumulative  {name}")
+    if total > args.import_budget_ms:
+        failures.append(f"import took {total:.0f} ms")
+    eager = sorted({name.split(".")[0] for name, *_ in rows} & set(FORBIDDEN))
+    if eager:
+        failures.append(f"imported eagerly: {', '.join(eager)}")
+
+    if not args.no_ready:
+        ready_ms = measure_ready(env) * 1000
+        print(f"[startup] spawn-to-ready: {ready_ms:.0f} ms (budget {args.ready_budget_ms:.0f} ms)")
+        if ready_ms > args.ready_budget_ms:
+            failures.append(f"ready after {ready_ms:.0f} ms")
+
+    for failure in failures:
+        print(f"[startup] OVER BUDGET: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""Content-hashed URLs for place images.
+
+``/static/places/<slug>.jpg`` keeps working, but its content can change in place,
+so browsers have to revalidate it. The API instead hands out
+``/assets/places/<slug>.<hash>.jpg`` where ``<hash>`` is taken from the file
+contents; those responses never change and are sent with a one-year
+``immutable`` Cache-Control, a strong ETag and single-range support.
+"""
+
+import re
+from pathlib import Path
+from typing import Optional
+
+from fastapi import Request
+from fastapi.responses import FileResponse, RedirectResponse, Response
+from fastapi.staticfiles import StaticFiles
+
+from .asset_manifest import HASH_LEN, PLACES_DIR, get_manifest
+
+ASSET_URL_PREFIX = "/assets/places"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_MEDIA_TYPES = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".webp": "image/webp",
+}
+_HASHED_NAME = re.compile(r"^(?P<stem>[A-Za-z0-9_-]+)\.(?P<hash>[0-9a-f]{%d})(?P<ext>\.[A-Za-z0-9]+)$" % HASH_LEN)
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+_HASHED_SHARD = re.compile(r"\.[0-9a-f]{8,64}\.json$")  # export_to_json --shards: <key>.<hash>.json
+
+def content_hash(filename: str) -> Optional[str]:
+    """Content hash of a usable image in static/places, from the in-memory manifest."""
+    entry = get_manifest().lookup(filename)
+    if entry is None or entry.broken:
+        return None
+    return entry.hash
+
+
+def hashed_name(filename: str) -> Optional[str]:
+    """``<stem>.<hash><ext>`` for a file in static/places, or None if it is missing or broken."""
+    path = Path(filename)
+    if path.suffix.lower() not in _MEDIA_TYPES or path.name != filename:
+        return None
+    digest = content_hash(filename)
+    if digest is None:
+        return None
+    return f"{path.stem}.{digest}{path.suffix}"
+
+
+def unhashed_name(name: str) -> Optional[str]:
+    """``<stem>.<hash><ext>`` -> ``<stem><ext>``; None if ``name`` isn't a hashed asset name."""
+    m = _HASHED_NAME.match(name)
+    return f"{m.group('stem')}{m.group('ext')}" if m else None
+
+
+def hashed_url(filename: str, base_url: str) -> Optional[str]:
+    name = hashed_name(filename)
+    return f"{base_url}{ASSET_URL_PREFIX}/{name}" if name else None
+
+
+def _parse_range(header: str, size: int) -> Optional[tuple[int, int]]:
+    """Inclusive (start, end) for a single ``bytes=`` range; None if unsatisfiable.
+
+    Multi-range requests aren't worth the multipart encoding for images; callers
+    treat them like a missing header and send the whole file.
+    """
+    m = _RANGE.match(header.strip())
+    if not m:
+        return None
+    first, last = m.group(1), m.group(2)
+    if first == "" and last == "":
+        return None
+    if first == "":
+        length = int(last)
+        if length == 0:
+            return None
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return None
+    return start, end
+
+
+def serve_hashed(name: str, request: Request) -> Response:
+    """Response for ``/assets/places/<name>``.
+
+    A stale hash (the file changed since the URL was handed out) redirects to the
+    current URL instead of serving different bytes under an immutable name.
+    """
+    m = _HASHED_NAME.match(name)
+    if not m:
+        return Response(status_code=404)
+    filename = f"{m.group('stem')}{m.group('ext')}"
+    entry = get_manifest().lookup(filename)
+    if entry is None or entry.broken:
+        return Response(status_code=404)
+    digest = entry.hash
+    path = PLACES_DIR / filename
+    if digest != m.group("hash"):
+        return RedirectResponse(f"{ASSET_URL_PREFIX}/{path.stem}.{digest}{path.suffix}", status_code=302)
+
+    etag = f'"{digest}"'
+    headers = {
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+    }
+    inm = request.headers.get("if-none-match")
+    if inm and (inm.strip() == "*" or etag in [t.strip().removeprefix("W/") for t in inm.split(",")]):
+        return Response(status_code=304, headers=headers)
+
+    media_type = _MEDIA_TYPES.get(path.suffix.lower(), "application/octet-stream")
+    size = entry.size
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and "," not in range_header and (not if_range or if_range.strip() == etag):
+        rng = _parse_range(range_header, size)
+        if rng is None:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        start, end = rng
+        with open(path, "rb") as f:
+            f.seek(start)
+            body = f.read(end - start + 1)
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        return Response(body, status_code=206, media_type=media_type, headers=headers)
+
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+
+class ShardFiles(StaticFiles):
+    """Static shard export: hashed shard files are immutable, ``manifest.json`` is always revalidated."""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        hashed = _HASHED_SHARD.search(str(full_path)) is not None
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL if hashed else "no-cache"
+        return response
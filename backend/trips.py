@@ -0,0 +1,303 @@
+# backend/trips.py
+"""Visiting order for a trip: haversine distance matrix + nearest neighbour + 2-opt/Or-opt.
+
+The route is modelled as a cycle over the stops plus, when needed, an anchor:
+the start point (fixed first) and/or a zero-distance "dummy" node that turns
+the cycle into an open path. Every edge is then symmetric, so 2-opt and Or-opt
+moves are evaluated for all candidate positions at once with NumPy.
+
+With time windows the objective becomes distance plus a penalty per minute of
+lateness; moves are pre-filtered on distance and accepted on the full cost.
+Local search stops when nothing improves or the time budget runs out.
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+DEFAULT_TIME_BUDGET_MS = 50.0
+DEFAULT_SPEED_KMH = 30.0        # city driving, door to door
+DEFAULT_VISIT_MINUTES = 45.0
+DEFAULT_START_MINUTES = 9 * 60
+LATE_PENALTY_KM_PER_MIN = 1.0   # one minute late costs as much as one extra km
+URGENT_SLACK_VISITS = 2         # nearest neighbour jumps to a stop once its slack is under two visits
+MATRIX_CACHE_SIZE = 128
+
+Coord = Tuple[float, float]
+
+
+def haversine_matrix(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Pairwise great-circle distances in km (symmetric, zero diagonal)."""
+    phi = np.radians(lat)
+    lam = np.radians(lon)
+    dphi = phi[:, None] - phi[None, :]
+    dlam = lam[:, None] - lam[None, :]
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi)[:, None] * np.cos(phi)[None, :] * np.sin(dlam / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def haversine_row(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    return haversine_matrix(np.append(lats, lat), np.append(lons, lon))[-1, :-1]
+
+
+# distance matrices per place set; keyed by the sorted (id, lat, lon) tuples so moved places miss
+_matrix_cache: "OrderedDict[tuple, Tuple[List[int], np.ndarray]]" = OrderedDict()
+_matrix_lock = Lock()
+
+
+def distance_matrix(stops: Dict[int, Coord]) -> Tuple[List[int], np.ndarray]:
+    """(ids in matrix order, matrix) for ``stops``, from the LRU cache when possible."""
+    key = tuple(sorted((pid, lat, lon) for pid, (lat, lon) in stops.items()))
+    with _matrix_lock:
+        hit = _matrix_cache.get(key)
+        if hit is not None:
+            _matrix_cache.move_to_end(key)
+            return hit
+    ids = [k[0] for k in key]
+    coords = np.array([(k[1], k[2]) for k in key], dtype=float).reshape(-1, 2)
+    entry = (ids, haversine_matrix(coords[:, 0], coords[:, 1]))
+    with _matrix_lock:
+        _matrix_cache[key] = entry
+        while len(_matrix_cache) > MATRIX_CACHE_SIZE:
+            _matrix_cache.popitem(last=False)
+    return entry
+
+
+@dataclass
+class TripPlan:
+    order: List[int]
+    legs_km: List[float]
+    distance_km: float
+    arrivals: List[float] = field(default_factory=list)   # minutes after midnight, per stop
+    late: List[int] = field(default_factory=list)         # ids reached after their window closed
+    iterations: int = 0
+    elapsed_ms: float = 0.0
+
+
+class _Route:
+    """Cycle ``t`` over node indexes; positions outside [lo, hi] are pinned."""
+
+    def __init__(self, D: np.ndarray, t: np.ndarray, lo: int, hi: int):
+        self.D = D
+        self.t = t
+        self.lo = lo
+        self.hi = hi
+
+    def length(self) -> float:
+        return float(self.D[self.t, np.roll(self.t, -1)].sum())
+
+    def two_opt_move(self) -> Optional[Tuple[float, int, int]]:
+        """Best segment reversal t[i..j] as (delta, i, j), or None; all (i, j) pairs at once."""
+        if self.hi <= self.lo:
+            return None  # fewer than two movable stops: nothing to reverse
+        D, t, n = self.D, self.t, len(self.t)
+        pos = np.arange(self.lo, self.hi + 1)
+        prev, cur, nxt = t[pos - 1], t[pos], t[(pos + 1) % n]
+        # reversing t[i..j] swaps edges (t[i-1], t[i]) + (t[j], t[j+1]) for (t[i-1], t[j]) + (t[i], t[j+1])
+        delta = (D[prev[:, None], cur[None, :]] + D[cur[:, None], nxt[None, :]]
+                 - D[prev, cur][:, None] - D[cur, nxt][None, :])
+        delta[np.tril_indices(len(pos))] = np.inf  # only j > i
+        flat = int(np.argmin(delta))
+        i, j = divmod(flat, len(pos))
+        if delta[i, j] < -1e-9:
+            return float(delta[i, j]), int(pos[i]), int(pos[j])
+        return None
+
+    def apply_two_opt(self, i: int, j: int) -> None:
+        self.t[i:j + 1] = self.t[i:j + 1][::-1].copy()
+
+    def or_opt_move(self, max_len: int = 3) -> Optional[Tuple[float, int, int, int, bool]]:
+        """Best relocation of a segment of 1..max_len stops as (delta, i, length, k, reversed).
+
+        The segment t[i..i+length-1] is reinserted between t[k] and t[k+1], optionally reversed.
+        """
+        if self.hi < self.lo:
+            return None
+        D, t, n = self.D, self.t, len(self.t)
+        best = None
+        ks = np.arange(self.lo - 1, self.hi + 1)
+        p, q = t[ks], t[(ks + 1) % n]
+        base = D[p, q]
+        for length in range(1, max_len + 1):
+            starts = np.arange(self.lo, self.hi - length + 2)
+            if not len(starts):
+                break
+            ends = starts + length - 1
+            first, last = t[starts], t[ends]
+            before, after = t[starts - 1], t[(ends + 1) % n]
+            gain = D[before, first] + D[last, after] - D[before, after]
+            # inserting next to itself is a no-op
+            invalid = (ks[None, :] >= starts[:, None] - 1) & (ks[None, :] <= ends[:, None])
+            for flipped, (head, tail) in ((False, (first, last)), (True, (last, first))):
+                delta = D[p[None, :], head[:, None]] + D[tail[:, None], q[None, :]] - base[None, :] - gain[:, None]
+                delta[invalid] = np.inf
+                flat = int(np.argmin(delta))
+                a, b = divmod(flat, len(ks))
+                if delta[a, b] < -1e-9 and (best is None or delta[a, b] < best[0]):
+                    best = (float(delta[a, b]), int(starts[a]), length, int(ks[b]), flipped)
+        return best
+
+    def apply_or_opt(self, i: int, length: int, k: int, flipped: bool) -> None:
+        t = list(self.t)
+        seg = t[i:i + length]
+        if flipped:
+            seg.reverse()
+        rest = t[:i] + t[i + length:]
+        at = k + 1 if k < i else k + 1 - length   # position of t[k + 1] once the segment is out
+        self.t = np.array(rest[:at] + seg + rest[at:])
+
+
+def optimize_route(stops: Dict[int, Coord], start: Optional[Coord] = None, return_to_start: bool = False,
+                   windows: Optional[Dict[int, Tuple[float, float]]] = None,
+                   start_minutes: float = DEFAULT_START_MINUTES, visit_minutes: float = DEFAULT_VISIT_MINUTES,
+                   speed_kmh: float = DEFAULT_SPEED_KMH,
+                   time_budget_ms: float = DEFAULT_TIME_BUDGET_MS) -> TripPlan:
+    """Order ``stops`` ({place id: (lat, lon)}) to keep the trip short (and on time)."""
+    started = time.perf_counter()
+    deadline = started + time_budget_ms / 1000
+    windows = {pid: w for pid, w in (windows or {}).items() if pid in stops}
+    if not stops:
+        return TripPlan(order=[], legs_km=[], distance_km=0.0)
+
+    ids, M = distance_matrix(stops)
+    n = len(ids)
+    lats = np.array([stops[pid][0] for pid in ids])
+    lons = np.array([stops[pid][1] for pid in ids])
+
+    # node layout: 0..n-1 stops, then the start point, then the open-path dummy (zero to everything)
+    size = n + (start is not None) + (not return_to_start)
+    D = np.zeros((size, size))
+    D[:n, :n] = M
+    anchor = None
+    if start is not None:
+        anchor = n
+        row = haversine_row(start[0], start[1], lats, lons)
+        D[anchor, :n] = row
+        D[:n, anchor] = row
+    dummy = size - 1 if not return_to_start else None
+
+    tw = None
+    if windows:
+        tw = np.full((size, 2), [-np.inf, np.inf])
+        for pid, (open_m, close_m) in windows.items():
+            tw[ids.index(pid)] = (open_m, close_m)
+
+    def schedule(t: np.ndarray) -> Tuple[List[float], float]:
+        """Arrival minute per stop in route order, and total minutes late."""
+        clock, late, arrivals = start_minutes, 0.0, []
+        node_prev = None
+        for node in t:
+            if node == dummy or node == anchor:
+                node_prev = node if node == anchor else None
+                continue
+            if node_prev is not None:
+                clock += D[node_prev, node] / speed_kmh * 60
+            if tw is not None:
+                clock = max(clock, float(tw[node, 0]))
+                late += max(0.0, clock - float(tw[node, 1]))
+            arrivals.append(float(clock))
+            clock += visit_minutes
+            node_prev = node
+        return arrivals, late
+
+    def cost(route: _Route) -> float:
+        total = route.length()
+        if tw is not None:
+            total += LATE_PENALTY_KM_PER_MIN * schedule(route.t)[1]
+        return total
+
+    # nearest neighbour (time-aware when there are windows) from the start point
+    unvisited = np.ones(size, dtype=bool)
+    unvisited[n:] = False
+    if anchor is not None:
+        current, order = anchor, []
+    else:
+        # the tightest deadline first, else the stop nearest the others' centre
+        current = int(np.argmin(tw[:n, 1])) if tw is not None else int(np.argmin(M.sum(axis=1)))
+        order = [current]
+        unvisited[current] = False
+    clock = start_minutes
+    while unvisited.any():
+        score = np.where(unvisited, D[current], np.inf)
+        if tw is not None:
+            with np.errstate(invalid="ignore"):  # inf - inf on visited rows, masked below
+                arrive = np.maximum(clock + score / speed_kmh * 60, tw[:, 0])
+                score = score + LATE_PENALTY_KM_PER_MIN * np.maximum(0.0, arrive - tw[:, 1])
+            score = np.where(unvisited, score, np.inf)
+            # a stop that would miss its window if visited after one more stop goes next
+            with np.errstate(invalid="ignore"):
+                urgent = unvisited & (tw[:, 1] - arrive < URGENT_SLACK_VISITS * visit_minutes)
+            if urgent.any():
+                score = np.where(urgent, tw[:, 1], np.inf)
+        nxt = int(np.argmin(score))
+        if tw is not None:
+            clock = max(clock + D[current, nxt] / speed_kmh * 60, tw[nxt, 0]) + visit_minutes
+        order.append(nxt)
+        unvisited[nxt] = False
+        current = nxt
+
+    # pin the anchor at position 0 and the dummy at the end; only the stops in between move
+    prefix = [anchor] if anchor is not None else ([dummy] if dummy is not None else [])
+    suffix = [dummy] if (dummy is not None and anchor is not None) else []
+    t = np.array(prefix + order + suffix)
+    lo = 1 if prefix else 0
+    if not prefix:  # closed loop without a start: pinning any one stop is equivalent
+        lo = 1
+    hi = len(t) - 1 - len(suffix)
+    route = _Route(D, t, lo, hi)
+
+    iterations = 0
+    best_cost = cost(route)
+    while time.perf_counter() < deadline:
+        improved = False
+        for finder, apply in ((route.two_opt_move, route.apply_two_opt), (route.or_opt_move, route.apply_or_opt)):
+            move = finder()
+            if move is None:
+                continue
+            saved = route.t.copy()
+            apply(*move[1:])
+            iterations += 1
+            new_cost = cost(route)
+            if new_cost < best_cost - 1e-9:
+                best_cost, improved = new_cost, True
+                break
+            route.t = saved  # distance-improving but worse once lateness counts
+            if time.perf_counter() >= deadline:
+                break
+        if not improved:
+            break
+
+    t = route.t
+    if anchor is None and dummy is not None:
+        # rotate so the free path starts right after the dummy
+        at = int(np.where(t == dummy)[0][0])
+        t = np.concatenate([t[at + 1:], t[:at]])
+    stops_order = [int(node) for node in t if node < n]
+    legs: List[float] = []
+    prev = anchor
+    for node in stops_order:
+        if prev is not None:
+            legs.append(round(float(D[prev, node]), 3))
+        prev = node
+    if return_to_start and stops_order:
+        legs.append(round(float(D[stops_order[-1], anchor if anchor is not None else stops_order[0]]), 3))
+    arrivals, _ = schedule(np.array(([anchor] if anchor is not None else []) + stops_order))
+    late = [ids[node] for node, arr in zip(stops_order, arrivals) if tw is not None and arr > tw[node, 1]]
+    return TripPlan(
+        order=[ids[node] for node in stops_order],
+        legs_km=legs,
+        distance_km=round(sum(legs), 3),
+        arrivals=[round(a, 1) for a in arrivals],
+        late=late,
+        iterations=iterations,
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
+
+
+def unique_ids(place_ids: Sequence[int]) -> List[int]:
+    return list(dict.fromkeys(place_ids))
@@ -1,4 +1,4 @@
-const CategoryChips = ({ categories, selectedCategory, onCategorySelect }) => {
+const CategoryChips = ({ categories, selectedCategory, onCategorySelect, counts }) => {
   const categoryIcons = {
     All: '🌍',
     Beach: '🏖️',
@@ -24,6 +24,9 @@ const CategoryChips = ({ categories, selectedCategory, onCategorySelect }) => {
         >
           <span className="text-lg">{categoryIcons[category] || '📍'}</span>
           <span>{category}</span>
+          {counts && category !== 'All' && (
+            <span className="text-xs opacity-75">{counts[category] ?? 0}</span>
+          )}
         </button>
       ))}
     </div>
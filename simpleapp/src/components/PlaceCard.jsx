@@ -2,6 +2,9 @@ import { Link } from 'react-router-dom';
 import { StarIcon, MapPinIcon, CurrencyDollarIcon } from '@heroicons/react/24/solid';
 import { PlusIcon } from '@heroicons/react/24/outline';
 
+// cards are one column on mobile, up to three on desktop
+const CARD_IMAGE_SIZES = '(min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw';
+
 const PlaceCard = ({ place, onAddToTrip, showAddButton = true }) => {
   const normalizePriceLevel = (value) => {
     const numeric = Number(value);
@@ -25,11 +28,20 @@ const PlaceCard = ({ place, onAddToTrip, showAddButton = true }) => {
     <div className="card overflow-hidden group">
       <div className="relative overflow-hidden">
         <Link to={`/place/${place.id}`}>
-          <img
-            src={place.imageUrl || "/placeholder.jpg"}
-            alt={place.name}
-            className="w-full h-48 object-cover transition-transform duration-500 group-hover:scale-110"
-          />
+          <picture>
+            {place.srcset?.webp && (
+              <source type="image/webp" srcSet={place.srcset.webp} sizes={CARD_IMAGE_SIZES} />
+            )}
+            <img
+              src={place.thumbnails?.['640'] || place.imageUrl || "/placeholder.jpg"}
+              srcSet={place.srcset?.jpeg}
+              sizes={CARD_IMAGE_SIZES}
+              alt={place.name}
+              loading="lazy"
+              decoding="async"
+              className="w-full h-48 object-cover transition-transform duration-500 group-hover:scale-110"
+            />
+          </picture>
 
         </Link>
         <div className="absolute top-3 left-3">
@@ -1,5 +1,7 @@
 // src/lib/api.js
 const API_BASE = import.meta.env.VITE_API_BASE?.replace(/\/$/, '') || '';
+// where `export_to_json --shards` output is hosted, e.g. http://localhost:8000/static/shards
+const SHARDS_BASE = import.meta.env.VITE_SHARDS_BASE?.replace(/\/$/, '') || '';
 
 function url(p) {
   return `${API_BASE}${p}`;
@@ -107,8 +109,79 @@ function normalizePlaces(data) {
   return ensureArray(data).map((item) => normalizePlace(item));
 }
 
-/** Fetch from backend first; fall back to /places.json in /public for dev */
-export async function fetchPlaces() {
+function bboxOverlaps(a, b) {
+  if (!a || !b) return false;
+  return a[0] <= b[2] && b[0] <= a[2] && a[1] <= b[3] && b[1] <= a[3];
+}
+
+let manifestPromise = null;
+const shardCache = new Map();
+
+/** Shard manifest written by `export_to_json --shards` (fetched once per page load) */
+export function fetchShardManifest() {
+  if (!manifestPromise) {
+    manifestPromise = fetch(`${SHARDS_BASE}/manifest.json`, { cache: 'no-cache' })
+      .then((res) => {
+        if (!res.ok) throw new Error(`shard manifest failed: ${res.status}`);
+        return res.json();
+      })
+      .catch((err) => {
+        manifestPromise = null;
+        throw err;
+      });
+  }
+  return manifestPromise;
+}
+
+function fetchShard(file) {
+  // shard names carry a content hash, so the browser/CDN copy never goes stale
+  if (!shardCache.has(file)) {
+    const p = fetch(`${SHARDS_BASE}/${file}`).then((res) => {
+      if (!res.ok) throw new Error(`shard ${file} failed: ${res.status}`);
+      return res.json();
+    });
+    p.catch(() => shardCache.delete(file));
+    shardCache.set(file, p);
+  }
+  return shardCache.get(file);
+}
+
+/** Load only the shards covering `categories` and/or `bbox` ([minLat, minLon, maxLat, maxLon]) */
+async function fetchPlacesFromShards({ categories, bbox } = {}) {
+  const manifest = await fetchShardManifest();
+  let entries;
+  if (bbox) {
+    entries = manifest.tiles.filter((t) => bboxOverlaps(t.bbox, bbox));
+  } else if (categories?.length) {
+    const wanted = new Set(categories);
+    entries = manifest.categories.filter((c) => wanted.has(c.key));
+  } else {
+    entries = manifest.categories;
+  }
+  const shards = await Promise.all(entries.map((e) => fetchShard(e.file)));
+  let data = shards.flat();
+  if (bbox && categories?.length) {
+    const wanted = new Set(categories);
+    data = data.filter((p) => wanted.has(p.category));
+  }
+  console.info(`Loaded ${data.length} places from ${entries.length} shard(s)`);
+  return normalizePlaces(data);
+}
+
+/**
+ * Fetch from backend first; fall back to /places.json in /public for dev.
+ * With VITE_SHARDS_BASE set, only the static shards for the requested
+ * `categories` / `bbox` are downloaded instead (all categories when neither is given).
+ */
+export async function fetchPlaces(options = {}) {
+  if (SHARDS_BASE) {
+    try {
+      return await fetchPlacesFromShards(options);
+    } catch (err) {
+      console.warn('Static shards not available, falling back to the API', err);
+    }
+  }
+
   // Try backend
   try {
     const res = await fetch(url('/api/places'), { cache: 'no-store' });
@@ -143,3 +216,81 @@ export async function fetchPlaceById(id) {
   const numId = Number(id);
   return all.find((p) => Number(p.id) === numId);
 }
+
+/** Typeahead matches for `query` ([{ id, name, category, city, rating }]); pass `signal` to cancel stale ones */
+export async function fetchSuggestions(query, { limit = 8, signal } = {}) {
+  const params = new URLSearchParams({ q: query, limit: String(limit) });
+  const res = await fetch(url(`/api/places/suggest?${params}`), { signal });
+  if (!res.ok) throw new Error(`API /api/places/suggest failed: ${res.status}`);
+  return res.json();
+}
+
+/**
+ * Filter counts: { total, category: [{ value, count }], priceLevel: [{ value, count }], rating: [{ min, count }] }.
+ * Each facet is counted under the other active filters, so the UI can show what a click would leave.
+ */
+export async function fetchFacets({ category, priceLevel, minRating, signal } = {}) {
+  const params = new URLSearchParams();
+  if (category) params.append('category', category);
+  if (priceLevel) params.append('price_level', String(priceLevel));
+  if (minRating) params.append('min_rating', String(minRating));
+  const res = await fetch(url(`/api/places/facets?${params}`), { signal });
+  if (!res.ok) throw new Error(`API /api/places/facets failed: ${res.status}`);
+  return res.json();
+}
+
+/**
+ * Map clusters for a viewport: `bbox` is [minLat, minLon, maxLat, maxLon] like the shard manifest.
+ * Returns { zoom, total, clusters: [{ lat, lon, count, ids }] }; `zoom` may be coarser than asked.
+ */
+export async function fetchPlaceClusters(bbox, zoom) {
+  const params = new URLSearchParams({ bbox: bbox.join(','), zoom: String(Math.round(zoom)) });
+  const res = await fetch(url(`/api/places/clusters?${params}`));
+  if (!res.ok) {
+    const t = await res.text();
+    console.error('API /api/places/clusters failed:', res.status, t);
+    throw new Error('Could not load map clusters');
+  }
+  return res.json();
+}
+
+/** Places similar to `id` (precomputed by `python -m backend.similar_places`); [] when unavailable */
+export async function fetchSimilarPlaces(id, limit = 6) {
+  try {
+    const res = await fetch(url(`/api/places/${Number(id)}/similar?limit=${limit}`));
+    if (!res.ok) return [];
+    return normalizePlaces(await res.json());
+  } catch (err) {
+    console.warn('Similar places not available', err);
+    return [];
+  }
+}
+
+/**
+ * Ask the backend for a visiting order. `options` may carry `start` ({ lat, lon }),
+ * `returnToStart`, `startTime` ("09:00") and `timeWindows` ([{ placeId, open, close }]).
+ */
+export async function optimizeTrip(placeIds, options = {}) {
+  const body = {
+    place_ids: placeIds.map(Number),
+    start: options.start ?? null,
+    return_to_start: Boolean(options.returnToStart),
+    time_windows: (options.timeWindows ?? []).map((w) => ({
+      place_id: Number(w.placeId),
+      open: w.open ?? null,
+      close: w.close ?? null,
+    })),
+  };
+  if (options.startTime != null) body.start_time = options.startTime;
+  const res = await fetch(url('/api/trips/optimize'), {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(body),
+  });
+  if (!res.ok) {
+    const t = await res.text();
+    console.error('API /api/trips/optimize failed:', res.status, t);
+    throw new Error('Could not optimize trip');
+  }
+  return res.json();
+}
@@ -1,10 +1,11 @@
 import { useState, useEffect } from 'react';
+import { Link } from 'react-router-dom';
 import CategoryChips from '../components/CategoryChips';
 import PlaceCard from '../components/PlaceCard';
 import Toast from '../components/Toast';
 import { storage } from '../lib/storage';
 import { MagnifyingGlassIcon, AdjustmentsHorizontalIcon } from '@heroicons/react/24/outline';
-import { fetchPlaces } from '../lib/api';
+import { fetchFacets, fetchPlaces, fetchSuggestions } from '../lib/api';
 
 const Browse = () => {
   const [places, setPlaces] = useState([]);
@@ -13,6 +14,8 @@ const Browse = () => {
   const [selectedRating, setSelectedRating] = useState('All');
   const [selectedPriceLevel, setSelectedPriceLevel] = useState('All');
   const [searchQuery, setSearchQuery] = useState('');
+  const [suggestions, setSuggestions] = useState([]);
+  const [facets, setFacets] = useState(null);
   const [showFilters, setShowFilters] = useState(false);
   const [toast, setToast] = useState(null);
   const [loading, setLoading] = useState(true);
@@ -29,7 +32,8 @@ const Browse = () => {
         const data = await fetchPlaces();
         setPlaces(data);
         setFilteredPlaces(data);
-        setCategories(['All', ...new Set(data.map(place => place.category))]);
+        // the facets request below replaces these once it answers
+        setCategories((prev) => (prev.length > 1 ? prev : ['All', ...new Set(data.map(place => place.category))]));
       } catch (e) {
         console.error("Failed to load places", e);
       } finally {
@@ -38,6 +42,49 @@ const Browse = () => {
     })();
   }, []);
 
+  // Typeahead from the backend on every keystroke; a newer keystroke cancels the older request
+  useEffect(() => {
+    const q = searchQuery.trim();
+    if (!q) {
+      setSuggestions([]);
+      return undefined;
+    }
+    const controller = new AbortController();
+    fetchSuggestions(q, { signal: controller.signal })
+      .then(setSuggestions)
+      .catch((err) => {
+        if (err.name !== 'AbortError') setSuggestions([]);
+      });
+    return () => controller.abort();
+  }, [searchQuery]);
+
+  // Counts per category / price / rating under the active filters, from the server
+  useEffect(() => {
+    const controller = new AbortController();
+    fetchFacets({
+      category: selectedCategory === 'All' ? undefined : selectedCategory,
+      priceLevel: selectedPriceLevel === 'All' ? undefined : selectedPriceLevel,
+      minRating: selectedRating === 'All' ? undefined : parseFloat(selectedRating),
+      signal: controller.signal,
+    })
+      .then((data) => {
+        setFacets(data);
+        const names = data.category.map((c) => c.value);
+        // keep the selected chip even when the other filters leave it empty
+        if (selectedCategory !== 'All' && !names.includes(selectedCategory)) names.push(selectedCategory);
+        setCategories(['All', ...names]);
+      })
+      .catch((err) => {
+        if (err.name !== 'AbortError') setFacets(null);
+      });
+    return () => controller.abort();
+  }, [selectedCategory, selectedPriceLevel, selectedRating]);
+
+  const categoryCounts = facets && Object.fromEntries(facets.category.map((c) => [c.value, c.count]));
+  const priceCounts = facets && Object.fromEntries(facets.priceLevel.map((p) => [String(p.value), p.count]));
+  const ratingCounts = facets && Object.fromEntries(facets.rating.map((r) => [r.min, r.count]));
+  const withCount = (label, count) => (count === undefined ? label : `${label} (${count})`);
+
   // Apply filters when places or filter settings change
   useEffect(() => {
     let filtered = [...places];
@@ -127,6 +174,18 @@ const Browse = () => {
                 onChange={(e) => setSearchQuery(e.target.value)}
                 className="w-full pl-10 pr-4 py-3 border border-gray-300 rounded-lg focus:ring-2 focus:ring-adventure-500 focus:border-adventure-500"
               />
+              {suggestions.length > 0 && (
+                <ul className="absolute z-10 left-0 right-0 mt-1 bg-white border border-gray-200 rounded-lg shadow-lg overflow-hidden">
+                  {suggestions.map((item) => (
+                    <li key={item.id}>
+                      <Link to={`/place/${item.id}`} className="block px-4 py-2 hover:bg-gray-50">
+                        <span className="font-medium text-gray-900">{item.name}</span>
+                        <span className="ml-2 text-sm text-gray-500">{item.category}</span>
+                      </Link>
+                    </li>
+                  ))}
+                </ul>
+              )}
             </div>
 
             <button
@@ -152,7 +211,9 @@ const Browse = () => {
                     className="w-full px-3 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-adventure-500 focus:border-adventure-500"
                   >
                     {ratings.map(rating => (
-                      <option key={rating} value={rating}>{rating}</option>
+                      <option key={rating} value={rating}>
+                        {rating === 'All' ? 'All' : withCount(rating, ratingCounts?.[parseFloat(rating)])}
+                      </option>
                     ))}
                   </select>
                 </div>
@@ -169,7 +230,7 @@ const Browse = () => {
                   >
                     {priceLevels.map(level => (
                       <option key={level} value={level}>
-                        {level === 'All' ? 'All' : '$'.repeat(parseInt(level))}
+                        {level === 'All' ? 'All' : withCount('$'.repeat(parseInt(level)), priceCounts ? priceCounts[level] ?? 0 : undefined)}
                       </option>
                     ))}
                   </select>
@@ -195,6 +256,7 @@ const Browse = () => {
           categories={categories}
           selectedCategory={selectedCategory}
           onCategorySelect={setSelectedCategory}
+          counts={categoryCounts}
         />
 
         <div className="flex justify-between items-center mb-6">
@@ -2,6 +2,7 @@ import { useState, useEffect } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import { storage } from '../lib/storage';
 import Toast from '../components/Toast';
+import PlaceCard from '../components/PlaceCard';
 import {
   StarIcon,
   MapPinIcon,
@@ -10,7 +11,7 @@ import {
   ArrowLeftIcon,
   CheckIcon
 } from '@heroicons/react/24/solid';
-import { fetchPlaceById } from '../lib/api';
+import { fetchPlaceById, fetchSimilarPlaces } from '../lib/api';
 
 const PlaceDetails = () => {
   const { id } = useParams();
@@ -22,6 +23,7 @@ const PlaceDetails = () => {
   const [toast, setToast] = useState(null);
   const [isAdded, setIsAdded] = useState(false);
   const [loading, setLoading] = useState(true);
+  const [similar, setSimilar] = useState([]);
 
   // Load place + trips
   useEffect(() => {
@@ -42,6 +44,16 @@ const PlaceDetails = () => {
     return () => { active = false; };
   }, [id]);
 
+  // Similar places (optional; the section stays hidden without an index)
+  useEffect(() => {
+    let active = true;
+    setSimilar([]);
+    fetchSimilarPlaces(id).then((list) => {
+      if (active) setSimilar(list);
+    });
+    return () => { active = false; };
+  }, [id]);
+
   // Check if already in selected trip
   useEffect(() => {
     if (place && selectedTripId) {
@@ -284,6 +296,17 @@ const PlaceDetails = () => {
           </div>
 
         </div>
+
+        {similar.length > 0 && (
+          <div className="mt-12">
+            <h2 className="text-2xl font-bold text-gray-900 mb-6">You might also like</h2>
+            <div className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-3 gap-6">
+              {similar.map((p) => (
+                <PlaceCard key={p.id} place={p} showAddButton={false} />
+              ))}
+            </div>
+          </div>
+        )}
       </div>
     </div>
   );
@@ -0,0 +1,71 @@
+import pytest
+
+from backend.dedupe import (
+    DedupeIndex,
+    fingerprint,
+    is_duplicate,
+    normalize_address,
+    normalize_name,
+    postal_code,
+)
+from backend.geo import geohash_encode
+
+PARK = {"name": "River Legacy Park", "address": "701 NW Green Oaks Blvd, Arlington, TX 76006",
+        "lat": 32.7876, "lon": -97.1226}
+
+
+@pytest.mark.parametrize("name, normalized", [
+    ("The River Legacy Parks (parks)", "river legacy park"),
+    ("Café Brazil", "cafe brazil"),
+    ("Fish & Chips", "fish and chip"),
+    ("Business Class", "business class"),  # -ss / -us / -is plurals are left alone
+    ("Campus", "campus"),
+    (None, ""),
+])
+def test_normalize_name(name, normalized):
+    assert normalize_name(name) == normalized
+
+
+def test_normalize_address_and_postal_code():
+    assert normalize_address("701 Northwest Green Oaks Boulevard, Arlington") == "701 nw green oaks blvd"
+    assert postal_code("1 Main St, Arlington, TX 76010-1234") == "76010"
+    assert postal_code("1 Main St") is None
+
+
+def test_blocking_keys():
+    fp = fingerprint(PARK)
+    assert fp.blocks() == ["zip:76006", f"gh:{geohash_encode(32.7876, -97.1226, precision=5)}", "name:rive"]
+    assert fingerprint({"name": "Nowhere", "lat": None, "lon": None}).blocks() == ["name:nowh"]
+
+
+def test_same_address_near_miss_names():
+    a = fingerprint(PARK)
+    assert is_duplicate(a, fingerprint(dict(PARK, name="River Legacy Parks")))
+    assert is_duplicate(a, fingerprint(dict(PARK, name="River Legacy Park (museums)")))
+    assert not is_duplicate(a, fingerprint(dict(PARK, name="River Legacy Living Science Center")))
+
+
+def test_different_postal_codes_are_never_duplicates():
+    other = dict(PARK, address="701 NW Green Oaks Blvd, Arlington, TX 76010")
+    assert not is_duplicate(fingerprint(PARK), fingerprint(other))
+
+
+def test_name_only_match_needs_the_stricter_threshold():
+    # no address, no coordinates: only the name prefix block is shared
+    a = fingerprint({"name": "Arlington Museum of Art"})
+    assert is_duplicate(a, fingerprint({"name": "The Arlington Museum of Art"}))
+    assert not is_duplicate(a, fingerprint({"name": "Arlington Music Hall"}))
+
+
+def test_different_streets_far_apart_need_the_exact_name():
+    a = fingerprint({"name": "Taco Casa", "address": "100 Cooper St"})
+    assert not is_duplicate(a, fingerprint({"name": "Taco Casas", "address": "900 Abram St"}))
+
+
+def test_index_flags_duplicates_and_keeps_new_places():
+    index = DedupeIndex.from_places([(1, PARK)])
+    assert index.add_if_new(dict(PARK, name="The River Legacy Parks"), key=2).key == 1
+    assert index.add_if_new(dict(PARK, name="Six Flags Over Texas", address="2201 E Road to Six Flags St"),
+                            key=3) is None
+    assert index.size == 2
+    assert index.find({"name": "Six Flags Over Texas", "address": "2201 E Road to Six Flags St"}).key == 3
@@ -0,0 +1,21 @@
+import pytest
+
+from backend import fast_json
+
+VALUES = [
+    {"id": 1, "rating": float("nan"), "lat": float("inf"), "lon": -float("inf"), "tags": [1.5, float("nan")]},
+    {"name": "Café", "nested": {"x": [None, True, 2]}, "n": 3},
+    [float("nan")],
+]
+
+
+@pytest.mark.parametrize("value", VALUES)
+def test_stdlib_fallback_matches_orjson(value, monkeypatch):
+    with_orjson = fast_json.dumps(value)
+    monkeypatch.setattr(fast_json, "orjson", None)
+    assert fast_json.dumps(value) == with_orjson
+
+
+def test_non_finite_floats_become_null(monkeypatch):
+    monkeypatch.setattr(fast_json, "orjson", None)
+    assert fast_json.dumps({"a": float("nan"), "b": [float("inf")]}) == b'{"a":null,"b":[null]}'
@@ -0,0 +1,83 @@
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from backend.ai import cache, generator
+
+PLACES = [{"name": "Levitt Pavilion", "address": "100 W Abram St, Arlington, TX 76010"},
+          {"name": "River Legacy Park", "address": "701 NW Green Oaks Blvd, Arlington, TX 76006"}]
+
+
+class FakeClient:
+    """Streams PLACES as a chat completion, a few characters per chunk, and counts the calls."""
+
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, stream):
+        self.calls += 1
+        text = json.dumps(PLACES)
+        return [SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text[i:i + 7]))])
+                for i in range(0, len(text), 7)]
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", tmp_path)
+    return FakeClient()
+
+
+def _names(places):
+    return [p["name"] for p in places]
+
+
+def test_cache_hit_skips_the_client(client):
+    first = generator.generate_places("Culture", "Arlington, TX", client=client)
+    again = generator.generate_places("Culture", "Arlington, TX", client=client)
+    assert _names(first) == _names(again) == ["Levitt Pavilion", "River Legacy Park"]
+    assert client.calls == 1
+
+
+def test_refresh_and_no_cache_call_the_client(client):
+    generator.generate_places("Culture", "Arlington, TX", client=client)
+    generator.generate_places("Culture", "Arlington, TX", client=client, refresh=True)
+    generator.generate_places("Culture", "Arlington, TX", client=client, use_cache=False)
+    assert client.calls == 3
+    generator.generate_places("Culture", "Arlington, TX", client=client)
+    assert client.calls == 3
+
+
+def test_expired_entry_is_regenerated(client, monkeypatch):
+    generator.generate_places("Culture", "Arlington, TX", client=client)
+    monkeypatch.setattr(cache, "TTL_S", -1.0)
+    generator.generate_places("Culture", "Arlington, TX", client=client)
+    assert client.calls == 2
+
+
+def test_key_changes_with_model_and_prompt(client, monkeypatch):
+    generator.generate_places("Culture", "Arlington, TX", client=client)
+    monkeypatch.setattr(generator, "MODEL", "another-model")
+    generator.generate_places("Culture", "Arlington, TX", client=client)
+    assert client.calls == 2
+
+    build_prompts = generator._build_prompts
+    monkeypatch.setattr(generator, "_build_prompts", lambda c, r: tuple(p + " v2" for p in build_prompts(c, r)))
+    generator.generate_places("Culture", "Arlington, TX", client=client)
+    assert client.calls == 3
+    generator.generate_places("Culture", "Arlington, TX", client=client)
+    assert client.calls == 3
+
+
+def test_oldest_entries_are_evicted(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "MAX_ENTRIES", 1)
+    generator.generate_places("Culture", "Arlington, TX", client=client)
+    (old,) = tmp_path.glob("*.json")
+    os.utime(old, (1, 1))
+    generator.generate_places("Dining", "Arlington, TX", client=client)
+    assert not old.exists() and len(list(tmp_path.glob("*.json"))) == 1
+
+    generator.generate_places("Culture", "Arlington, TX", client=client)
+    assert client.calls == 3
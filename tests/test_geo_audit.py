@@ -0,0 +1,25 @@
+import sqlite3
+
+from backend import geo_audit
+
+
+def test_soft_deleted_rows_are_not_audited(tmp_path):
+    db = tmp_path / "places.db"
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE places (id INTEGER PRIMARY KEY, name TEXT, address TEXT, lat REAL, lon REAL, "
+                 "geo_confidence TEXT, deleted_at TEXT)")
+    conn.executemany("INSERT INTO places VALUES (?, ?, ?, ?, ?, ?, ?)", [
+        (1, "Live", "1 Main St", 32.7357, -97.1081, "verified", None),
+        (2, "Retired twin", "1 Main St", 32.7357, -97.1081, "verified", "2026-01-01T00:00:00"),
+        (3, "Retired, no coords", None, None, None, None, "2026-01-01T00:00:00"),
+    ])
+    conn.commit()
+    conn.close()
+
+    summary = geo_audit.run(db, geo_audit.DEFAULT_REGION)
+    assert summary["flagged"] == 0  # the retired twin doesn't make the live row a duplicate
+
+    conn = sqlite3.connect(db)
+    rows = conn.execute("SELECT id, geo_flags, geo_confidence FROM places ORDER BY id").fetchall()
+    conn.close()
+    assert rows == [(1, None, "verified"), (2, None, "verified"), (3, None, None)]
@@ -0,0 +1,52 @@
+import csv
+import io
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine
+
+from backend import import_places
+
+
+@pytest.fixture
+def engine(tmp_path):
+    db = tmp_path / "places.db"
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE places (id INTEGER PRIMARY KEY, name TEXT, category TEXT, description TEXT, "
+                 "address TEXT, city TEXT, lat REAL, lon REAL, rating REAL, deleted_at TEXT)")
+    conn.close()
+    return create_engine(f"sqlite:///{db}")
+
+
+def _names(engine):
+    with engine.connect() as conn:
+        return sorted(r[0] for r in conn.exec_driver_sql("SELECT name FROM places"))
+
+
+def test_invalid_utf8_rejects_only_that_line(engine, tmp_path):
+    feed = b'{"name":"A","address":"1 Main"}\n{"name":"\xff\xfe"}\n{"name":"B","address":"2 Main"}\n'
+    report = import_places.import_stream(io.BytesIO(feed), "ndjson", engine, batch_size=1,
+                                         rejected_path=tmp_path / "rejected.ndjson")
+    assert (report.rows, report.imported, report.rejected) == (3, 2, 1)
+    assert report.sample_errors == [{"line": 2, "errors": [import_places.INVALID_UTF8]}]
+    assert "�" in (tmp_path / "rejected.ndjson").read_text(encoding="utf-8")
+    assert _names(engine) == ["A", "B"]
+
+
+def test_invalid_utf8_in_csv_field(engine):
+    feed = b'name,address\nC,3 Main\n"D\xff",4 Main\n'
+    report = import_places.import_stream(io.BytesIO(feed), "csv", engine)
+    assert (report.imported, report.rejected) == (1, 1)
+    assert _names(engine) == ["C"]
+
+
+def test_malformed_csv_row_is_rejected(engine):
+    feed = b'name,address\n"' + b"x" * 200 + b'",1 Main\nF,6 Main\n'
+    limit = csv.field_size_limit(100)
+    try:
+        report = import_places.import_stream(io.BytesIO(feed), "csv", engine)
+    finally:
+        csv.field_size_limit(limit)
+    assert (report.imported, report.rejected) == (1, 1)
+    assert report.sample_errors[0]["errors"][0].startswith("invalid CSV")
+    assert _names(engine) == ["F"]
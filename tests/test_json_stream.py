@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from backend.ai.json_stream import ObjectArrayParser, iter_objects
+
+PLACES = [
+    {"name": "Say \"Cheese\" Deli", "address": "1 Main St"},
+    {"name": "C:\\Art\\Gallery\\", "description": "a \\\" tricky one"},
+    {"name": "{Braces} [and brackets] in strings", "tags": ["{", "}", "]"], "nested": {"a": {"b": [1, {}]}}},
+]
+TEXT = json.dumps(PLACES)
+
+
+def _chunks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, len(TEXT)])
+def test_objects_split_across_chunks(size):
+    assert list(iter_objects(_chunks(TEXT, size))) == PLACES
+
+
+def test_objects_come_out_as_soon_as_they_close():
+    parser = ObjectArrayParser()
+    first = json.dumps(PLACES[0])
+    assert parser.feed("[" + first[:-1]) == []
+    assert parser.feed(first[-1] + ", {") == [PLACES[0]]
+    assert parser.feed('"x": 1}]') == [{"x": 1}]
+    assert parser.done
+
+
+def test_prose_and_code_fence_around_the_array():
+    text = "Here you go [10 places]:\n```json\n" + TEXT + "\n```\nEnjoy!"
+    assert list(iter_objects(_chunks(text, 5))) == PLACES
+
+
+def test_empty_array():
+    assert list(iter_objects(["[", " ]"])) == []
+
+
+@pytest.mark.parametrize("text, message", [
+    ('[{"name": "A"}, 5]', "unexpected"),
+    ('[{"name": "A"} {"name": "B"}]', "unexpected"),
+    ('[{"name": "A",}]', "malformed object #1"),
+    ('[{"name": "A"}, {"name": "B"', "cut off after 1 object"),
+    ('[{"name": "A\\"}]', "cut off after 0 object"),  # the escaped quote keeps the string open
+    ("Sorry, I can't help with that.", "no JSON array"),
+    ("[1, 2, 3]", "no JSON array"),
+])
+def test_malformed_or_truncated_input(text, message):
+    with pytest.raises(ValueError, match=message):
+        list(iter_objects(_chunks(text, 3)))
+
+
+def test_error_is_raised_before_the_rest_is_read():
+    def chunks():
+        yield '[{"name": "A"}, '
+        yield "5"
+        raise AssertionError("read past the error")
+
+    items = iter_objects(chunks())
+    assert next(items) == {"name": "A"}
+    with pytest.raises(ValueError):
+        next(items)
@@ -0,0 +1,22 @@
+from fastapi.testclient import TestClient
+
+from backend import app as places_app
+from backend.shared_snapshot import Snapshot, encode_snapshot
+
+
+def _snapshot(n):
+    return Snapshot.from_bytes(encode_snapshot(
+        [{"id": i, "name": f"Place {i}", "category": "Cafe", "priceLevel": 2, "rating": 4.5} for i in range(1, n + 1)]
+    ))
+
+
+def test_filtered_list_reads_items_from_the_snapshot_it_filtered(monkeypatch):
+    old, new = _snapshot(3), _snapshot(6)
+    served = iter([old])  # the data reloads right after the first lookup
+    monkeypatch.setattr(places_app, "_places_snapshot", lambda base_url: next(served, new))
+    monkeypatch.setattr(places_app, "_derived", {})
+
+    r = TestClient(places_app.app).get("/api/places", params={"price_level": 2})
+    assert r.status_code == 200
+    cols = places_app._derived[("columns", "http://testserver")]
+    assert [p["id"] for p in r.json()] == list(range(1, cols.source.count + 1))
@@ -0,0 +1,40 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import app as places_app
+from backend import similar_places
+from backend.shared_snapshot import Snapshot, encode_snapshot
+
+PLACES = [
+    {"id": i, "name": f"Place {i}", "category": "Culture", "description": f"museum gallery art exhibit {i % 3}",
+     "lat": 32.73 + i / 1000, "lon": -97.11}
+    for i in range(1, 31)
+]
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    def use_index(k):
+        path = tmp_path / f"similar-{k}.json"
+        index, _ = similar_places.build_index(PLACES, k=k)
+        similar_places.save_index_file(index, path)
+        monkeypatch.setattr(similar_places, "_index", similar_places.SimilarIndex(path))
+
+    snap = Snapshot.from_bytes(encode_snapshot(PLACES))
+    monkeypatch.setattr(places_app, "_places_snapshot", lambda base_url: snap)
+    return TestClient(places_app.app), use_index
+
+
+def test_default_index_serves_the_largest_limit(client):
+    http, use_index = client
+    use_index(similar_places.DEFAULT_K)
+    r = http.get("/api/places/1/similar", params={"limit": places_app.MAX_SIMILAR})
+    assert r.status_code == 200
+    assert len(r.json()) == places_app.MAX_SIMILAR
+
+
+def test_limit_above_the_stored_k_is_rejected(client):
+    http, use_index = client
+    use_index(5)
+    assert len(http.get("/api/places/1/similar", params={"limit": 5}).json()) == 5
+    assert http.get("/api/places/1/similar", params={"limit": 6}).status_code == 422
@@ -0,0 +1,35 @@
+import threading
+import time
+
+import pytest
+
+from backend.single_flight import VersionedCache
+
+
+def test_slow_old_build_does_not_replace_newer_entry():
+    cache = VersionedCache(max_wait_s=5.0, serve_stale=False)
+    release_old = threading.Event()
+
+    def build_old():
+        release_old.wait(5)
+        return "old"
+
+    with pytest.raises(TimeoutError):
+        cache.get("places", 1, build_old, max_wait_s=0)
+    assert cache.get("places", 2, lambda: "new") == "new"
+
+    release_old.set()
+    deadline = time.monotonic() + 5
+    while cache._flight.in_flight() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not cache._flight.in_flight()
+    assert cache.get("places", 2, lambda: "rebuilt") == "new"
+
+
+def test_newer_build_replaces_expired_entry():
+    cache = VersionedCache(max_wait_s=5.0, serve_stale=False)
+    assert cache.get("places", 1, lambda: "v1") == "v1"
+    cache.expire()
+    assert cache.get("places", 1, lambda: "v1 again") == "v1 again"
+    assert cache.get("places", 2, lambda: "v2") == "v2"
+    assert cache.get("places", 2, lambda: "unused") == "v2"
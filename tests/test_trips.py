@@ -0,0 +1,65 @@
+import pytest
+from pydantic import ValidationError
+
+from backend.schemas import TripOptimizeRequest, parse_minutes
+from backend.trips import optimize_route
+
+STOPS = {1: (32.7357, -97.1081), 2: (32.7511, -97.0825)}
+
+
+def test_single_stop_return_trip_without_start():
+    plan = optimize_route({1: STOPS[1]}, return_to_start=True)
+    assert plan.order == [1]
+    assert plan.distance_km == 0
+
+
+def test_two_stop_return_trip_without_start():
+    plan = optimize_route(STOPS, return_to_start=True)
+    assert sorted(plan.order) == [1, 2]
+    assert len(plan.legs_km) == 2
+    assert plan.legs_km[0] == plan.legs_km[1] > 0
+
+
+@pytest.mark.parametrize("stops", [{1: STOPS[1]}, STOPS])
+def test_short_return_trip_with_start(stops):
+    plan = optimize_route(stops, start=(32.70, -97.10), return_to_start=True)
+    assert sorted(plan.order) == sorted(stops)
+    assert len(plan.legs_km) == len(stops) + 1
+
+
+@pytest.mark.parametrize("value, minutes", [(540, 540.0), ("09:00", 540.0), ("9:30", 570.0), ("24:00", 1440.0), (0, 0.0)])
+def test_parse_minutes(value, minutes):
+    assert parse_minutes(value) == minutes
+
+
+@pytest.mark.parametrize("value", ["25:99", "10:60", "-3:00", "24:01", "9", "nine", -1, 1441, 10 ** 9, float("nan"), True])
+def test_out_of_range_or_malformed_times_are_rejected(value):
+    with pytest.raises(ValidationError):
+        TripOptimizeRequest(place_ids=[1], start_time=value)
+    with pytest.raises(ValidationError):
+        TripOptimizeRequest(place_ids=[1], time_windows=[{"place_id": 1, "close": value}])
+
+
+@pytest.mark.parametrize("fields", [
+    {"start": {"lat": 91, "lon": 0}},
+    {"start": {"lat": 0, "lon": -181}},
+    {"start": {"lat": float("nan"), "lon": 0}},
+    {"visit_minutes": 0},
+    {"visit_minutes": -5},
+    {"speed_kmh": 0},
+    {"speed_kmh": -30},
+    {"time_budget_ms": 0},
+    {"time_budget_ms": float("nan")},
+])
+def test_bad_trip_parameters_are_rejected(fields):
+    with pytest.raises(ValidationError):
+        TripOptimizeRequest(place_ids=[1], **fields)
+
+
+def test_optimize_endpoint_answers_422_for_zero_speed():
+    from fastapi.testclient import TestClient
+
+    from backend.app import app
+
+    r = TestClient(app).post("/api/trips/optimize", json={"place_ids": [1, 2], "speed_kmh": 0})
+    assert r.status_code == 422